@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+纯Python热点路径的微基准测试
+说话人合并、timeline分块、语义分块、timeline解析、网页搜索过滤，
+在不同规模的合成文字稿上计时并给出扩展曲线（log-log斜率，1≈线性，2≈平方）
+
+用法:
+    python benchmarks/hotpaths.py
+    python benchmarks/hotpaths.py --sizes 1000 10000 --speakers 4 --json results.json
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from podcast_visualizer.alignment import merge_speakers
+from podcast_visualizer.segmenter import Segmenter, filter_segments
+from synthetic import make_transcription, split_for_merge, make_description
+
+DEFAULT_SIZES = [1000, 5000, 20000, 50000, 200000]
+
+
+def naive_merge(transcription, speakers):
+    """原来的逐一比较合并（O(N × M)），作为对照"""
+    result = []
+    for seg in transcription:
+        best_speaker = None
+        max_overlap = 0
+        for speaker in speakers:
+            overlap = max(0, min(seg['end'], speaker['end']) - max(seg['start'], speaker['start']))
+            if overlap > max_overlap:
+                max_overlap = overlap
+                best_speaker = speaker['speaker']
+        result.append({
+            'start': seg['start'],
+            'end': seg['end'],
+            'speaker': best_speaker or 'UNKNOWN',
+            'text': seg['text'],
+        })
+    return result
+
+
+def chapters_for(n_segments: int) -> int:
+    return min(300, max(5, n_segments // 100))
+
+
+def build_cases(n: int, speakers: int):
+    """为规模n准备各基准的 (函数, 参数)"""
+    transcription = make_transcription(n, n_speakers=speakers, seed=n)
+    asr, turns = split_for_merge(transcription, seed=n)
+    duration = int(transcription[-1]['end']) + 1
+    description = make_description(duration, chapters_for(n), seed=n)
+    segmenter = Segmenter()
+    segments = segmenter.segment_by_timeline(description, transcription, duration)
+
+    return {
+        'merge_speakers': (merge_speakers, (asr, turns)),
+        'merge_naive': (naive_merge, (asr, turns)),
+        'segment_by_timeline': (segmenter.segment_by_timeline, (description, transcription, duration)),
+        'segment_by_semantic': (segmenter.segment_by_semantic, (transcription,)),
+        'timeline_parse': (segmenter.timeline_parser.parse, (description,)),
+        # 搜索一个不存在的词：需要扫描全部对话，是最坏情况
+        'search_filter': (filter_segments, (segments, transcription, '不存在的关键词')),
+    }
+
+
+def best_time(func, args, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scaling_exponent(sizes, times) -> float:
+    """log-log最小二乘斜率"""
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if t > 0]
+    if len(points) < 2:
+        return float('nan')
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var if var else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播客可视化工具 - 热点路径微基准测试")
+    parser.add_argument("--sizes", type=int, nargs='+', default=DEFAULT_SIZES, help="文字稿片段数")
+    parser.add_argument("--speakers", type=int, default=2, help="说话人数量 (默认: 2)")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快 (默认: 3)")
+    parser.add_argument("--only", nargs='+', help="只运行指定的基准")
+    parser.add_argument("--naive-max", type=int, default=2000,
+                        help="逐一比较合并只在不超过该规模时运行 (默认: 2000)")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    results = {}
+    for n in args.sizes:
+        cases = build_cases(n, args.speakers)
+        for name, (func, func_args) in cases.items():
+            if args.only and name not in args.only:
+                continue
+            if name == 'merge_naive' and n > args.naive_max:
+                continue
+            seconds = best_time(func, func_args, args.repeat)
+            results.setdefault(name, []).append({'n': n, 'seconds': seconds})
+            print(f"{name:<22} n={n:<8} {seconds * 1000:>10.2f}ms  ({seconds / n * 1e6:.2f}µs/片段)")
+
+    print()
+    print(f"{'基准':<22} {'斜率':>6}   (log-log，1≈线性，2≈平方)")
+    for name, points in results.items():
+        exponent = scaling_exponent([p['n'] for p in points], [p['seconds'] for p in points])
+        print(f"{name:<22} {exponent:>6.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'speakers': args.speakers, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 结果已保存到: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+mp3转码开销测量
+对同一段音频分别测量：转码为192kbps mp3、从原始音频解码为16kHz PCM、从mp3解码为PCM，
+得出保留原始音频流每期节目节省的CPU时间
+
+用法:
+    python benchmarks/reencode.py episode.webm
+    python benchmarks/reencode.py --synthetic 60     # 用ffmpeg生成60分钟的opus音频
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def run_ffmpeg(args) -> dict:
+    """运行ffmpeg，返回墙钟时间和CPU时间（子进程的user + sys）"""
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    subprocess.run(["ffmpeg", "-nostdin", "-y", "-loglevel", "error"] + args, check=True)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return {'wall': wall, 'cpu': cpu}
+
+
+def make_synthetic(path: str, minutes: float):
+    """生成带噪声的opus音频（webm容器，与YouTube的原始音频流相同）"""
+    run_ffmpeg([
+        "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.1:duration={minutes * 60}",
+        "-ac", "2", "-ar", "48000", "-c:a", "libopus", "-b:a", "128k", path,
+    ])
+
+
+def decode_args(source: str, target: str):
+    return ["-threads", "0", "-i", source, "-f", "f32le", "-acodec", "pcm_f32le",
+            "-ac", "1", "-ar", "16000", target]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播客可视化工具 - mp3转码开销测量")
+    parser.add_argument("audio", nargs='?', help="原始音频文件（opus/m4a）")
+    parser.add_argument("--synthetic", type=float, help="生成指定分钟数的合成opus音频代替输入文件")
+    args = parser.parse_args()
+
+    if not args.audio and not args.synthetic:
+        parser.error("需要提供音频文件或 --synthetic")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = args.audio
+        if args.synthetic:
+            source = os.path.join(tmp, 'synthetic.webm')
+            make_synthetic(source, args.synthetic)
+
+        mp3_path = os.path.join(tmp, 'copy.mp3')
+        pcm_path = os.path.join(tmp, 'audio.f32')
+
+        encode = run_ffmpeg(["-i", source, "-vn", "-acodec", "libmp3lame", "-b:a", "192k", mp3_path])
+        native = run_ffmpeg(decode_args(source, pcm_path))
+        from_mp3 = run_ffmpeg(decode_args(mp3_path, pcm_path))
+        audio_seconds = os.path.getsize(pcm_path) / 4 / 16000
+
+    print(f"音频时长: {audio_seconds / 60:.1f}分钟 ({os.path.basename(source)})")
+    print(f"  mp3转码:        墙钟 {encode['wall']:7.2f}s  CPU {encode['cpu']:7.2f}s")
+    print(f"  原始音频->PCM:  墙钟 {native['wall']:7.2f}s  CPU {native['cpu']:7.2f}s")
+    print(f"  mp3->PCM:       墙钟 {from_mp3['wall']:7.2f}s  CPU {from_mp3['cpu']:7.2f}s")
+
+    saved = encode['cpu'] + from_mp3['cpu'] - native['cpu']
+    print(f"✓ 保留原始音频每期节省CPU {saved:.2f}s "
+          f"(每小时音频 {saved / audio_seconds * 3600 if audio_seconds else 0:.1f}s)")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+语义分块的耗时和准确度
+在话题边界已知的合成文字稿上运行语义分块，统计耗时、找到的分界与真实分界的吻合程度
+（相差不超过--tolerance秒视为命中），以及分块标题；
+再按--batch行一批增量输入同一文字稿，检查结果与一次性分块一致，并统计增量分块保留的最多块数
+和话题从结束到输出之间又到达了多长时间的文字稿
+
+用法:
+    python benchmarks/semantic_segment.py
+    python benchmarks/semantic_segment.py --hours 3 10 --topic-ratio 0.3 --model none
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from podcast_visualizer.semantic import IncrementalSemanticSegmenter, SemanticSegmenter, embedding_model
+from synthetic import make_topical_transcription
+
+# 合成片段平均约5.25秒（时长2-8秒，间隔0-0.5秒）
+SECONDS_PER_SEGMENT = 5.25
+
+
+def score(found, truth, tolerance):
+    """(准确率, 召回率)"""
+    precision = sum(any(abs(a - b) <= tolerance for b in truth) for a in found) / len(found) if found else 1.0
+    recall = sum(any(abs(a - b) <= tolerance for b in found) for a in truth) / len(truth) if truth else 1.0
+    return precision, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播客可视化工具 - 语义分块基准")
+    parser.add_argument("--hours", type=float, nargs='+', default=[1, 3, 10], help="文字稿时长（小时）")
+    parser.add_argument("--topics-per-hour", type=float, default=4, help="每小时的话题数 (默认: 4)")
+    parser.add_argument("--topic-ratio", type=float, default=0.3, help="话题专用词的比例 (默认: 0.3)")
+    parser.add_argument("--tolerance", type=float, default=60, help="命中的最大误差（秒，默认: 60）")
+    parser.add_argument("--model", help="句向量模型（none表示词频；默认自动选择）")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最快 (默认: 3)")
+    parser.add_argument("--batch", type=int, default=12, help="增量输入时每批的行数 (默认: 12，约1分钟)")
+    args = parser.parse_args()
+
+    model = embedding_model() if args.model is None else ('' if args.model == 'none' else args.model)
+    segmenter = SemanticSegmenter(model_name=model)
+    print(f"向量: {segmenter.encoder.name}，阈值 {segmenter.threshold}")
+
+    for hours in args.hours:
+        n = int(hours * 3600 / SECONDS_PER_SEGMENT)
+        transcription, firsts = make_topical_transcription(
+            n, n_topics=max(2, int(hours * args.topics_per_hour)), topic_ratio=args.topic_ratio, seed=n)
+
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            segments = segmenter.segment(transcription)
+            best = min(best, time.perf_counter() - start)
+
+        truth = [transcription[i]['start'] for i in firsts[1:]]
+        found = [seg['start'] for seg in segments[1:]]
+        precision, recall = score(found, truth, args.tolerance)
+        print(f"{hours:>5.1f}小时 {n:>7}片段 {best * 1000:>8.1f}ms  话题 {len(segments):>3}/{len(firsts):<3} "
+              f"准确率 {precision:.2f} 召回率 {recall:.2f}")
+        for seg in segments[:3]:
+            print(f"        {seg['start']:>8.1f}s  {seg['topic']}")
+
+        start = time.perf_counter()
+        incremental = IncrementalSemanticSegmenter(segmenter)
+        streamed, delays, held = [], [], 0
+        for i in range(0, n, args.batch):
+            batch = transcription[i:i + args.batch]
+            for seg in incremental.feed(batch):
+                delays.append(batch[-1]['end'] - seg['end'])
+                streamed.append(seg)
+            held = max(held, len(incremental.blocks))
+        streamed += incremental.finish()
+        elapsed = time.perf_counter() - start
+        status = '一致' if streamed == segments else '不一致!'
+        delay = f"{sum(delays) / len(delays):.0f}s" if delays else '-'
+        print(f"        增量 {elapsed * 1000:>8.1f}ms  结果{status}  最多保留 {held} 块  平均输出延迟 {delay}")
+
+
+if __name__ == '__main__':
+    main()
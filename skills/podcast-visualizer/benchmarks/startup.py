@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+启动耗时回归检查
+在全新的解释器中导入 podcast_visualizer.cli，测量导入耗时，并确认没有提前导入重依赖
+
+用法:
+    python benchmarks/startup.py [--budget 0.5] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+# 只有真正进行识别/下载/展示时才应该导入的模块
+HEAVY_MODULES = ['torch', 'whisper', 'pyannote', 'numpy', 'yt_dlp', 'dotenv', 'streamlit']
+
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{'seconds': elapsed, 'heavy': heavy}}))
+'''
+
+
+def measure_import(module: str = 'podcast_visualizer.cli') -> dict:
+    """在子进程中导入模块，返回导入耗时和已导入的重依赖"""
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        check=True, capture_output=True, text=True, env=env,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="podcast_visualizer.cli 启动耗时回归检查")
+    parser.add_argument("--module", default="podcast_visualizer.cli", help="要测量的模块")
+    parser.add_argument("--budget", type=float, default=0.5, help="导入耗时上限（秒，默认: 0.5）")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最小值 (默认: 5)")
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.repeat)]
+    best = min(run['seconds'] for run in runs)
+    heavy = runs[0]['heavy']
+
+    print(f"导入 {args.module}: 最快 {best * 1000:.1f}ms (上限 {args.budget * 1000:.0f}ms)")
+    failed = False
+    if heavy:
+        print(f"❌ 启动时导入了重依赖: {', '.join(heavy)}")
+        failed = True
+    if best > args.budget:
+        print("❌ 导入耗时超出上限")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✓ 启动耗时检查通过")
+
+
+if __name__ == '__main__':
+    main()
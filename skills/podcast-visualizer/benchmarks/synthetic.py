@@ -0,0 +1,166 @@
+"""
+基准测试用的合成数据
+生成文字稿、说话人分离结果和带timeline的视频描述，不需要模型或网络
+"""
+
+import random
+from typing import List, Dict, Tuple
+
+WORDS = [
+    '我们', '今天', '聊一聊', '这个', '问题', '其实', '非常', '重要', '因为', '市场',
+    '模型', '数据', '用户', '产品', '团队', '增长', '成本', '时间', '机会', '风险',
+    'AI', 'model', 'startup', 'growth', 'podcast', 'data', 'market', 'product', 'team', 'cost',
+]
+
+TOPICS = [
+    '开场介绍', '嘉宾背景', '行业现状', '技术路线', '商业模式', '融资经历', '团队管理',
+    '产品设计', '用户增长', '海外市场', '监管政策', '未来展望', '听众提问', '结束语',
+]
+
+
+def make_transcription(n_segments: int, n_speakers: int = 2, seed: int = 0) -> List[Dict]:
+    """
+    生成文字稿
+
+    片段时长2-8秒，首尾相接；说话人以若干片段为一轮交替。
+
+    Returns:
+        片段列表，每个元素包含start, end, speaker, text
+    """
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    speaker = 0
+    turn_left = rng.randint(1, 6)
+    for _ in range(n_segments):
+        duration = rng.uniform(2.0, 8.0)
+        if turn_left == 0:
+            speaker = (speaker + rng.randint(1, max(1, n_speakers - 1))) % n_speakers
+            turn_left = rng.randint(1, 6)
+        turn_left -= 1
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 16)))
+        segments.append({
+            'start': round(t, 2),
+            'end': round(t + duration, 2),
+            'speaker': f'SPEAKER_{speaker:02d}',
+            'text': text,
+        })
+        t += duration + rng.uniform(0.0, 0.5)
+    return segments
+
+
+# 每个话题的专用词汇，用于生成话题边界已知的文字稿
+TOPIC_WORDS = {
+    '开场介绍': ['欢迎', '收听', '节目', '主持人', '本期', 'welcome', 'episode', 'host'],
+    '嘉宾背景': ['毕业', '大学', '工作', '经历', '创业', 'career', 'engineer', 'background'],
+    '技术路线': ['算法', '训练', '推理', '显卡', '参数', 'transformer', 'inference', 'gpu'],
+    '商业模式': ['收入', '付费', '订阅', '客户', '定价', 'revenue', 'pricing', 'saas'],
+    '融资经历': ['投资人', '估值', '轮次', '基金', '条款', 'valuation', 'investor', 'funding'],
+    '团队管理': ['招聘', '文化', '绩效', '管理', '员工', 'hiring', 'culture', 'manager'],
+    '用户增长': ['留存', '转化', '渠道', '拉新', '社群', 'retention', 'funnel', 'viral'],
+    '海外市场': ['出海', '美国', '欧洲', '本地化', '合规', 'global', 'localization', 'overseas'],
+    '监管政策': ['监管', '法规', '牌照', '审查', '隐私', 'regulation', 'privacy', 'policy'],
+    '未来展望': ['未来', '趋势', '十年', '愿景', '机会', 'future', 'vision', 'trend'],
+}
+
+
+def make_topical_transcription(n_segments: int, n_topics: int = 10, n_speakers: int = 2,
+                               topic_ratio: float = 0.5, seed: int = 0) -> Tuple[List[Dict], List[int]]:
+    """
+    生成分成若干话题的文字稿
+
+    在make_transcription的基础上，每个话题内的词按topic_ratio的比例取自该话题的专用词汇，
+    其余取自通用词汇；话题长度随机（不短于平均长度的一半）。
+
+    Returns:
+        (文字稿, 每个话题第一行的下标)
+    """
+    rng = random.Random(seed)
+    transcription = make_transcription(n_segments, n_speakers=n_speakers, seed=seed)
+    n_topics = max(1, min(n_topics, len(TOPIC_WORDS), n_segments))
+    weights = [rng.uniform(0.5, 1.5) for _ in range(n_topics)]
+    firsts, position = [], 0.0
+    for weight in weights:
+        firsts.append(int(position))
+        position += weight / sum(weights) * n_segments
+    topics = rng.sample(list(TOPIC_WORDS), n_topics)
+
+    for t, topic in enumerate(topics):
+        last = firsts[t + 1] if t + 1 < n_topics else n_segments
+        for seg in transcription[firsts[t]:last]:
+            words = seg['text'].split()
+            seg['text'] = ' '.join(rng.choice(TOPIC_WORDS[topic]) if rng.random() < topic_ratio else word
+                                   for word in words)
+    return transcription, firsts
+
+
+def split_for_merge(transcription: List[Dict], seed: int = 0) -> Tuple[List[Dict], List[Dict]]:
+    """
+    把文字稿拆成语音识别结果和说话人分离结果，作为合并环节的输入
+
+    说话人片段按同一说话人的连续片段合并，边界加入随机抖动，模拟pyannote的输出。
+    """
+    rng = random.Random(seed)
+    asr = [{'start': s['start'], 'end': s['end'], 'text': s['text']} for s in transcription]
+
+    turns = []
+    for seg in transcription:
+        if turns and turns[-1]['speaker'] == seg['speaker']:
+            turns[-1]['end'] = seg['end']
+        else:
+            turns.append({'start': seg['start'], 'end': seg['end'], 'speaker': seg['speaker']})
+    for turn in turns:
+        turn['start'] = max(0.0, turn['start'] + rng.uniform(-0.3, 0.3))
+        turn['end'] = max(turn['start'], turn['end'] + rng.uniform(-0.3, 0.3))
+    return asr, turns
+
+
+def format_timestamp(seconds: float, style: int) -> str:
+    seconds = int(seconds)
+    h, m, s = seconds // 3600, seconds % 3600 // 60, seconds % 60
+    if h or style == 2:
+        stamp = f'{h}:{m:02d}:{s:02d}'
+    else:
+        stamp = f'{m:02d}:{s:02d}'
+    if style == 1:
+        return f'[{stamp}]'
+    if style == 3:
+        return f'({stamp})'
+    return stamp
+
+
+def make_description(duration: float, n_chapters: int, seed: int = 0, filler_lines: int = 10) -> str:
+    """
+    生成带timeline的视频描述
+
+    混合多种时间戳格式，并夹杂不含时间戳的普通行。
+    """
+    return make_timeline_description(duration, n_chapters, seed=seed, filler_lines=filler_lines)[0]
+
+
+def make_timeline_description(duration: float, n_chapters: int, seed: int = 0,
+                              filler_lines: int = 10) -> Tuple[str, List[Tuple[int, str]]]:
+    """
+    生成带timeline的视频描述，同时返回其中的章节
+
+    Returns:
+        (描述, [(开始秒数, 话题), ...])
+    """
+    rng = random.Random(seed)
+    lines = ['本期节目我们邀请到了一位嘉宾。', '']
+    lines += [' '.join(rng.choice(WORDS) for _ in range(12)) for _ in range(filler_lines // 2)]
+    lines.append('')
+
+    chapters = []
+    step = duration / max(1, n_chapters)
+    for i in range(n_chapters):
+        stamp = format_timestamp(i * step, rng.randint(0, 3))
+        separator = rng.choice([' ', ' - ', ' – ', ' — '])
+        topic = f'{rng.choice(TOPICS)} {i + 1}'
+        lines.append(f'{stamp}{separator}{topic}')
+        chapters.append((int(i * step), topic))
+
+    lines.append('')
+    lines += [' '.join(rng.choice(WORDS) for _ in range(12)) for _ in range(filler_lines - filler_lines // 2)]
+    lines.append('https://example.com/podcast')
+    return '\n'.join(lines), chapters
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Timeline解析的正确性检查和吞吐量
+用手写的描述语料（各种时间戳格式和不应识别的行）和已知章节的合成描述检查TimelineParser.parse，
+与原来逐行尝试六个正则的解析器对照，再统计批量解析整个视频目录的吞吐量
+
+用法:
+    python benchmarks/timeline_corpus.py
+    python benchmarks/timeline_corpus.py --catalogue 20000 --repeat 5
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from podcast_visualizer.parser import TimelineParser
+from hotpaths import best_time
+from synthetic import make_timeline_description
+
+# (描述, [(开始秒数, 话题), ...])，期望结果按开始时间排序
+CORPUS = [
+    ("00:00 开场\n05:30 嘉宾介绍", [(0, '开场'), (330, '嘉宾介绍')]),
+    ("0:00 Intro\n1:02:03 Topic", [(0, 'Intro'), (3723, 'Topic')]),
+    ("00:00:00 开场\n01:02:03 结尾", [(0, '开场'), (3723, '结尾')]),
+    ("00:00 - Intro\n12:34 – Middle\n1:05:00 — Outro", [(0, 'Intro'), (754, 'Middle'), (3900, 'Outro')]),
+    ("00:00 −Intro\n01:00 ― Part\n02:00 ‒ Part 2\n03:00 - Part 3",
+     [(0, 'Intro'), (60, 'Part'), (120, 'Part 2'), (180, 'Part 3')]),
+    ("[00:00] 开场\n[1:02:03] 深入讨论", [(0, '开场'), (3723, '深入讨论')]),
+    ("(00:00) 开场\n(12:00) – 嘉宾", [(0, '开场'), (720, '嘉宾')]),
+    ("【00:00】开场\n（05:00）嘉宾", [(0, '开场'), (300, '嘉宾')]),
+    ("[00:00]开场\n[01:00]嘉宾", [(0, '开场'), (60, '嘉宾')]),
+    ("00:00 - 05:30 开场\n05:30 – 1:02:03 正题", [(0, '开场'), (330, '正题')]),
+    ("• 00:00 | 开场\n▶ 03:00 ｜ 嘉宾\n1. 06:00 问答", [(0, '开场'), (180, '嘉宾'), (360, '问答')]),
+    ("00:00: 开场\n01:00：嘉宾", [(0, '开场'), (60, '嘉宾')]),
+    ("00：00 开场\n01：30 嘉宾", [(0, '开场'), (90, '嘉宾')]),
+    ("  00:00   开场  \n\t01:00\t嘉宾\t", [(0, '开场'), (60, '嘉宾')]),
+    ("00:00 开场\r\n01:00 嘉宾\r\n", [(0, '开场'), (60, '嘉宾')]),
+    ("05:00 第二段\n00:00 第一段", [(0, '第一段'), (300, '第二段')]),
+    ("100:00 三小时节目的后半段", [(6000, '三小时节目的后半段')]),
+    ("0:00 Intro - what is 12:30 about", [(0, 'Intro - what is 12:30 about')]),
+    ("Timestamps:\n00:00 Intro\n\nFollow us: https://x.com", [(0, 'Intro')]),
+    # 不应识别为章节
+    ("", []),
+    ("没有时间戳的描述\n只有普通文字", []),
+    ("we meet at 12:30pm\nscore 3:75 today", []),
+    ("00:00\n01:00\n", []),
+    ("1:60:00 非法分钟\n00:61 非法秒", []),
+    ("比分 2:1 结束\n时间 10:5 开始", []),
+    ("Intro 00:00", []),
+]
+
+
+def legacy_parse(description):
+    """原来的解析器：逐行依次尝试六个未编译的正则，MM:SS在HH:MM:SS之前，作为对照"""
+    patterns = [
+        r'(\d{1,2}):(\d{2})\s*[-–—]\s*(.+?)(?=\n|$)',
+        r'(\d{1,2}):(\d{2})\s+(.+?)(?=\n|$)',
+        r'(\d{1,2}):(\d{2}):(\d{2})\s*[-–—]\s*(.+?)(?=\n|$)',
+        r'(\d{1,2}):(\d{2}):(\d{2})\s+(.+?)(?=\n|$)',
+        r'\((\d{1,2}):(\d{2})\)\s*(.+?)(?=\n|$)',
+        r'\[(\d{1,2}):(\d{2})\]\s*(.+?)(?=\n|$)',
+    ]
+    if not description:
+        return []
+    timeline = []
+    for line in description.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        for pattern in patterns:
+            match = re.search(pattern, line)
+            if match:
+                groups = match.groups()
+                if len(groups) == 3:
+                    start, topic = int(groups[0]) * 60 + int(groups[1]), groups[2]
+                else:
+                    start = int(groups[0]) * 3600 + int(groups[1]) * 60 + int(groups[2])
+                    topic = groups[3]
+                timeline.append({'start': start, 'topic': topic.strip(), 'raw_line': line})
+                break
+    timeline.sort(key=lambda x: x['start'])
+    return timeline
+
+
+def build_corpus(synthetic: int):
+    """手写语料加上synthetic条已知章节的合成描述"""
+    cases = list(CORPUS)
+    for seed in range(synthetic):
+        description, chapters = make_timeline_description(
+            3600 * (1 + seed % 4), 3 + seed % 30, seed=seed, filler_lines=seed % 12)
+        cases.append((description, sorted(chapters)))
+    return cases
+
+
+def check(parse, cases):
+    """返回不符合期望的用例"""
+    failures = []
+    for description, expected in cases:
+        got = [(entry['start'], entry['topic']) for entry in parse(description)]
+        if got != expected:
+            failures.append((description, expected, got))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播客可视化工具 - Timeline解析正确性和吞吐量")
+    parser.add_argument("--synthetic", type=int, default=500, help="合成描述的数量 (默认: 500)")
+    parser.add_argument("--catalogue", type=int, default=5000, help="吞吐量测试的描述数量 (默认: 5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快 (默认: 3)")
+    parser.add_argument("--verbose", action="store_true", help="列出对照解析器的错误")
+    args = parser.parse_args()
+
+    timeline_parser = TimelineParser()
+    cases = build_corpus(args.synthetic)
+
+    failures = check(timeline_parser.parse, cases)
+    legacy_failures = check(legacy_parse, cases)
+    print(f"正确性: {len(cases) - len(failures)}/{len(cases)} 通过 "
+          f"(原解析器 {len(cases) - len(legacy_failures)}/{len(cases)})")
+    for description, expected, got in failures:
+        print(f"❌ {description[:60]!r}\n   期望 {expected[:4]}\n   实际 {got[:4]}")
+    if args.verbose:
+        for description, expected, got in legacy_failures:
+            print(f"   原解析器: {description[:60]!r} 期望 {expected[:3]} 实际 {got[:3]}")
+
+    # 吞吐量：模拟一个频道的视频目录，大部分描述有章节，部分没有
+    catalogue = [make_timeline_description(3600, (seed * 7) % 40, seed=seed, filler_lines=20)[0]
+                 for seed in range(args.catalogue)]
+    megabytes = sum(len(d.encode('utf-8')) for d in catalogue) / 1024 ** 2
+    timings = {
+        '原解析器': best_time(lambda: [legacy_parse(d) for d in catalogue], (), args.repeat),
+        'parse': best_time(lambda: [timeline_parser.parse(d) for d in catalogue], (), args.repeat),
+        'parse_many': best_time(timeline_parser.parse_many, (catalogue,), args.repeat),
+    }
+    print(f"\n吞吐量: {args.catalogue} 个描述，{megabytes:.1f}MB")
+    for name, seconds in timings.items():
+        print(f"{name:<12} {seconds * 1000:>9.1f}ms  {args.catalogue / seconds:>9.0f} 个/秒  "
+              f"{megabytes / seconds:>6.1f}MB/s  ({timings['原解析器'] / seconds:.1f}x)")
+
+    if failures:
+        sys.exit(1)
+    print("✓ Timeline解析检查通过")
+
+
+if __name__ == '__main__':
+    main()
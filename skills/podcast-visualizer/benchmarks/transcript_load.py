@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+文字稿存储格式的加载基准
+在不同规模的合成文字稿上比较缩进JSON（旧格式，分块复制对话）和列式文字稿：文件大小、保存耗时、
+完整加载耗时，以及列式文件打开后只取一个分块（网页切换话题）的耗时
+
+用法:
+    python benchmarks/transcript_load.py
+    python benchmarks/transcript_load.py --sizes 10000 100000 --repeat 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from podcast_visualizer.segmenter import Segmenter, segment_dialogue
+from podcast_visualizer.transcript import save_transcript, load_transcript
+from hotpaths import best_time
+from synthetic import make_transcription
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def save_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_columnar(path):
+    """完整加载：所有行和分块都转换为字典"""
+    transcript, segments, metadata = load_transcript(path)
+    return transcript.lines(), segments.to_dicts(), metadata
+
+
+def load_one_segment(path, index):
+    """打开文件（内存映射）并只解码一个分块"""
+    transcript, segments, _ = load_transcript(path)
+    return segments.segment(index, transcript)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播客可视化工具 - 文字稿存储格式加载基准")
+    parser.add_argument("--sizes", type=int, nargs='+', default=DEFAULT_SIZES, help="文字稿片段数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最快 (默认: 3)")
+    args = parser.parse_args()
+
+    print(f"{'片段数':>8} {'格式':<8} {'大小':>9} {'保存':>10} {'完整加载':>10} {'单个分块':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.sizes:
+            transcription = make_transcription(n, seed=n)
+            segments = Segmenter().segment_by_semantic(transcription)
+            metadata = {'title': f'synthetic-{n}', 'duration': int(transcription[-1]['end'])}
+            # 旧格式：每个分块复制一份dialogue
+            data = {'metadata': metadata, 'transcription': transcription, 'segments': [
+                dict(seg, dialogue=segment_dialogue(seg, transcription)) for seg in segments]}
+            middle = len(segments) // 2
+
+            json_path = os.path.join(tmp, f'{n}.json')
+            col_path = os.path.join(tmp, f'{n}.transcript.col')
+
+            json_save = best_time(save_json, (json_path, data), args.repeat)
+            json_load = best_time(load_json, (json_path,), args.repeat)
+            col_save = best_time(save_transcript, (col_path, transcription, segments, metadata), args.repeat)
+            col_load = best_time(load_columnar, (col_path,), args.repeat)
+            col_one = best_time(load_one_segment, (col_path, middle), args.repeat)
+
+            json_size = os.path.getsize(json_path)
+            col_size = os.path.getsize(col_path)
+            print(f"{n:>8} {'JSON':<8} {json_size / 1024 ** 2:>7.2f}MB {json_save * 1000:>8.1f}ms "
+                  f"{json_load * 1000:>8.1f}ms {json_load * 1000:>8.1f}ms")
+            print(f"{n:>8} {'列式':<8} {col_size / 1024 ** 2:>7.2f}MB {col_save * 1000:>8.1f}ms "
+                  f"{col_load * 1000:>8.1f}ms {col_one * 1000:>8.1f}ms")
+            print(f"{'':>8} 体积 {json_size / col_size:.1f}x，完整加载 {json_load / col_load:.1f}x，"
+                  f"单个分块 {json_load / col_one:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
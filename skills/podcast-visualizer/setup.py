@@ -13,6 +13,7 @@ setup(
         "pyannote.audio>=3.1.1",
         "torch>=2.1.0",
         "torchaudio>=2.1.0",
+        "numpy>=1.24.0",
         "fastapi>=0.104.0",
         "uvicorn>=0.24.0",
         "streamlit>=1.28.0",
@@ -24,6 +25,8 @@ setup(
     entry_points={
         "console_scripts": [
             "podcast-visualizer=podcast_visualizer.cli:main",
+            "podcast-visualizer-server=podcast_visualizer.server:main",
+            "podcast-visualizer-batch=podcast_visualizer.batch:main",
         ],
     },
 )
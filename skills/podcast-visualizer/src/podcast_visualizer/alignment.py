@@ -0,0 +1,118 @@
+"""
+片段对齐模块
+把说话人分离结果对齐到语音识别片段上，以及拼接分块识别的结果
+"""
+
+from typing import List, Dict, Optional
+
+
+def assign_speakers(segments: List[Dict], turns: List[Dict]) -> List[Optional[str]]:
+    """
+    为每个文字片段找到重叠时间最长的说话人
+
+    对按起始时间排序的区间做双指针扫描：只比较与当前片段可能重叠的活跃说话人片段，
+    整体复杂度接近 O((N + M) log(N + M))，而不是逐一比较的 O(N × M)。
+    重叠相同时取turns中靠前的说话人，与逐一比较的结果完全一致。
+
+    Args:
+        segments: 文字片段列表，每个元素包含start, end
+        turns: 说话人片段列表，每个元素包含start, end, speaker
+
+    Returns:
+        与segments一一对应的说话人标签，无重叠时为None
+    """
+    seg_order = sorted(range(len(segments)), key=lambda i: segments[i]['start'])
+    turn_order = sorted(range(len(turns)), key=lambda j: turns[j]['start'])
+
+    labels = [None] * len(segments)
+    active = []
+    next_turn = 0
+
+    for i in seg_order:
+        seg_start = segments[i]['start']
+        seg_end = segments[i]['end']
+
+        # 加入起始时间早于片段结束的说话人片段
+        while next_turn < len(turn_order) and turns[turn_order[next_turn]]['start'] < seg_end:
+            active.append(turn_order[next_turn])
+            next_turn += 1
+
+        # 去掉已经结束的说话人片段（后续片段的起始时间只会更晚）
+        active = [j for j in active if turns[j]['end'] > seg_start]
+
+        best = None
+        max_overlap = 0
+        for j in active:
+            overlap = min(seg_end, turns[j]['end']) - max(seg_start, turns[j]['start'])
+            if overlap > max_overlap or (overlap == max_overlap and best is not None and j < best):
+                max_overlap = overlap
+                best = j
+
+        if best is not None:
+            labels[i] = turns[best]['speaker']
+
+    return labels
+
+
+def merge_speakers(transcription: List[Dict], speakers: List[Dict]) -> List[Dict]:
+    """
+    合并语音识别和说话人分离结果
+
+    Args:
+        transcription: 语音识别结果，每个元素包含start, end, text
+        speakers: 说话人分离结果，每个元素包含start, end, speaker
+
+    Returns:
+        文字稿列表，每个元素包含start, end, speaker, text
+    """
+    labels = assign_speakers(transcription, speakers)
+
+    return [
+        {
+            'start': seg['start'],
+            'end': seg['end'],
+            'speaker': label or 'UNKNOWN',
+            'text': seg['text'],
+        }
+        for seg, label in zip(transcription, labels)
+    ]
+
+
+def stitch_segments(chunks: List[List[Dict]], tolerance: float = 0.5) -> List[Dict]:
+    """
+    拼接各块的识别结果
+
+    保证时间戳单调递增，并去掉块边界处重复识别的片段：只把每块开头的片段与上一块的结尾比较，
+    块内连续重复的短句（如"对"、"嗯"）保留。
+
+    Args:
+        chunks: 按时间顺序排列的各块片段列表
+        tolerance: 判定边界重复的时间容差（秒）
+
+    Returns:
+        拼接后的片段列表
+    """
+    segments = []
+    for chunk in chunks:
+        # 本块还没有保留任何片段时，segments[-1]是上一块的最后一个片段
+        at_boundary = True
+        for seg in chunk:
+            if not seg['text']:
+                continue
+
+            if segments:
+                prev = segments[-1]
+                # 边界处同一句话被相邻两块重复识别
+                if at_boundary and seg['text'] == prev['text'] and seg['start'] < prev['end'] + tolerance:
+                    prev['end'] = max(prev['end'], seg['end'])
+                    continue
+                # 保证时间戳单调
+                if seg['start'] < prev['end']:
+                    seg = dict(seg, start=prev['end'])
+                if seg['end'] < seg['start']:
+                    seg = dict(seg, end=seg['start'])
+
+            segments.append(dict(seg))
+            at_boundary = False
+
+    return segments
@@ -0,0 +1,175 @@
+"""
+音频解码模块
+把音频一次性解码为16kHz单声道float32 PCM，供语音识别、说话人分离等环节共用
+"""
+
+import os
+import subprocess
+from typing import List, Optional, Tuple
+import numpy as np
+
+from . import metrics
+from .cache import atomic_path
+
+SAMPLE_RATE = 16000
+
+
+def pcm_path_for(audio_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    音频对应的PCM缓存文件路径
+
+    Args:
+        audio_path: 原始音频文件路径
+        cache_dir: 缓存目录（默认与音频文件同目录）
+
+    Returns:
+        PCM文件路径 ({name}.f32)
+    """
+    name = os.path.splitext(os.path.basename(audio_path))[0]
+    return os.path.join(cache_dir or os.path.dirname(os.path.abspath(audio_path)), f"{name}.f32")
+
+
+def decode_audio(audio_path: str, cache_dir: Optional[str] = None, skip_cache: bool = False) -> str:
+    """
+    将音频解码为16kHz单声道float32 PCM文件（只解码一次）
+
+    Args:
+        audio_path: 原始音频文件路径
+        cache_dir: 缓存目录（默认与音频文件同目录）
+        skip_cache: 是否忽略已有的PCM文件
+
+    Returns:
+        PCM文件路径
+    """
+    pcm_path = pcm_path_for(audio_path, cache_dir)
+
+    if (not skip_cache and os.path.exists(pcm_path)
+            and os.path.getmtime(pcm_path) >= os.path.getmtime(audio_path)):
+        return pcm_path
+
+    print(f"🔊 正在解码音频为{SAMPLE_RATE}Hz PCM...")
+    cmd = [
+        "ffmpeg", "-nostdin", "-y", "-loglevel", "error",
+        "-threads", "0",
+        "-i", audio_path,
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "-ac", "1", "-ar", str(SAMPLE_RATE),
+    ]
+    with metrics.stage('decode') as stage:
+        # 每个写入方使用自己的临时文件，并发解码同一音频时不会互相覆盖
+        with atomic_path(pcm_path) as tmp_path:
+            try:
+                subprocess.run(cmd + [tmp_path], check=True, capture_output=True)
+            except subprocess.CalledProcessError as e:
+                raise RuntimeError(f"音频解码失败: {e.stderr.decode(errors='ignore')}") from e
+        stage['audio_seconds'] = os.path.getsize(pcm_path) / 4 / SAMPLE_RATE
+
+    print(f"✓ 解码完成: {pcm_path}")
+    return pcm_path
+
+
+def encode_mp3(audio_path: str, mp3_path: str, bitrate: str = "192k") -> str:
+    """
+    把音频转码为mp3（供浏览器播放，语音识别不需要）
+
+    Args:
+        audio_path: 原始音频文件路径
+        mp3_path: 输出路径
+        bitrate: 码率
+
+    Returns:
+        mp3文件路径
+    """
+    print("🎵 正在生成浏览器播放用的mp3...")
+    cmd = [
+        "ffmpeg", "-nostdin", "-y", "-loglevel", "error",
+        "-i", audio_path,
+        "-vn", "-acodec", "libmp3lame", "-b:a", bitrate,
+        "-f", "mp3",
+    ]
+    with metrics.stage('mp3_encode'), atomic_path(mp3_path) as tmp_path:
+        try:
+            subprocess.run(cmd + [tmp_path], check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"mp3转码失败: {e.stderr.decode(errors='ignore')}") from e
+
+    return mp3_path
+
+
+def load_pcm(pcm_path: str) -> np.ndarray:
+    """
+    以内存映射方式加载PCM文件
+
+    使用写时复制模式，按需从磁盘换页，长音频也不会一次性占满内存。
+
+    Args:
+        pcm_path: PCM文件路径
+
+    Returns:
+        float32采样数组
+    """
+    if os.path.getsize(pcm_path) == 0:
+        return np.zeros(0, dtype=np.float32)
+    return np.memmap(pcm_path, dtype=np.float32, mode='c')
+
+
+def load_audio(audio_path: str, cache_dir: Optional[str] = None) -> np.ndarray:
+    """
+    解码（或复用已解码的）音频并以内存映射方式加载
+
+    Args:
+        audio_path: 原始音频文件路径
+        cache_dir: 缓存目录（默认与音频文件同目录）
+
+    Returns:
+        16kHz单声道float32采样数组
+    """
+    return load_pcm(decode_audio(audio_path, cache_dir))
+
+
+def find_split_points(audio: np.ndarray, chunk_duration: float = 600,
+                      search_window: float = 30, sample_rate: int = SAMPLE_RATE,
+                      frame_duration: float = 0.1) -> List[Tuple[int, int]]:
+    """
+    在静音处切分音频
+
+    在每个目标切分点之前的search_window秒内，选择能量最低的帧作为切分点，
+    避免把一句话切成两半。
+
+    Args:
+        audio: 单声道音频采样
+        chunk_duration: 每块的目标时长（秒）
+        search_window: 在目标切分点前搜索静音的范围（秒）
+        sample_rate: 采样率
+        frame_duration: 计算能量的帧长（秒）
+
+    Returns:
+        (起始采样, 结束采样) 列表，首尾相接覆盖整段音频
+    """
+    total = len(audio)
+    chunk_samples = int(chunk_duration * sample_rate)
+    window_samples = int(search_window * sample_rate)
+    frame = max(1, int(frame_duration * sample_rate))
+
+    chunks = []
+    start = 0
+    while total - start > chunk_samples:
+        target = start + chunk_samples
+        # 切分点不早于块的中点，避免切出过短的块
+        window_start = max(start + chunk_samples // 2, target - window_samples)
+        window = audio[window_start:target]
+
+        n_frames = len(window) // frame
+        if n_frames > 0:
+            frames = window[:n_frames * frame].reshape(n_frames, frame)
+            energy = np.mean(frames ** 2, axis=1)
+            split = window_start + int(np.argmin(energy)) * frame + frame // 2
+        else:
+            split = target
+
+        chunks.append((start, split))
+        start = split
+
+    if start < total:
+        chunks.append((start, total))
+    return chunks
@@ -0,0 +1,390 @@
+"""
+批量下载模块
+展开播放列表、频道和URL列表文件，先只获取元数据制定处理计划，
+再用有限的线程池并发下载，失败时退避重试，输出逐项状态报告
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .cache import CacheManager, DEFAULT_ROOT, parse_size
+from .downloader import YouTubeDownloader, extract_video_id, DEFAULT_MIN_ABR, METADATA_TTL
+from .parser import TimelineParser
+
+# 模型大小为auto时按时长选择：(时长上限秒, 模型)
+AUTO_MODELS = [(30 * 60, 'medium'), (2 * 3600, 'small'), (float('inf'), 'base')]
+
+# 没有历史运行记录时使用的粗略实时率（处理耗时 / 音频时长，CPU）
+DEFAULT_RTF = {'tiny': 0.1, 'base': 0.15, 'small': 0.35, 'medium': 0.8, 'large': 1.6}
+
+
+def video_url(video_id: str) -> str:
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+
+def read_url_file(path: str) -> List[str]:
+    """读取URL列表文件（每行一个，忽略空行和#注释）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+def expand_playlist(url: str, cookies_path: str = None, depth: int = 2) -> List[str]:
+    """
+    展开播放列表或频道，只读取列表不解析每个视频
+
+    频道页会先展开为各个标签页（视频、直播等）的列表，因此递归展开depth层。
+
+    Returns:
+        视频URL列表
+    """
+    import yt_dlp
+
+    ydl_opts = {'extract_flat': 'in_playlist', 'quiet': True, 'no_warnings': True}
+    if cookies_path:
+        ydl_opts['cookiefile'] = cookies_path
+
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    urls = []
+    for entry in info.get('entries') or []:
+        if not entry:
+            continue
+        entry_url = entry.get('url') or entry.get('webpage_url') or ''
+        if entry.get('_type', 'url') == 'url' and (extract_video_id(entry_url) or entry.get('ie_key') == 'Youtube'):
+            urls.append(video_url(entry.get('id') or extract_video_id(entry_url)))
+        elif entry_url and depth > 0:
+            urls.extend(expand_playlist(entry_url, cookies_path, depth - 1))
+    return urls
+
+
+def expand_sources(sources: List[str], cookies_path: str = None) -> List[str]:
+    """
+    把视频URL、播放列表/频道URL和URL列表文件展开为去重后的视频URL列表
+
+    Args:
+        sources: 输入列表
+        cookies_path: Cookies文件路径
+
+    Returns:
+        按出现顺序去重的视频URL列表
+    """
+    urls = []
+    seen = set()
+    for source in sources:
+        if os.path.isfile(source):
+            expanded = expand_sources(read_url_file(source), cookies_path)
+        elif extract_video_id(source):
+            expanded = [video_url(extract_video_id(source))]
+        else:
+            print(f"📃 展开列表: {source}")
+            expanded = expand_playlist(source, cookies_path)
+            print(f"  找到 {len(expanded)} 个视频")
+
+        for url in expanded:
+            video_id = extract_video_id(url)
+            if video_id not in seen:
+                seen.add(video_id)
+                urls.append(url)
+    return urls
+
+
+def download_one(downloader: YouTubeDownloader, url: str, skip_cache: bool = False,
+                 retries: int = 3, backoff: float = 2.0) -> Dict:
+    """
+    下载一个视频，失败时指数退避重试
+
+    Returns:
+        状态字典：url, video_id, status (downloaded/cached/failed), attempts, seconds, bytes, audio_path, error
+    """
+    item = {'url': url, 'video_id': extract_video_id(url), 'status': 'failed', 'attempts': 0,
+            'seconds': 0.0, 'bytes': 0, 'audio_path': None, 'error': None}
+    start = time.perf_counter()
+    for attempt in range(1, retries + 2):
+        item['attempts'] = attempt
+        try:
+            result = downloader.download_audio(url, skip_cache=skip_cache)
+        except ValueError as e:
+            # URL本身无效，重试没有意义
+            item['error'] = str(e)
+            break
+        except Exception as e:
+            item['error'] = f"{type(e).__name__}: {e}"
+            if attempt > retries:
+                break
+            delay = backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            print(f"⚠️  {item['video_id']} 第{attempt}次下载失败，{delay:.1f}秒后重试: {e}")
+            time.sleep(delay)
+        else:
+            item.update(
+                status='cached' if result.get('cached') else 'downloaded',
+                bytes=result.get('bytes', 0),
+                audio_path=result['audio_path'],
+                error=None,
+            )
+            break
+    item['seconds'] = round(time.perf_counter() - start, 2)
+    return item
+
+
+def download_batch(urls: List[str], downloader: YouTubeDownloader, jobs: int = 4, skip_cache: bool = False,
+                   retries: int = 3, backoff: float = 2.0) -> List[Dict]:
+    """
+    并发下载多个视频
+
+    每个工作线程复用downloader中属于自己的YoutubeDL实例。
+
+    Args:
+        urls: 视频URL列表
+        downloader: 下载器（线程间共享）
+        jobs: 并发下载数
+        skip_cache: 是否跳过缓存
+        retries: 每个视频的最大重试次数
+        backoff: 首次重试前的等待时间（秒），之后每次加倍
+
+    Returns:
+        与urls顺序一致的逐项状态列表
+    """
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        return list(pool.map(
+            lambda url: download_one(downloader, url, skip_cache=skip_cache, retries=retries, backoff=backoff),
+            urls,
+        ))
+
+
+def choose_model(duration: float, model_size: str = 'auto') -> str:
+    """按时长选择模型大小（model_size不是auto时原样返回）"""
+    if model_size != 'auto':
+        return model_size
+    for limit, model in AUTO_MODELS:
+        if duration <= limit:
+            return model
+    return AUTO_MODELS[-1][1]
+
+
+def load_rtf_history(run_log: Optional[str]) -> Dict[str, float]:
+    """
+    从运行报告汇总日志中统计各模型的实时率（中位数）
+
+    实时率 = (整次运行耗时 - 下载耗时) / 音频时长；使用缓存结果的运行不计入。
+
+    Returns:
+        模型大小 -> 实时率
+    """
+    if not run_log or not os.path.exists(run_log):
+        return {}
+
+    samples = {}
+    with open(run_log, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            run = json.loads(line)
+            stages = run.get('stages', [])
+            # 语音识别使用了缓存（旧版日志中为load_result环节）
+            if run.get('info', {}).get('asr_cached') or any(stage['stage'] == 'load_result' for stage in stages):
+                continue
+            audio_seconds = max((stage.get('audio_seconds') or 0 for stage in stages), default=0)
+            model = run.get('info', {}).get('model_size')
+            if not model or not audio_seconds:
+                continue
+            fetching = sum(stage['wall_seconds'] for stage in stages if stage['stage'] in ('download', 'metadata'))
+            samples.setdefault(model, []).append((run['wall_seconds'] - fetching) / audio_seconds)
+    return {model: statistics.median(values) for model, values in samples.items()}
+
+
+def plan_item(metadata: Dict, cache: CacheManager, model_size: str = 'auto', min_duration: float = 0,
+              max_duration: Optional[float] = None, rtf: Optional[Dict[str, float]] = None,
+              timeline: Optional[List[Dict]] = None) -> Dict:
+    """
+    根据元数据决定是否处理一个视频、使用的模型，并估计成本
+
+    Args:
+        metadata: fetch_metadata返回的元数据
+        cache: 缓存管理器（已有识别结果的视频跳过）
+        model_size: 模型大小，auto表示按时长选择
+        min_duration: 短于该时长（秒）的视频跳过
+        max_duration: 长于该时长（秒）的视频跳过
+        rtf: 各模型的实时率（默认使用DEFAULT_RTF）
+        timeline: 已解析的timeline（可选，默认解析metadata中的description）
+
+    Returns:
+        计划字典：action为process或skip，reason说明跳过原因
+    """
+    duration = metadata.get('duration') or 0
+    if timeline is None:
+        timeline = TimelineParser().parse(metadata.get('description', ''))
+    model = choose_model(duration, model_size)
+    rate = (rtf or {}).get(model, DEFAULT_RTF.get(model, 1.0))
+    plan = {
+        'url': metadata.get('url'),
+        'video_id': metadata.get('video_id'),
+        'title': metadata.get('title', ''),
+        'duration': duration,
+        'chapters': len(timeline),
+        'model_size': model,
+        'estimated_bytes': metadata.get('estimated_bytes'),
+        'estimated_seconds': round(duration * rate, 1),
+        'action': 'process',
+        'reason': None,
+    }
+
+    if metadata.get('live_status') in ('is_live', 'is_upcoming'):
+        plan.update(action='skip', reason='直播/未开始')
+    elif duration < min_duration:
+        plan.update(action='skip', reason='过短')
+    elif max_duration is not None and duration > max_duration:
+        plan.update(action='skip', reason='过长')
+    elif cache.get(plan['video_id'], '.transcript.col') or cache.get(plan['video_id'], '.json'):
+        plan.update(action='skip', reason='已处理')
+    return plan
+
+
+def plan_batch(urls: List[str], downloader: YouTubeDownloader, jobs: int = 4,
+               ttl: Optional[float] = METADATA_TTL, **kwargs) -> List[Dict]:
+    """
+    只获取元数据（不下载音频），为每个视频生成处理计划
+
+    Args:
+        urls: 视频URL列表
+        downloader: 下载器
+        jobs: 并发请求数
+        ttl: 元数据缓存有效期（秒）
+        **kwargs: 传给plan_item的参数
+
+    Returns:
+        与urls顺序一致的计划列表；获取元数据失败的项action为failed
+    """
+    def fetch(url):
+        try:
+            return downloader.fetch_metadata(url, ttl=ttl)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = list(pool.map(fetch, urls))
+
+    # 整个目录的描述一次批量解析
+    fetched = [metadata for metadata in results if not isinstance(metadata, Exception)]
+    timelines = iter(TimelineParser().parse_many(metadata.get('description', '') for metadata in fetched))
+
+    plans = []
+    for url, metadata in zip(urls, results):
+        if isinstance(metadata, Exception):
+            plans.append({'url': url, 'video_id': extract_video_id(url), 'action': 'failed',
+                          'reason': f"{type(metadata).__name__}: {metadata}"})
+        else:
+            plans.append(plan_item(metadata, downloader.cache, timeline=next(timelines), **kwargs))
+    return plans
+
+
+def print_plan(plans: List[Dict]):
+    """打印处理计划和总成本估计"""
+    for plan in plans:
+        if plan['action'] == 'failed':
+            print(f"❌ {plan['video_id'] or plan['url']:<14} 获取元数据失败: {plan['reason']}")
+            continue
+        icon = '✓' if plan['action'] == 'process' else '•'
+        size = f"{plan['estimated_bytes'] / 1024 ** 2:.0f}MB" if plan['estimated_bytes'] else '?'
+        line = f"{icon} {plan['video_id']:<14} {plan['duration'] / 60:>6.1f}分钟  章节{plan['chapters']:>3}  " \
+               f"{plan['model_size']:<7} 约{plan['estimated_seconds'] / 60:>6.1f}分钟  {size:>6}  {plan['title'][:40]}"
+        if plan['reason']:
+            line += f"  (跳过: {plan['reason']})"
+        print(line)
+
+    todo = [plan for plan in plans if plan['action'] == 'process']
+    print(f"\n计划处理 {len(todo)}/{len(plans)} 个，音频共 {sum(p['duration'] for p in todo) / 3600:.1f}小时，"
+          f"预计处理 {sum(p['estimated_seconds'] for p in todo) / 3600:.1f}小时，"
+          f"下载约 {sum(p['estimated_bytes'] or 0 for p in todo) / 1024 ** 2:.0f}MB")
+
+
+def print_report(items: List[Dict], wall: float):
+    """打印逐项状态和汇总"""
+    icons = {'downloaded': '✓', 'cached': '•', 'failed': '❌'}
+    for item in items:
+        line = f"{icons[item['status']]} {item['video_id'] or item['url']:<14} {item['status']:<10} " \
+               f"{item['seconds']:>7.1f}s  {item['bytes'] / 1024 ** 2:>7.1f}MB  尝试{item['attempts']}次"
+        if item['error']:
+            line += f"  {item['error']}"
+        print(line)
+
+    counts = {status: sum(1 for item in items if item['status'] == status) for status in icons}
+    total_bytes = sum(item['bytes'] for item in items)
+    print(f"\n共 {len(items)} 个: 下载 {counts['downloaded']}，缓存 {counts['cached']}，失败 {counts['failed']}；"
+          f"{total_bytes / 1024 ** 2:.1f}MB，用时 {wall:.1f}s")
+
+
+def main(argv: List[str] = None):
+    """批量下载入口"""
+    parser = argparse.ArgumentParser(description="播客可视化工具 - 批量下载播放列表、频道或URL列表")
+    parser.add_argument("sources", nargs='+', help="视频URL、播放列表/频道URL，或每行一个URL的文件")
+    parser.add_argument("--jobs", type=int, default=4, help="并发下载数 (默认: 4)")
+    parser.add_argument("--retries", type=int, default=3, help="每个视频的最大重试次数 (默认: 3)")
+    parser.add_argument("--backoff", type=float, default=2.0, help="首次重试前的等待秒数，之后每次加倍 (默认: 2)")
+    parser.add_argument("--skip-cache", action="store_true", help="跳过缓存，重新下载")
+    parser.add_argument("--cookies", help="YouTube cookies文件路径（用于需要登录的视频）")
+    parser.add_argument("--download-profile", default="best", choices=["best", "speech"],
+                        help="下载档位 (默认: best)")
+    parser.add_argument("--min-abr", type=float, default=DEFAULT_MIN_ABR,
+                        help=f"speech档位的音频码率下限，kbps (默认: {DEFAULT_MIN_ABR})")
+    parser.add_argument("--cache-dir", default=DEFAULT_ROOT, help=f"缓存根目录 (默认: {DEFAULT_ROOT})")
+    parser.add_argument("--cache-budget", help="缓存总大小上限，如 20G（默认不限制）")
+    parser.add_argument("--report", help="把逐项状态（或--plan时的处理计划）保存为JSON文件")
+    parser.add_argument("--plan", action="store_true", help="只获取元数据并输出处理计划，不下载音频")
+    parser.add_argument("--model-size", default="auto",
+                        choices=["auto", "tiny", "base", "small", "medium", "large"],
+                        help="计划使用的Whisper模型，auto按时长选择 (默认: auto)")
+    parser.add_argument("--min-duration", type=float, default=0, help="跳过短于该分钟数的视频")
+    parser.add_argument("--max-duration", type=float, help="跳过长于该分钟数的视频")
+    parser.add_argument("--metadata-ttl", type=float, default=METADATA_TTL / 3600,
+                        help=f"元数据缓存有效期，小时 (默认: {METADATA_TTL / 3600:g})")
+    parser.add_argument("--run-log", help="运行报告汇总日志，用于估计各模型的处理耗时")
+    args = parser.parse_args(argv)
+
+    urls = expand_sources(args.sources, cookies_path=args.cookies)
+    cache = CacheManager(args.cache_dir, budget=parse_size(args.cache_budget))
+    start = time.perf_counter()
+    with YouTubeDownloader(cookies_path=args.cookies, cache=cache, profile=args.download_profile,
+                           min_abr=args.min_abr, quiet=True) as downloader:
+        # 先只获取元数据做计划，不消耗下载带宽
+        if args.plan or args.min_duration or args.max_duration is not None:
+            plans = plan_batch(
+                urls, downloader, jobs=args.jobs, ttl=args.metadata_ttl * 3600,
+                model_size=args.model_size, min_duration=args.min_duration * 60,
+                max_duration=args.max_duration * 60 if args.max_duration is not None else None,
+                rtf=load_rtf_history(args.run_log),
+            )
+            print_plan(plans)
+            if args.plan:
+                if args.report:
+                    with open(args.report, 'w', encoding='utf-8') as f:
+                        json.dump({'plans': plans}, f, ensure_ascii=False, indent=2)
+                    print(f"✓ 处理计划已保存到: {args.report}")
+                return
+            urls = [plan['url'] for plan in plans if plan['action'] == 'process']
+
+        print(f"📥 共 {len(urls)} 个视频，并发 {args.jobs}")
+        items = download_batch(urls, downloader, jobs=args.jobs, skip_cache=args.skip_cache,
+                               retries=args.retries, backoff=args.backoff)
+    wall = time.perf_counter() - start
+
+    print()
+    print_report(items, wall)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'wall_seconds': round(wall, 2), 'items': items}, f, ensure_ascii=False, indent=2)
+        print(f"✓ 状态报告已保存到: {args.report}")
+
+    if any(item['status'] == 'failed' for item in items):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
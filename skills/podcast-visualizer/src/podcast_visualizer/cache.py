@@ -0,0 +1,519 @@
+"""
+缓存管理模块
+按video_id分片存放各环节产物，用SQLite清单记录大小、最近访问时间和产生环节，
+支持按字节预算做LRU淘汰、跨进程的single-flight锁，以及 cache ls / gc / verify 命令
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import fcntl
+import socket
+import hashlib
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+DEFAULT_ROOT = os.environ.get('PODCAST_VISUALIZER_CACHE', "/root/clawd/skills/podcast-visualizer/cache")
+MANIFEST_NAME = 'manifest.sqlite'
+# 记录SHA-256的产物：音频摘要是识别缓存键的输入，其余产物只记录大小和修改时间
+DIGEST_SUFFIXES = ('.webm', '.m4a', '.opus', '.ogg', '.mp3', '.wav')
+# 持有这些锁的视频正在下载或处理，淘汰时跳过它的全部产物
+BUSY_LOCKS = ('process', 'download')
+
+_UNITS = {'': 1, 'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(text: Optional[str]) -> Optional[int]:
+    """'500M'、'20G'、'1048576' -> 字节数；空值表示不限制"""
+    if not text:
+        return None
+    text = str(text).strip().upper()
+    if text.endswith('IB'):
+        text = text[:-2]
+    elif len(text) > 1 and text.endswith('B') and text[-2] in _UNITS:
+        text = text[:-1]
+    number, unit = text, ''
+    if text and text[-1] in _UNITS:
+        number, unit = text[:-1], text[-1]
+    try:
+        return int(float(number) * _UNITS[unit])
+    except ValueError:
+        raise ValueError(f"无法解析的大小: {text}")
+
+
+def format_size(size: int) -> str:
+    for unit in ['B', 'K', 'M', 'G']:
+        if size < 1024 or unit == 'G':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}T"
+
+
+@contextmanager
+def atomic_path(path: str):
+    """
+    原子写入：产出同目录下本进程、本线程专用的临时文件路径，成功后改名为path
+
+    同一产物有多个写入方时互不覆盖对方的临时文件；读取方要么看到旧文件，要么看到完整的新文件；
+    写入失败时删除临时文件。供子进程（如ffmpeg）输出或自行打开文件的写入方使用。
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: Optional[str] = 'utf-8'):
+    """原子写入：打开atomic_path的临时文件，写完后改名"""
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+
+
+class FileLock:
+    """
+    跨进程的文件锁（fcntl.flock）加进行中标记
+
+    持有者退出或崩溃时操作系统自动释放锁；标记文件记录持有者的pid、主机和开始时间，
+    获取锁时标记仍在说明上一个持有者中途退出。
+    """
+
+    def __init__(self, path: str, name: str = '', timeout: Optional[float] = None):
+        """
+        Args:
+            path: 锁文件路径（标记文件为 {path}.inprogress 去掉.lock）
+            name: 显示用的名称
+            timeout: 等待锁的最长秒数（None表示一直等待）
+        """
+        self.path = path
+        self.marker_path = path[:-len('.lock')] + '.inprogress' if path.endswith('.lock') else path + '.inprogress'
+        self.name = name or os.path.basename(path)
+        self.timeout = timeout
+        self.waited = 0.0
+        self._file = None
+
+    def holder(self) -> Optional[Dict]:
+        """当前进行中标记的内容（没有标记时返回None）"""
+        try:
+            with open(self.marker_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def locked(self) -> bool:
+        """是否有进程（包括本进程）正持有该锁"""
+        if self._file is not None:
+            return True
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'a+') as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(f, fcntl.LOCK_UN)
+        return False
+
+    def acquire(self) -> 'FileLock':
+        self._file = open(self.path, 'a+')
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            holder = self.holder() or {}
+            print(f"⏳ {self.name} 正在由另一个进程处理 (pid {holder.get('pid', '?')}@{holder.get('host', '?')})，等待完成...")
+            start = time.perf_counter()
+            if self.timeout is None:
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            else:
+                while True:
+                    try:
+                        fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        if time.perf_counter() - start > self.timeout:
+                            self._file.close()
+                            self._file = None
+                            raise TimeoutError(f"等待 {self.name} 超时 ({self.timeout}s)")
+                        time.sleep(0.5)
+            self.waited = time.perf_counter() - start
+
+        if self.holder():
+            print(f"⚠️  {self.name} 上一次处理没有正常结束，重新处理")
+        with atomic_write(self.marker_path) as f:
+            json.dump({'pid': os.getpid(), 'host': socket.gethostname(), 'started_at': time.time()}, f)
+        return self
+
+    def release(self):
+        if self._file is None:
+            return
+        try:
+            os.remove(self.marker_path)
+        except FileNotFoundError:
+            pass
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def file_digest(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CacheManager:
+    """
+    缓存管理器
+
+    产物按 {root}/{shard}/{video_id}{suffix} 存放，shard取video_id哈希的前两位，
+    同一视频的音频、PCM、识别结果等放在同一个分片目录下。
+    清单以文件名为主键，查找是一次索引查询；音频记录SHA-256，其余产物记录大小和修改时间，用于校验。
+    """
+
+    def __init__(self, root: Optional[str] = None, budget: Optional[int] = None):
+        """
+        Args:
+            root: 缓存根目录（默认取环境变量PODCAST_VISUALIZER_CACHE）
+            budget: 缓存总字节数上限，超出时按最近访问时间淘汰（None表示不限制）
+        """
+        self.root = os.path.abspath(root or DEFAULT_ROOT)
+        self.budget = budget
+        os.makedirs(self.root, exist_ok=True)
+        self.manifest_path = os.path.join(self.root, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.manifest_path, timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS artifacts (
+                key TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stage TEXT,
+                sha256 TEXT,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL,
+                mtime REAL
+            )
+        ''')
+        columns = [row[1] for row in self._db.execute('PRAGMA table_info(artifacts)')]
+        if 'mtime' not in columns:
+            self._db.execute('ALTER TABLE artifacts ADD COLUMN mtime REAL')
+        self._db.execute('CREATE INDEX IF NOT EXISTS artifacts_last_access ON artifacts (last_access)')
+        self._db.commit()
+
+    def directory(self, video_id: str) -> str:
+        """视频对应的分片目录"""
+        shard = hashlib.sha1(video_id.encode('utf-8')).hexdigest()[:2]
+        directory = os.path.join(self.root, shard)
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    def path(self, video_id: str, suffix: str) -> str:
+        """产物的存放路径（不检查是否存在）"""
+        return os.path.join(self.directory(video_id), f"{video_id}{suffix}")
+
+    def lock(self, video_id: str, name: str, timeout: Optional[float] = None) -> FileLock:
+        """
+        同一视频、同一环节的跨进程锁（single-flight）
+
+        后来的调用方等待先来的调用方完成，拿到锁后应重新检查缓存，直接复用已有结果。
+
+        Args:
+            video_id: 视频ID
+            name: 环节名称（如 'download'、'process'）
+            timeout: 等待锁的最长秒数（None表示一直等待）
+        """
+        return FileLock(self.path(video_id, f'.{name}.lock'), name=f"{video_id} ({name})", timeout=timeout)
+
+    def get(self, video_id: str, suffix: str) -> Optional[str]:
+        """
+        查找产物
+
+        命中时更新最近访问时间。旧版平铺在根目录下的文件会被移入分片目录并登记。
+
+        Returns:
+            文件路径；未缓存时返回None
+        """
+        key = f"{video_id}{suffix}"
+        with self._lock:
+            row = self._db.execute('SELECT path FROM artifacts WHERE key = ?', (key,)).fetchone()
+        if row:
+            path = os.path.join(self.root, row[0])
+            if os.path.exists(path):
+                self.touch(video_id, suffix)
+                return path
+            self.remove(video_id, suffix)
+            return None
+
+        path = self.path(video_id, suffix)
+        legacy_path = os.path.join(self.root, key)
+        if not os.path.exists(path) and os.path.exists(legacy_path):
+            os.replace(legacy_path, path)
+        if os.path.exists(path):
+            self.put(video_id, suffix, stage='legacy')
+            return path
+        return None
+
+    def put(self, video_id: str, suffix: str, stage: str) -> str:
+        """
+        登记已写入 path(video_id, suffix) 的产物，并在超出预算时淘汰旧产物
+
+        Args:
+            video_id: 视频ID
+            suffix: 产物后缀（如 '.mp3'、'.json'）
+            stage: 产生该产物的环节
+
+        Returns:
+            文件路径
+        """
+        key = f"{video_id}{suffix}"
+        path = self.path(video_id, suffix)
+        now = time.time()
+        stat = os.stat(path)
+        digest = file_digest(path) if suffix in DIGEST_SUFFIXES else None
+        with self._lock:
+            self._db.execute('''
+                INSERT INTO artifacts (key, video_id, path, size, stage, sha256, created, last_access, mtime)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    size = excluded.size, stage = excluded.stage, sha256 = excluded.sha256,
+                    created = excluded.created, last_access = excluded.last_access, mtime = excluded.mtime
+            ''', (key, video_id, os.path.relpath(path, self.root), stat.st_size, stage, digest, now, now,
+                  stat.st_mtime))
+            self._db.commit()
+
+        if self.budget is not None:
+            # 正在写入的视频的其他产物（如刚下载的音频）稍后还要使用，不能淘汰
+            self.gc(protect_videos=[video_id])
+        return path
+
+    def digest(self, video_id: str, suffix: str) -> Optional[str]:
+        """清单中记录的产物sha256（未登记时返回None）"""
+        with self._lock:
+            row = self._db.execute('SELECT sha256 FROM artifacts WHERE key = ?',
+                                   (f"{video_id}{suffix}",)).fetchone()
+        return row[0] if row else None
+
+    def touch(self, video_id: str, suffix: str):
+        with self._lock:
+            self._db.execute('UPDATE artifacts SET last_access = ? WHERE key = ?',
+                             (time.time(), f"{video_id}{suffix}"))
+            self._db.commit()
+
+    def remove(self, video_id: str, suffix: str):
+        """删除产物文件和清单记录"""
+        self._remove_key(f"{video_id}{suffix}")
+
+    def _remove_key(self, key: str):
+        with self._lock:
+            row = self._db.execute('SELECT path FROM artifacts WHERE key = ?', (key,)).fetchone()
+            self._db.execute('DELETE FROM artifacts WHERE key = ?', (key,))
+            self._db.commit()
+        if row:
+            try:
+                os.remove(os.path.join(self.root, row[0]))
+            except FileNotFoundError:
+                pass
+
+    def entries(self, video_id: Optional[str] = None) -> List[Dict]:
+        """清单中的所有产物，按最近访问时间从新到旧"""
+        query = 'SELECT key, video_id, path, size, stage, sha256, created, last_access, mtime FROM artifacts'
+        params = ()
+        if video_id:
+            query += ' WHERE video_id = ?'
+            params = (video_id,)
+        with self._lock:
+            rows = self._db.execute(query + ' ORDER BY last_access DESC', params).fetchall()
+        fields = ['key', 'video_id', 'path', 'size', 'stage', 'sha256', 'created', 'last_access', 'mtime']
+        return [dict(zip(fields, row)) for row in rows]
+
+    def total_size(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM artifacts').fetchone()[0]
+
+    def busy_videos(self) -> List[str]:
+        """正在下载或处理（持有BUSY_LOCKS中的锁）的视频"""
+        videos = []
+        for marker in glob.glob(os.path.join(self.root, '*', '*.inprogress')):
+            video_id, _, name = os.path.basename(marker)[:-len('.inprogress')].rpartition('.')
+            if name in BUSY_LOCKS and video_id not in videos and self.lock(video_id, name).locked():
+                videos.append(video_id)
+        return videos
+
+    def gc(self, budget: Optional[int] = None, protect: List[str] = (),
+           protect_videos: List[str] = (), dry_run: bool = False) -> List[Dict]:
+        """
+        按最近访问时间淘汰产物，直到总大小不超过预算
+
+        正在下载或处理的视频的产物不会被淘汰。
+
+        Args:
+            budget: 字节预算（默认使用构造时的预算）
+            protect: 不淘汰的产物文件名
+            protect_videos: 不淘汰这些视频的任何产物
+            dry_run: 只选出将被淘汰的产物，不删除
+
+        Returns:
+            被淘汰（dry_run时为将被淘汰）的产物
+        """
+        budget = self.budget if budget is None else budget
+        if budget is None:
+            return []
+
+        total = self.total_size()
+        evicted = []
+        if total <= budget:
+            return evicted
+
+        protect_videos = set(protect_videos) | set(self.busy_videos())
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT key, video_id, size, last_access FROM artifacts ORDER BY last_access ASC').fetchall()
+        for key, video_id, size, last_access in rows:
+            if total <= budget:
+                break
+            if key in protect or video_id in protect_videos:
+                continue
+            if not dry_run:
+                self._remove_key(key)
+            total -= size
+            evicted.append({'key': key, 'size': size, 'last_access': last_access})
+        return evicted
+
+    def verify(self, deep: bool = False, fix: bool = False) -> List[Dict]:
+        """
+        检查清单与磁盘是否一致
+
+        Args:
+            deep: 是否重新计算音频的SHA-256（读取全部音频）
+            fix: 是否修复：删除缺失/损坏产物的记录，更新大小或修改时间变化的记录，登记清单外的文件
+
+        Returns:
+            问题列表，每项包含key, problem（missing/size/modified/corrupt/untracked）
+        """
+        problems = []
+        tracked = set()
+        for entry in self.entries():
+            path = os.path.join(self.root, entry['path'])
+            tracked.add(entry['path'])
+            video_id, suffix = entry['video_id'], entry['key'][len(entry['video_id']):]
+            if not os.path.exists(path):
+                problems.append({'key': entry['key'], 'problem': 'missing'})
+                if fix:
+                    self._remove_key(entry['key'])
+            elif os.path.getsize(path) != entry['size']:
+                problems.append({'key': entry['key'], 'problem': 'size'})
+                if fix:
+                    self.put(video_id, suffix, stage=entry['stage'])
+            elif entry['sha256'] is None and entry['mtime'] is not None and os.path.getmtime(path) != entry['mtime']:
+                problems.append({'key': entry['key'], 'problem': 'modified'})
+                if fix:
+                    self.put(video_id, suffix, stage=entry['stage'])
+            elif deep and entry['sha256'] and file_digest(path) != entry['sha256']:
+                problems.append({'key': entry['key'], 'problem': 'corrupt'})
+                if fix:
+                    self._remove_key(entry['key'])
+
+        untracked = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                relpath = os.path.relpath(os.path.join(directory, name), self.root)
+                if relpath in tracked or relpath.startswith(MANIFEST_NAME):
+                    continue
+                if name.endswith(('.tmp', '.part', '.lock', '.inprogress')):
+                    continue
+                untracked.append(relpath)
+        for relpath in untracked:
+            problems.append({'key': relpath, 'problem': 'untracked'})
+            if fix:
+                self._adopt(relpath)
+        return problems
+
+    def _adopt(self, relpath: str):
+        """登记清单外的文件；根目录下的旧版文件先移入分片目录"""
+        name = os.path.basename(relpath)
+        # video_id本身可能含有'_'和'-'，但不含'.'；_streamlit.json、_app.py 是旧版命名
+        video_id = name.split('.', 1)[0]
+        for legacy in ('_streamlit', '_app'):
+            if video_id.endswith(legacy):
+                video_id = video_id[:-len(legacy)]
+        suffix = name[len(video_id):]
+        target = self.path(video_id, suffix)
+        source = os.path.join(self.root, relpath)
+        if source != target:
+            os.replace(source, target)
+        self.put(video_id, suffix, stage='unknown')
+
+    def close(self):
+        self._db.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    """cache ls / gc / verify"""
+    parser = argparse.ArgumentParser(prog="podcast-visualizer cache", description="播客可视化工具 - 缓存管理")
+    parser.add_argument("--cache-dir", default=DEFAULT_ROOT, help=f"缓存根目录 (默认: {DEFAULT_ROOT})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ls_parser = commands.add_parser("ls", help="列出缓存的产物")
+    ls_parser.add_argument("video_id", nargs='?', help="只列出该视频的产物")
+
+    gc_parser = commands.add_parser("gc", help="按最近访问时间淘汰产物")
+    gc_parser.add_argument("--budget", required=True, help="缓存总大小上限，如 20G、500M")
+    gc_parser.add_argument("--dry-run", action="store_true", help="只显示将被淘汰的产物")
+
+    verify_parser = commands.add_parser("verify", help="检查清单与磁盘是否一致")
+    verify_parser.add_argument("--deep", action="store_true", help="重新计算SHA-256校验音频内容")
+    verify_parser.add_argument("--fix", action="store_true", help="修复发现的问题")
+
+    args = parser.parse_args(argv)
+    cache = CacheManager(args.cache_dir)
+
+    if args.command == "ls":
+        entries = cache.entries(args.video_id)
+        for entry in entries:
+            accessed = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_access']))
+            print(f"{format_size(entry['size']):>8}  {accessed}  {entry['stage'] or '-':<12} {entry['key']}")
+        print(f"共 {len(entries)} 个产物，{format_size(sum(e['size'] for e in entries))}")
+
+    elif args.command == "gc":
+        budget = parse_size(args.budget)
+        if args.dry_run:
+            for item in cache.gc(budget, dry_run=True):
+                print(f"将淘汰: {item['key']} ({format_size(item['size'])})")
+        else:
+            evicted = cache.gc(budget)
+            for item in evicted:
+                print(f"🗑  已淘汰: {item['key']} ({format_size(item['size'])})")
+            print(f"✓ 淘汰 {len(evicted)} 个产物，当前 {format_size(cache.total_size())}")
+
+    elif args.command == "verify":
+        problems = cache.verify(deep=args.deep, fix=args.fix)
+        for item in problems:
+            print(f"{'✓ 已修复' if args.fix else '❌'} {item['problem']:<10} {item['key']}")
+        if problems and not args.fix:
+            sys.exit(1)
+        print(f"✓ 校验完成，发现 {len(problems)} 个问题")
+
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
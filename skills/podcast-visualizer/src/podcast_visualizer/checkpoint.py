@@ -0,0 +1,96 @@
+"""
+识别断点模块
+边识别边把完成的音频块追加到JSONL文件，崩溃后从最后提交的时间点继续
+"""
+
+import os
+import json
+from typing import List, Dict, Tuple
+
+from .alignment import stitch_segments
+
+
+def _read_lines(path: str) -> Tuple[List[Dict], int]:
+    """读取JSONL中完整的记录，返回记录列表和有效内容的字节长度"""
+    records = []
+    valid_bytes = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # 写到一半的行
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+            valid_bytes += len(line)
+    return records, valid_bytes
+
+
+class TranscriptCheckpoint:
+    """
+    识别断点文件
+
+    第一行是识别参数，之后每行是一个已完成的音频块：
+    {"type": "chunk", "start": 秒, "end": 秒, "segments": [...]}。
+    每行写完后立即fsync，一行即一次提交。
+    """
+
+    def __init__(self, path: str, params: Dict, resume: bool = True):
+        """
+        Args:
+            path: 断点文件路径
+            params: 识别参数，与已有断点不一致时从头开始
+            resume: 是否从已有断点继续
+        """
+        self.path = path
+        self.params = params
+        self.chunks = []
+        self.committed = 0.0
+
+        if resume and os.path.exists(path):
+            records, valid_bytes = _read_lines(path)
+            if records and records[0].get('type') == 'header' and records[0].get('params') == params:
+                for record in records[1:]:
+                    self.chunks.append(record['segments'])
+                    self.committed = record['end']
+                # 去掉崩溃时写了一半的行
+                with open(path, 'r+b') as f:
+                    f.truncate(valid_bytes)
+                self._file = open(path, 'a', encoding='utf-8')
+                return
+
+        self._file = open(path, 'w', encoding='utf-8')
+        self._write({'type': 'header', 'params': params})
+
+    def _write(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def commit(self, start: float, end: float, segments: List[Dict]):
+        """提交一个已完成的音频块"""
+        self._write({'type': 'chunk', 'start': start, 'end': end, 'segments': segments})
+        self.chunks.append(segments)
+        self.committed = end
+
+    def close(self):
+        self._file.close()
+
+
+def read_checkpoint(path: str) -> Tuple[List[Dict], float]:
+    """
+    读取（可能仍在写入中的）断点文件
+
+    Args:
+        path: 断点文件路径
+
+    Returns:
+        (已提交的片段列表, 已提交到的时间点)
+    """
+    if not os.path.exists(path):
+        return [], 0.0
+
+    records, _ = _read_lines(path)
+    chunks = [r['segments'] for r in records if r.get('type') == 'chunk']
+    committed = max((r['end'] for r in records if r.get('type') == 'chunk'), default=0.0)
+    return stitch_segments(chunks), committed
@@ -7,13 +7,14 @@ import json
 import subprocess
 from pathlib import Path
 
-# 导入模块
-from .downloader import YouTubeDownloader
-from .transcriber import TranscriberWithSpeaker
-from .segmenter import Segmenter
+# 导入模块（torch、whisper、pyannote等重依赖只在需要识别时才导入）
+from . import metrics
+from .cache import CacheManager, atomic_write, parse_size
+from .downloader import YouTubeDownloader, browser_audio, extract_video_id, DEFAULT_MIN_ABR
+from .stages import run_stages
 
 
-def process_podcast(url: str = None, audio_path: str = None, metadata_file: str = None, model_size: str = "medium", skip_cache: bool = False, cookies_path: str = None):
+def process_podcast(url: str = None, audio_path: str = None, metadata_file: str = None, model_size: str = "medium", skip_cache: bool = False, cookies_path: str = None, workers: int = 1, word_timestamps: bool = False, vad: bool = False, run_log: str = None, cache_dir: str = None, cache_budget: str = None, browser_mp3: bool = False, download_profile: str = 'best', min_abr: float = DEFAULT_MIN_ABR, stream: bool = False):
     """
     处理播客
 
@@ -24,107 +25,135 @@ def process_podcast(url: str = None, audio_path: str = None, metadata_file: str
         model_size: Whisper模型大小
         skip_cache: 是否跳过缓存
         cookies_path: Cookies文件路径
+        workers: 语音识别的并行进程数
+        word_timestamps: 是否保留词级时间戳（保存为{video_id}.words.{语音识别缓存键}.col）
+        vad: 是否先做语音活动检测，跳过非语音部分
+        run_log: 跨运行的汇总日志路径（JSONL，可选）
+        cache_dir: 缓存根目录（默认取环境变量PODCAST_VISUALIZER_CACHE）
+        cache_budget: 缓存总大小上限（如 '20G'），超出时淘汰最久未使用的产物
+        browser_mp3: 是否为网页播放器生成mp3副本（默认直接播放原始音频）
+        download_profile: 下载档位（best: 最高码率；speech: 满足码率下限的最低码率）
+        min_abr: speech档位的音频码率下限（kbps）
+        stream: 是否边下载边识别（音频未缓存时）
     """
     print("=" * 60)
     print("🎧 播客可视化工具")
     print("=" * 60)
 
-    # 检查输入方式
+    # 本地音频以文件名作为video_id
     if audio_path:
-        # 从本地音频文件处理
-        print(f"📁 使用本地音频文件: {audio_path}")
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"音频文件不存在: {audio_path}")
-
-        audio_basename = os.path.basename(audio_path)
-        video_id = os.path.splitext(audio_basename)[0]
-
-        # 加载元数据（如果提供）
-        if metadata_file and os.path.exists(metadata_file):
-            print(f"📄 加载元数据: {metadata_file}")
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-        else:
-            # 使用默认元数据
-            metadata = {
-                'title': audio_basename,
-                'description': '',
-                'uploader': 'Unknown',
-                'duration': 0,
-                'upload_date': '',
-                'view_count': 0,
-                'video_id': video_id,
-                'url': audio_path,
-            }
-            print("📄 使用默认元数据")
-
+        video_id = os.path.splitext(os.path.basename(audio_path))[0]
     elif url:
-        # 从YouTube URL下载
-        downloader = YouTubeDownloader(cache_dir="/root/clawd/skills/podcast-visualizer/cache", cookies_path=cookies_path)
-        download_result = downloader.download_audio(url, skip_cache=skip_cache)
-        audio_path = download_result['audio_path']
-        metadata = download_result['metadata']
-        video_id = download_result['video_id']
+        video_id = extract_video_id(url)
+        if not video_id:
+            raise ValueError(f"无法从URL中提取video ID: {url}")
     else:
         raise ValueError("必须提供 --url 或 --audio 参数")
+    # 流式识别只在本进程内加载一个模型，按固定窗口处理整段音频
+    if stream and (vad or workers > 1):
+        raise ValueError("--stream 不支持 --vad 和 --workers > 1")
 
-    print()
-    print(f"视频ID: {video_id}")
-    print(f"音频路径: {audio_path}")
-    print(f"标题: {metadata.get('title', 'N/A')}")
-    print(f"时长: {metadata.get('duration', 0)}秒")
-    print()
-
-    # 检查识别结果缓存
-    result_path = os.path.join("/root/clawd/skills/podcast-visualizer/cache", f"{video_id}.json")
-
-    if os.path.exists(result_path) and not skip_cache:
-        print(f"✓ 使用缓存的识别结果")
-        with open(result_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            transcription = data.get('transcription', [])
-            segments = data.get('segments', [])
-    else:
-        # 初始化识别器
-        print("📝 初始化语音识别...")
-        transcriber = TranscriberWithSpeaker(model_size=model_size)
-
-        # 语音识别 + 说话人分离
-        transcription = transcriber.process(audio_path)
-
-        # 分块
-        print("📝 智能分块...")
-        segmenter = Segmenter()
-        segments = segmenter.segment(
-            description=metadata.get('description', ''),
-            transcription=transcription,
-            duration=metadata.get('duration', 0)
-        )
+    report = metrics.start_run(video_id)
+    report.info.update(model_size=model_size, workers=workers, vad=vad, word_timestamps=word_timestamps)
+
+    cache = CacheManager(cache_dir, budget=parse_size(cache_budget))
+
+    # 同一视频同时只由一个进程处理：后到的进程在这里等待，然后复用先到者缓存的音频和识别结果
+    with cache.lock(video_id, 'process') as flight:
+        # 等待过说明结果刚由其他进程生成，即使指定了--skip-cache也直接复用
+        skip_cache = skip_cache and not flight.waited
+
+        # 检查输入方式
+        streamed = None
+        if audio_path:
+            # 从本地音频文件处理
+            print(f"📁 使用本地音频文件: {audio_path}")
+            if not os.path.exists(audio_path):
+                raise FileNotFoundError(f"音频文件不存在: {audio_path}")
+
+            audio_basename = os.path.basename(audio_path)
+
+            # 加载元数据（如果提供）
+            if metadata_file and os.path.exists(metadata_file):
+                print(f"📄 加载元数据: {metadata_file}")
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            else:
+                # 使用默认元数据
+                metadata = {
+                    'title': audio_basename,
+                    'description': '',
+                    'uploader': 'Unknown',
+                    'duration': 0,
+                    'upload_date': '',
+                    'view_count': 0,
+                    'video_id': video_id,
+                    'url': audio_path,
+                }
+                print("📄 使用默认元数据")
+
+        else:
+            # 从YouTube URL下载
+            downloader = YouTubeDownloader(cookies_path=cookies_path, cache=cache,
+                                           profile=download_profile, min_abr=min_abr)
+            # --stream且音频未缓存时，边下载边识别
+            if stream and (skip_cache or not downloader.cached_audio(video_id)):
+                from .streaming import stream_episode
+                download_result = stream_episode(downloader, url, model_size=model_size, word_timestamps=word_timestamps)
+                if 'transcription' in download_result:
+                    streamed = download_result
+            else:
+                download_result = downloader.download_audio(url, skip_cache=skip_cache)
+            downloader.close()
+            audio_path = download_result['audio_path']
+            metadata = download_result['metadata']
+            video_id = download_result['video_id']
 
-        # 保存结果
-        data = {
-            'metadata': metadata,
-            'transcription': transcription,
-            'segments': segments,
-        }
-        with open(result_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        report.video_id = video_id
+        report.info['audio_format'] = os.path.splitext(audio_path)[1]
+
+        print()
+        print(f"视频ID: {video_id}")
+        print(f"音频路径: {audio_path}")
+        print(f"标题: {metadata.get('title', 'N/A')}")
+        print(f"时长: {metadata.get('duration', 0)}秒")
+        print()
+
+        # 分环节缓存：语音识别、说话人分离、合并和分块按各自的输入和参数缓存，只重新运行变化的环节
+        if not streamed:
+            print(f"💡 识别过程中可运行 podcast-visualizer view {video_id} 查看已完成的部分")
+        if streamed:
+            report.info['time_to_first_segment'] = streamed['time_to_first_segment']
+        transcription, segments = run_stages(
+            cache, video_id, audio_path, metadata, model_size=model_size, workers=workers,
+            word_timestamps=word_timestamps, vad=vad, reuse=not skip_cache, streamed=streamed)
+
+        # 保存结果（列式文字稿，需要JSON时用 podcast-visualizer transcript to-json 转换）
+        from .transcript import save_transcript
+
+        result_path = cache.path(video_id, '.transcript.col')
+        with metrics.stage('save_result'):
+            save_transcript(result_path, transcription, segments, metadata)
+        cache.put(video_id, '.transcript.col', stage='segment')
         print(f"✓ 结果已保存到: {result_path}")
 
-    # 保存Streamlit数据文件
-    streamlit_data_path = os.path.join("/root/clawd/skills/podcast-visualizer/cache", f"{video_id}_streamlit.json")
-    streamlit_data = {
-        'segments': segments,
-        'metadata': metadata,
-    }
-    with open(streamlit_data_path, 'w', encoding='utf-8') as f:
-        json.dump(streamlit_data, f, ensure_ascii=False, indent=2)
+    # 运行报告
+    report = metrics.end_run()
+    print("\n⏱  各环节耗时:")
+    print(report.summary())
+    report.save(cache.path(video_id, '.run.json'))
+    cache.put(video_id, '.run.json', stage='report')
+    if run_log:
+        report.append_log(run_log)
 
     # 启动Streamlit网站
     print("\n" + "=" * 60)
     print("🚀 启动交互式网站...")
     print("=" * 60)
 
+    # 网页播放器的音频：默认直接使用原始音频，需要时才转码为mp3
+    player_audio_path = browser_audio(audio_path, video_id, cache) if browser_mp3 else audio_path
+
     # 创建Streamlit启动脚本
     script_content = f'''
 import sys
@@ -135,16 +164,18 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from podcast_visualizer.web_app import load_data, main
 
-data_path = "{streamlit_data_path}"
-audio_path = "{audio_path}"
+# 网站直接读取列式文字稿：分块只含下标范围，对话在显示时才解码
+data_path = "{result_path}"
+audio_path = "{player_audio_path}"
 
 load_data(data_path, audio_path)
 main()
 '''
 
-    script_path = os.path.join("/root/clawd/skills/podcast-visualizer/cache", f"{video_id}_app.py")
-    with open(script_path, 'w', encoding='utf-8') as f:
+    script_path = cache.path(video_id, '_app.py')
+    with atomic_write(script_path) as f:
         f.write(script_content)
+    cache.put(video_id, '_app.py', stage='streamlit')
 
     # 启动Streamlit
     print("\n🌐 访问 http://localhost:8501 查看可视化网站")
@@ -159,6 +190,22 @@ main()
 
 def main():
     """主函数"""
+    # 缓存管理子命令: cache ls / gc / verify
+    if len(sys.argv) > 1 and sys.argv[1] == 'cache':
+        from .cache import main as cache_main
+        cache_main(sys.argv[2:])
+        return
+    # 文字稿格式转换子命令: transcript to-json / from-json
+    if len(sys.argv) > 1 and sys.argv[1] == 'transcript':
+        from .transcript import main as transcript_main
+        transcript_main(sys.argv[2:])
+        return
+    # 查看网站子命令: view <video_id>（识别进行中时显示已完成的部分）
+    if len(sys.argv) > 1 and sys.argv[1] == 'view':
+        from .cli import view_main
+        view_main(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         description="YouTube播客可视化工具 - 将播客转换为可交互的文字稿网站"
     )
@@ -189,6 +236,56 @@ def main():
         "--cookies",
         help="YouTube cookies文件路径（用于需要登录的视频）"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="语音识别的并行进程数，大于1时在静音处分块并行识别 (默认: 1)"
+    )
+    parser.add_argument(
+        "--word-timestamps",
+        action="store_true",
+        help="保留词级时间戳（额外的对齐开销，默认关闭）"
+    )
+    parser.add_argument(
+        "--vad",
+        action="store_true",
+        help="先做语音活动检测，跳过长段静音"
+    )
+    parser.add_argument(
+        "--run-log",
+        help="把本次运行报告追加到该JSONL文件，用于跨运行汇总（可选）"
+    )
+    parser.add_argument(
+        "--download-profile",
+        default="best",
+        choices=["best", "speech"],
+        help="下载档位：best为最高码率，speech为满足码率下限的最低码率，节省带宽 (默认: best)"
+    )
+    parser.add_argument(
+        "--min-abr",
+        type=float,
+        default=DEFAULT_MIN_ABR,
+        help=f"speech档位的音频码率下限，kbps (默认: {DEFAULT_MIN_ABR})"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="边下载边识别：下载的同时解码并按窗口进行语音识别（不支持--vad和--workers）"
+    )
+    parser.add_argument(
+        "--mp3",
+        action="store_true",
+        help="为网页播放器生成mp3副本（默认直接播放下载的原始opus/m4a音频）"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="缓存根目录（默认: $PODCAST_VISUALIZER_CACHE 或 /root/clawd/skills/podcast-visualizer/cache）"
+    )
+    parser.add_argument(
+        "--cache-budget",
+        help="缓存总大小上限，如 20G；超出时淘汰最久未使用的产物（默认不限制）"
+    )
 
     args = parser.parse_args()
 
@@ -199,7 +296,17 @@ def main():
             metadata_file=args.metadata,
             model_size=args.model_size,
             skip_cache=args.skip_cache,
-            cookies_path=args.cookies
+            cookies_path=args.cookies,
+            workers=args.workers,
+            word_timestamps=args.word_timestamps,
+            vad=args.vad,
+            run_log=args.run_log,
+            cache_dir=args.cache_dir,
+            cache_budget=args.cache_budget,
+            browser_mp3=args.mp3,
+            download_profile=args.download_profile,
+            min_abr=args.min_abr,
+            stream=args.stream
         )
     except Exception as e:
         print(f"❌ 错误: {e}")
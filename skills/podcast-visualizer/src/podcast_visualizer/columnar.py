@@ -0,0 +1,84 @@
+"""
+列式二进制存储
+把若干个一维NumPy数组连同少量元数据写入单个文件，读取时可内存映射、按需切片
+"""
+
+import json
+import struct
+from typing import Dict, Tuple
+import numpy as np
+
+from .cache import atomic_write
+
+MAGIC = b'PVCOL1\n\x00'
+ALIGN = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_columns(path: str, columns: Dict[str, np.ndarray], meta: Dict = None):
+    """
+    写入列式文件
+
+    文件结构：魔数 | 头部长度(uint64) | JSON头部 | 按64字节对齐的各列数据。
+    先写临时文件再重命名，读取方不会看到写了一半的文件。
+
+    Args:
+        path: 输出文件路径
+        columns: 列名到一维数组的映射
+        meta: 附加的元数据（可JSON序列化）
+    """
+    columns = {name: np.ascontiguousarray(array) for name, array in columns.items()}
+
+    layout = {}
+    offset = 0
+    for name, array in columns.items():
+        layout[name] = {
+            'dtype': array.dtype.str,
+            'length': int(array.shape[0]),
+            'offset': offset,
+        }
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps({'meta': meta or {}, 'columns': layout}, ensure_ascii=False).encode('utf-8')
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    with atomic_write(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, array in columns.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+
+
+def read_columns(path: str, mmap: bool = True) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """
+    读取列式文件
+
+    Args:
+        path: 文件路径
+        mmap: 是否内存映射（False时一次性读入内存）
+
+    Returns:
+        (列名到数组的映射, 元数据)
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是有效的列式文件: {path}")
+        header_len, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(header_len))
+
+    data_start = _align(len(MAGIC) + 8 + header_len)
+    buffer = np.memmap(path, dtype=np.uint8, mode='r') if mmap else np.fromfile(path, dtype=np.uint8)
+
+    columns = {}
+    for name, info in header['columns'].items():
+        dtype = np.dtype(info['dtype'])
+        start = data_start + info['offset']
+        columns[name] = buffer[start:start + info['length'] * dtype.itemsize].view(dtype)
+
+    return columns, header['meta']
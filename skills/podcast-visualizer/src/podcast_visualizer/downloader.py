@@ -6,8 +6,23 @@ YouTube下载模块
 import os
 import json
 import re
-from typing import Dict, Optional
-import yt_dlp
+import time
+import threading
+from typing import Dict, List, Optional
+
+from . import metrics
+from .cache import CacheManager, atomic_path, atomic_write
+
+# 下载档位：best为最高码率；speech为不低于码率下限的最低码率音频，
+# Whisper会重采样到16kHz单声道，更高的码率对识别没有帮助
+DOWNLOAD_PROFILES = ('best', 'speech')
+DEFAULT_MIN_ABR = 48
+
+# 只获取元数据时的缓存有效期（秒）
+METADATA_TTL = 24 * 3600
+
+# yt-dlp下载的原始音频流的扩展名（opus在webm容器中，AAC在m4a容器中）
+NATIVE_AUDIO_EXTS = ('.webm', '.m4a', '.opus', '.ogg', '.mp3')
 
 
 def extract_video_id(url: str) -> Optional[str]:
@@ -26,90 +41,289 @@ def extract_video_id(url: str) -> Optional[str]:
 
 
 class YouTubeDownloader:
-    """YouTube下载器"""
+    """
+    YouTube下载器
 
-    def __init__(self, cache_dir: str = "./cache", cookies_path: str = None):
-        self.cache_dir = cache_dir
+    每个线程复用同一个YoutubeDL实例（连接和cookies状态随之复用），可以在多个线程中并发调用。
+    各实例只读取cookies文件，close()时合并各实例的cookies，加锁后原子地写回一次。
+    文件先下载到缓存根目录的incoming/下，完成后移入对应的分片目录。
+    """
+
+    def __init__(self, cache_dir: str = "./cache", cookies_path: str = None, cache: CacheManager = None,
+                 profile: str = 'best', min_abr: float = DEFAULT_MIN_ABR, quiet: bool = False):
+        """
+        Args:
+            cache_dir: 缓存根目录（未提供cache时使用）
+            cookies_path: Cookies文件路径
+            cache: 缓存管理器（可选，与CLI共用同一个清单）
+            profile: 下载档位（best: 最高码率；speech: 满足码率下限的最低码率）
+            min_abr: speech档位的音频码率下限（kbps）
+            quiet: 是否关闭yt-dlp的输出（批量下载时使用）
+        """
+        if profile not in DOWNLOAD_PROFILES:
+            raise ValueError(f"未知的下载档位: {profile}")
+        self.cache = cache or CacheManager(cache_dir)
+        self.cache_dir = self.cache.root
         self.cookies_path = cookies_path
-        os.makedirs(cache_dir, exist_ok=True)
+        self.profile = profile
+        self.min_abr = min_abr
+        self.quiet = quiet
+        self.incoming_dir = os.path.join(self.cache.root, 'incoming')
+        os.makedirs(self.incoming_dir, exist_ok=True)
+        self._local = threading.local()
+        self._instances = []
+        self._instances_lock = threading.Lock()
 
-    def download_audio(self, url: str, skip_cache: bool = False) -> Dict:
+        # 添加cookies（如果提供）
+        if self.cookies_path:
+            print(f"🍪 使用cookies: {self.cookies_path}")
+            # 打印一些cookie信息用于调试
+            if os.path.exists(self.cookies_path):
+                with open(self.cookies_path, 'r') as f:
+                    lines = f.readlines()
+                    # 过滤掉注释和空行
+                    cookie_lines = [line for line in lines if line.strip() and not line.strip().startswith('#')]
+                    print(f"  找到 {len(cookie_lines)} 个cookies")
+
+    def format_selector(self) -> str:
+        """当前档位对应的yt-dlp格式选择"""
+        if self.profile == 'speech':
+            # 码率下限以上的最低码率；都低于下限时退回码率最高的音频
+            return f'worstaudio[abr>={self.min_abr:g}]/bestaudio/best'
+        return 'bestaudio/best'
+
+    def ydl_options(self, mp3: bool = False) -> Dict:
+        """yt-dlp下载配置（与具体视频无关，实例可以复用）"""
+        ydl_opts = {
+            'format': self.format_selector(),
+            'outtmpl': os.path.join(self.incoming_dir, '%(id)s.%(ext)s'),
+            'progress_hooks': [self._progress_hook],
+            'postprocessor_hooks': [self._postprocessor_hook],
+            'quiet': self.quiet,
+            'noprogress': self.quiet,
+            'no_warnings': False,
+            # 额外参数尝试绕过机器人检测
+            'nocheckcertificate': True,
+            'ignoreerrors': False,
+        }
+
+        if mp3:
+            ydl_opts['postprocessors'] = [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '192',
+            }]
+
+        if self.cookies_path:
+            ydl_opts['cookiefile'] = self.cookies_path
+
+        return ydl_opts
+
+    def _ydl(self, mp3: bool = False):
+        """当前线程的YoutubeDL实例"""
+        instances = getattr(self._local, 'instances', None)
+        if instances is None:
+            instances = self._local.instances = {}
+        if mp3 not in instances:
+            import yt_dlp
+
+            ydl = yt_dlp.YoutubeDL(self.ydl_options(mp3))
+            if self.cookies_path:
+                # 先载入cookies，再去掉cookiefile，关闭实例时不会各自写回同一个文件
+                ydl.cookiejar
+                ydl.params['cookiefile'] = None
+            instances[mp3] = ydl
+            with self._instances_lock:
+                self._instances.append(ydl)
+        return instances[mp3]
+
+    def close(self):
+        """关闭所有YoutubeDL实例（写回cookies）"""
+        with self._instances_lock:
+            instances, self._instances = self._instances, []
+        if self.cookies_path and instances:
+            self._save_cookies([ydl.cookiejar for ydl in instances])
+        for ydl in instances:
+            ydl.close()
+        self._local = threading.local()
+
+    def _save_cookies(self, jars: List):
+        """合并各实例的cookies并写回cookies文件（跨进程加锁，原子替换）"""
+        jar = jars[0]
+        for other in jars[1:]:
+            for cookie in other:
+                jar.set_cookie(cookie)
+        with self.cache.lock('_cookies', 'save'), atomic_path(self.cookies_path) as tmp_path:
+            jar.save(tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _progress_hook(self, d: Dict):
+        """累计当前线程下载的字节数"""
+        if d['status'] == 'finished':
+            self._local.downloaded_bytes = (getattr(self._local, 'downloaded_bytes', 0)
+                                            + (d.get('total_bytes') or d.get('downloaded_bytes') or 0))
+
+    def _postprocessor_hook(self, d: Dict):
+        """记录mp3转码（yt-dlp的ExtractAudio后处理）的耗时"""
+        if d.get('postprocessor') != 'ExtractAudio':
+            return
+        if d['status'] == 'started':
+            self._local.postprocess_start = (time.perf_counter(), metrics.cpu_seconds())
+        elif d['status'] == 'finished' and getattr(self._local, 'postprocess_start', None):
+            wall_start, cpu_start = self._local.postprocess_start
+            metrics.record(
+                'mp3_encode',
+                wall=time.perf_counter() - wall_start,
+                cpu=metrics.cpu_seconds() - cpu_start,
+                audio_seconds=d.get('info_dict', {}).get('duration'),
+                parent='download',
+            )
+            self._local.postprocess_start = None
+
+    def cached_audio(self, video_id: str, mp3: bool = False) -> Optional[Dict]:
         """
-        下载YouTube音频
+        查找已缓存的音频和元数据
+
+        保留原始音频时，已有的mp3也可以直接用于识别。
+
+        Returns:
+            与download_audio相同格式的字典；未缓存时返回None
+        """
+        audio_path = None
+        for ext in (('.mp3',) if mp3 else NATIVE_AUDIO_EXTS):
+            audio_path = self.cache.get(video_id, ext)
+            if audio_path:
+                break
+        metadata_path = audio_path and self.cache.get(video_id, '.metadata.json')
+        if not metadata_path:
+            return None
+
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        return {
+            "audio_path": audio_path,
+            "metadata": metadata,
+            "video_id": video_id,
+            "cached": True,
+        }
+
+    def fetch_metadata(self, url: str, ttl: Optional[float] = METADATA_TTL, skip_cache: bool = False) -> Dict:
+        """
+        只获取元数据，不下载音频
+
+        结果写入 {video_id}.metadata.json，在ttl秒内重复调用直接读取缓存。
+        除了download_audio返回的字段，还包含按当前下载档位选中的格式（format_id、扩展名audio_ext，
+        以及选择时使用的format_selector）和估计的音频字节数（estimated_bytes）。
 
         Args:
             url: YouTube视频URL
+            ttl: 缓存有效期（秒），None表示永不过期
             skip_cache: 是否跳过缓存
 
         Returns:
-            包含音频路径和元数据的字典
+            元数据字典
         """
         video_id = extract_video_id(url)
         if not video_id:
             raise ValueError(f"无法从URL中提取video ID: {url}")
 
-        audio_path = os.path.join(self.cache_dir, f"{video_id}.mp3")
-        metadata_path = os.path.join(self.cache_dir, f"{video_id}.metadata.json")
+        metadata_path = None if skip_cache else self.cache.get(video_id, '.metadata.json')
+        if metadata_path:
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+            fetched_at = metadata.get('fetched_at') or os.path.getmtime(metadata_path)
+            if ttl is None or time.time() - fetched_at < ttl:
+                return metadata
+
+        with metrics.stage('metadata'):
+            info = self._ydl().extract_info(url, download=False)
+
+        metadata = metadata_from_info(info, video_id, url)
+        selected = info.get('requested_formats') or [info]
+        metadata['estimated_bytes'] = sum(
+            f.get('filesize') or f.get('filesize_approx') or 0 for f in selected) or None
+        metadata['audio_ext'] = f".{info['ext']}" if info.get('ext') else None
+        metadata['format_id'] = info.get('format_id')
+        metadata['format_selector'] = self.format_selector()
+
+        with atomic_write(self.cache.path(video_id, '.metadata.json')) as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+        self.cache.put(video_id, '.metadata.json', stage='metadata')
+        return metadata
+
+    def download_audio(self, url: str, skip_cache: bool = False, mp3: bool = False) -> Dict:
+        """
+        下载YouTube音频
+
+        默认保留原始音频流（opus/m4a），语音识别直接从它解码，省去一次mp3编码。
+
+        Args:
+            url: YouTube视频URL
+            skip_cache: 是否跳过缓存
+            mp3: 是否转码为192kbps mp3（旧行为）
+
+        Returns:
+            包含音频路径、元数据、下载字节数和是否命中缓存的字典
+        """
+        video_id = extract_video_id(url)
+        if not video_id:
+            raise ValueError(f"无法从URL中提取video ID: {url}")
 
         # 检查缓存
-        if not skip_cache and os.path.exists(audio_path) and os.path.exists(metadata_path):
+        cached = None if skip_cache else self.cached_audio(video_id, mp3)
+        if cached:
             print(f"✓ 使用缓存: {video_id}")
-            with open(metadata_path, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-            return {
-                "audio_path": audio_path,
-                "metadata": metadata,
-                "video_id": video_id,
-            }
+            return cached
 
-        # 下载配置
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'outtmpl': os.path.join(self.cache_dir, f'{video_id}.%(ext)s'),
-            'quiet': False,
-            'no_warnings': False,
-            # 额外参数尝试绕过机器人检测
-            'nocheckcertificate': True,
-            'ignoreerrors': False,
-            'no_warnings': False,
-        }
+        # 同一视频同时只下载一次：等待的调用方拿到锁后复用先到者的下载结果
+        with self.cache.lock(video_id, 'download') as lock:
+            cached = self.cached_audio(video_id, mp3) if lock.waited or not skip_cache else None
+            if cached:
+                print(f"✓ 使用其他进程刚下载的音频: {video_id}")
+                return cached
+            return self._download(url, video_id, mp3)
 
-        # 添加cookies（如果提供）
-        if self.cookies_path:
-            ydl_opts['cookiefile'] = self.cookies_path
-            print(f"🍪 使用cookies: {self.cookies_path}")
-            # 打印一些cookie信息用于调试
-            if os.path.exists(self.cookies_path):
-                with open(self.cookies_path, 'r') as f:
-                    lines = f.readlines()
-                    # 过滤掉注释和空行
-                    cookie_lines = [line for line in lines if line.strip() and not line.strip().startswith('#')]
-                    print(f"  找到 {len(cookie_lines)} 个cookies")
+    def _download(self, url: str, video_id: str, mp3: bool = False) -> Dict:
+        """下载音频并登记到缓存（调用方持有该视频的下载锁）"""
+        ydl = self._ydl(mp3)
 
-        print(f"📥 正在下载: {url}")
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        print(f"📥 正在下载: {url} (档位: {self.profile})")
+        self._local.downloaded_bytes = 0
+        start = time.perf_counter()
+        with metrics.stage('download', profile=self.profile) as stage:
             info = ydl.extract_info(url, download=True)
+            downloaded_bytes = self._local.downloaded_bytes
+            elapsed = time.perf_counter() - start
+            stage.update(
+                audio_seconds=info.get('duration'),
+                format_id=info.get('format_id'),
+                abr=info.get('abr'),
+                bytes=downloaded_bytes,
+                throughput=round(downloaded_bytes / elapsed) if elapsed > 0 else None,
+            )
+        print(f"  格式: {info.get('format_id')} ({info.get('abr') or '?'}kbps), "
+              f"{downloaded_bytes / 1024 ** 2:.1f}MB, "
+              f"{downloaded_bytes / 1024 ** 2 / elapsed if elapsed > 0 else 0:.2f}MB/s")
+
+        # 后处理之后的最终文件，从incoming/移入分片目录
+        downloaded = info.get('requested_downloads') or [{}]
+        filepath = downloaded[-1].get('filepath') or ydl.prepare_filename(info)
+        audio_ext = os.path.splitext(filepath)[1] or '.mp3'
+        os.replace(filepath, self.cache.path(video_id, audio_ext))
 
         # 提取元数据
-        metadata = {
-            "title": info.get('title', ''),
-            "description": info.get('description', ''),
-            "uploader": info.get('uploader', ''),
-            "duration": info.get('duration', 0),
-            "upload_date": info.get('upload_date', ''),
-            "view_count": info.get('view_count', 0),
-            "video_id": video_id,
-            "url": url,
-        }
+        metadata = metadata_from_info(info, video_id, url)
 
         # 保存元数据
-        with open(metadata_path, 'w', encoding='utf-8') as f:
+        with atomic_write(self.cache.path(video_id, '.metadata.json')) as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
+        audio_path = self.cache.put(video_id, audio_ext, stage='download')
+        self.cache.put(video_id, '.metadata.json', stage='download')
 
         print(f"✓ 下载完成: {metadata['title']}")
         print(f"  时长: {metadata['duration']}秒")
@@ -118,4 +332,49 @@ class YouTubeDownloader:
             "audio_path": audio_path,
             "metadata": metadata,
             "video_id": video_id,
+            "cached": False,
+            "bytes": downloaded_bytes,
         }
+
+
+def metadata_from_info(info: Dict, video_id: str, url: str) -> Dict:
+    """从yt-dlp的info字典提取元数据"""
+    return {
+        "title": info.get('title', ''),
+        "description": info.get('description', ''),
+        "uploader": info.get('uploader', ''),
+        "duration": info.get('duration', 0),
+        "upload_date": info.get('upload_date', ''),
+        "view_count": info.get('view_count', 0),
+        "video_id": video_id,
+        "url": url,
+        "live_status": info.get('live_status'),
+        "fetched_at": time.time(),
+    }
+
+
+def browser_audio(audio_path: str, video_id: str, cache: CacheManager) -> str:
+    """
+    浏览器播放用的mp3副本
+
+    只在需要时转码，结果登记到缓存；原始音频已是mp3时直接返回。
+
+    Args:
+        audio_path: 原始音频文件路径
+        video_id: 视频ID
+        cache: 缓存管理器
+
+    Returns:
+        mp3文件路径
+    """
+    if audio_path.endswith('.mp3'):
+        return audio_path
+
+    mp3_path = cache.get(video_id, '.mp3')
+    if mp3_path:
+        return mp3_path
+
+    from .audio import encode_mp3
+
+    encode_mp3(audio_path, cache.path(video_id, '.mp3'))
+    return cache.put(video_id, '.mp3', stage='mp3_encode')
@@ -0,0 +1,147 @@
+"""
+运行指标模块
+记录每个处理环节的耗时、CPU时间、处理的音频时长和实时率，输出机器可读的运行报告
+"""
+
+import os
+import json
+import time
+import resource
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+def cpu_seconds() -> float:
+    """本进程加上已结束子进程（ffmpeg、识别工作进程等）的CPU时间"""
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+class RunReport:
+    """
+    一次运行的指标报告
+
+    注意：CPU时间按进程统计，并发执行的环节（如语音识别和说话人分离）的CPU时间会互相重叠。
+    """
+
+    def __init__(self, video_id: Optional[str] = None):
+        self.video_id = video_id
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._cpu_start = cpu_seconds()
+        self.stages = []
+        self.info = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, wall: float, cpu: Optional[float] = None,
+               audio_seconds: Optional[float] = None, **extra):
+        """记录一个环节的指标"""
+        item = {
+            'stage': name,
+            'wall_seconds': round(wall, 4),
+            'cpu_seconds': round(cpu, 4) if cpu is not None else None,
+            'audio_seconds': audio_seconds,
+            # 实时率：处理耗时 / 音频时长，越小越快
+            'rtf': round(wall / audio_seconds, 4) if audio_seconds else None,
+        }
+        item.update(extra)
+        with self._lock:
+            self.stages.append(item)
+
+    @contextmanager
+    def stage(self, name: str, audio_seconds: Optional[float] = None, **extra):
+        """
+        计时一个环节
+
+        with块内可以通过返回的字典补充audio_seconds等字段。
+        """
+        fields = dict(extra, audio_seconds=audio_seconds)
+        wall_start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        try:
+            yield fields
+        finally:
+            self.record(
+                name,
+                wall=time.perf_counter() - wall_start,
+                cpu=cpu_seconds() - cpu_start,
+                **fields,
+            )
+
+    def to_dict(self) -> Dict:
+        return {
+            'video_id': self.video_id,
+            'started_at': self.started_at,
+            'wall_seconds': round(time.perf_counter() - self._start, 4),
+            'cpu_seconds': round(cpu_seconds() - self._cpu_start, 4),
+            'info': self.info,
+            'stages': self.stages,
+        }
+
+    def save(self, path: str):
+        """写入 {video_id}.run.json"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        print(f"✓ 运行报告已保存到: {path}")
+
+    def append_log(self, path: str):
+        """追加到跨运行的汇总日志（JSONL）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.to_dict(), ensure_ascii=False) + '\n')
+
+    def summary(self) -> str:
+        lines = []
+        for item in self.stages:
+            line = f"  {item['stage']:<16} {item['wall_seconds']:>9.2f}s"
+            if item['cpu_seconds'] is not None:
+                line += f"  CPU {item['cpu_seconds']:>9.2f}s"
+            if item['rtf'] is not None:
+                line += f"  RTF {item['rtf']:.3f}"
+            if item.get('bytes'):
+                line += f"  {item['bytes'] / 1024 ** 2:.1f}MB"
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+_active: Optional[RunReport] = None
+
+
+def start_run(video_id: Optional[str] = None) -> RunReport:
+    """开始记录一次运行，之后各模块的stage()都记入该报告"""
+    global _active
+    _active = RunReport(video_id)
+    return _active
+
+
+def end_run() -> Optional[RunReport]:
+    """结束记录，返回本次运行的报告"""
+    global _active
+    report, _active = _active, None
+    return report
+
+
+def active_report() -> Optional[RunReport]:
+    return _active
+
+
+@contextmanager
+def stage(name: str, audio_seconds: Optional[float] = None, **extra):
+    """计时一个环节；没有正在记录的运行时不做任何事"""
+    if _active is None:
+        yield dict(extra, audio_seconds=audio_seconds)
+        return
+    with _active.stage(name, audio_seconds=audio_seconds, **extra) as fields:
+        yield fields
+
+
+def record(name: str, wall: float, cpu: Optional[float] = None,
+           audio_seconds: Optional[float] = None, **extra):
+    """直接记录一个环节的指标；没有正在记录的运行时忽略"""
+    if _active is not None:
+        _active.record(name, wall, cpu=cpu, audio_seconds=audio_seconds, **extra)
@@ -4,28 +4,73 @@ Timeline解析模块
 """
 
 import re
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List
+
+# 时间戳后的分隔符：各种横线、波浪线、竖线和冒号
+_SEPARATORS = r'\-‐‑‒–—―−－~～|｜:：'
+_OPEN = r'(\[【（'
+_CLOSE = r')\]】）'
+# H:MM:SS 在 M:SS 之前尝试，"1:02:03 话题" 不会被当成 1:02；分钟和秒限制为00-59
+_TIME = r'(?:(?P<{p}h>\d{{1,2}})[:：](?P<{p}hm>[0-5]\d)|(?P<{p}m>\d{{1,3}}))[:：](?P<{p}s>[0-5]\d)(?!\d)'
+
+# 从行首匹配一行中第一个后面跟着话题的时间戳：
+#   00:00 话题 / 1:02:03 - 话题 / [00:00] 话题 / (1:02:03) – 话题 / 00:00 - 05:30 话题 / • 00:00 | 话题
+_LINE = re.compile(
+    r'(?P<line>[^\n]*?'
+    r'(?<![\d:：])[' + _OPEN + r']?' + _TIME.format(p='') +
+    # 时间戳之后：右括号，或空白/分隔符（"12:30pm" 这样紧跟文字的不算时间戳）
+    r'(?:[' + _CLOSE + r']|(?=[\s' + _SEPARATORS + r']))'
+    # 时间范围 "00:00 - 05:30" 的结束时间
+    r'(?:[^\S\n]*[\-‐‑‒–—―−－~～][^\S\n]*[' + _OPEN + r']?' + _TIME.format(p='e') + r'[' + _CLOSE + r']?)?'
+    r'[^\S\n]*(?:[' + _SEPARATORS + r']+[^\S\n]*)?'
+    r'(?P<topic>[^\n]*\S))',
+    re.MULTILINE,
+)
+
+# 可能包含时间戳的位置，只在这些行上运行_LINE
+_CANDIDATE = re.compile(r'\d[:：][0-5]\d')
 
 
 class TimelineParser:
     """Timeline解析器"""
 
     def __init__(self):
-        # 时间戳正则表达式
-        self.timestamp_patterns = [
-            # 格式: 00:00 - 话题
-            r'(\d{1,2}):(\d{2})\s*[-–—]\s*(.+?)(?=\n|$)',
-            # 格式: 00:00 话题
-            r'(\d{1,2}):(\d{2})\s+(.+?)(?=\n|$)',
-            # 格式: 00:00:00 - 话题
-            r'(\d{1,2}):(\d{2}):(\d{2})\s*[-–—]\s*(.+?)(?=\n|$)',
-            # 格式: 00:00:00 话题
-            r'(\d{1,2}):(\d{2}):(\d{2})\s+(.+?)(?=\n|$)',
-            # 格式: (00:00) 话题
-            r'\((\d{1,2}):(\d{2})\)\s*(.+?)(?=\n|$)',
-            # 格式: [00:00] 话题
-            r'\[(\d{1,2}):(\d{2})\]\s*(.+?)(?=\n|$)',
-        ]
+        # 预编译的单遍扫描：跳到下一个可能含时间戳的行，每行只匹配一次，识别全部时间戳格式
+        self.pattern = _LINE
+        self.candidate = _CANDIDATE
+
+    def scan(self, description: str) -> List[Dict]:
+        """
+        扫描描述中的时间戳行（按出现顺序，不排序、不计算结束时间）
+
+        Args:
+            description: 视频描述文本
+
+        Returns:
+            列表，每个元素包含start, topic, raw_line
+        """
+        entries = []
+        search, match_line = self.candidate.search, self.pattern.match
+        position = 0
+        while True:
+            candidate = search(description, position)
+            if candidate is None:
+                break
+            line_start = description.rfind('\n', 0, candidate.start()) + 1
+            line_end = description.find('\n', candidate.end())
+            position = len(description) if line_end < 0 else line_end + 1
+
+            match = match_line(description, line_start)
+            if match is None:
+                continue
+            line, hours, minutes, short_minutes, seconds, topic = match.group(
+                'line', 'h', 'hm', 'm', 's', 'topic')
+            if hours is not None:
+                start = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+            else:
+                start = int(short_minutes) * 60 + int(seconds)
+            entries.append({'start': start, 'topic': topic.strip(), 'raw_line': line.strip()})
+        return entries
 
     def parse(self, description: str) -> List[Dict]:
         """
@@ -37,46 +82,10 @@ class TimelineParser:
         Returns:
             timeline列表，每个元素包含start, end, topic
         """
-        if not description:
+        if not description or (':' not in description and '：' not in description):
             return []
 
-        timeline = []
-
-        # 按行分割
-        lines = description.split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # 尝试匹配各种时间戳格式
-            for pattern in self.timestamp_patterns:
-                match = re.search(pattern, line)
-                if match:
-                    groups = match.groups()
-
-                    # 解析时间戳
-                    if len(groups) == 3:  # HH:MM:SS 或 MM:SS
-                        hours = 0
-                        minutes = int(groups[0])
-                        seconds = int(groups[1])
-                        topic = groups[2]
-                    else:  # HH:MM:SS
-                        hours = int(groups[0])
-                        minutes = int(groups[1])
-                        seconds = int(groups[2])
-                        topic = groups[3]
-
-                    start_seconds = hours * 3600 + minutes * 60 + seconds
-
-                    timeline.append({
-                        'start': start_seconds,
-                        'topic': topic.strip(),
-                        'raw_line': line,
-                    })
-
-                    break  # 只使用第一个匹配的模式
+        timeline = self.scan(description)
 
         # 按时间排序
         timeline.sort(key=lambda x: x['start'])
@@ -91,6 +100,19 @@ class TimelineParser:
 
         return timeline
 
+    def parse_many(self, descriptions: Iterable[str]) -> List[List[Dict]]:
+        """
+        批量解析多个描述（例如整个频道的视频目录）
+
+        Args:
+            descriptions: 视频描述文本（可以为None）
+
+        Returns:
+            与输入顺序一致的timeline列表
+        """
+        parse = self.parse
+        return [parse(description) for description in descriptions]
+
     def format_timestamp(self, seconds: int) -> str:
         """
         将秒数格式化为时间戳字符串
@@ -3,105 +3,96 @@
 根据timeline或语义分析将对话分块
 """
 
-from typing import List, Dict, Optional
+from bisect import bisect_left
+from typing import List, Dict, Optional, Tuple
+from . import metrics
 from .parser import TimelineParser
 
 
 class Segmenter:
     """对话分块器"""
 
+    # 分块逻辑的版本：输出变化时加一，让缓存的分块结果失效
+    VERSION = 5
+
     def __init__(self):
         self.timeline_parser = TimelineParser()
+        self.semantic = None
 
-    def segment_by_timeline(self, description: str, transcription: List[Dict], duration: int) -> List[Dict]:
+    def segment_by_timeline(self, description: str, transcription: List[Dict], duration: int,
+                            timeline: Optional[List[Dict]] = None) -> List[Dict]:
         """
         根据timeline分块
 
+        文字稿按起始时间排序，每个话题对应一段连续的下标范围：先取出所有起始时间，
+        再在每个话题的开始时间处二分查找分界，整体为 O(N + T log N)。
+        跨越分界的对话按重叠多数归属（中点所在的话题，恰好各占一半时归后一个话题），
+        不会被丢弃；第一个话题之前和最后一个话题之后的对话分别归入首尾话题。
+
         Args:
             description: 视频描述
-            transcription: 语音识别结果
+            transcription: 语音识别结果（按起始时间排序）
             duration: 音频总时长（秒）
+            timeline: 已解析的timeline（可选，避免重复解析description）
 
         Returns:
-            分块列表，每个元素包含start, end, topic, dialogue
+            分块列表，每个元素包含start, end, topic, first, last
+            （对话为 transcription[first:last]，见segment_dialogue）
         """
         # 解析timeline
-        timeline = self.timeline_parser.parse(description)
+        if timeline is None:
+            timeline = self.timeline_parser.parse(description)
 
         if not timeline:
             return self.segment_by_semantic(transcription)
 
         # 更新最后一个话题的结束时间
-        if timeline and timeline[-1]['end'] is None:
+        if timeline[-1]['end'] is None:
             timeline[-1]['end'] = duration
 
-        # 根据timeline分配对话片段
-        segments = []
+        starts = [seg['start'] for seg in transcription]
 
-        for topic in timeline:
-            # 找到在这个时间范围内的所有对话
-            dialogue = [
-                seg for seg in transcription
-                if seg['start'] >= topic['start'] and seg['end'] <= topic['end']
-            ]
+        def midpoint(i):
+            return (transcription[i]['start'] + transcription[i]['end']) / 2
 
-            segments.append({
+        # 每个话题的起始下标：起始时间不早于分界的第一条对话，
+        # 再向前收回中点已经越过分界的对话（跨界对话的大部分落在后一个话题）
+        firsts = [0]
+        for topic in timeline[1:]:
+            boundary = topic['start']
+            first = bisect_left(starts, boundary, lo=firsts[-1])
+            while first > firsts[-1] and midpoint(first - 1) >= boundary:
+                first -= 1
+            firsts.append(first)
+        lasts = firsts[1:] + [len(transcription)]
+
+        return [
+            {
                 'start': topic['start'],
                 'end': topic['end'],
                 'topic': topic['topic'],
-                'dialogue': dialogue,
-            })
-
-        return segments
+                'first': first,
+                'last': last,
+            }
+            for topic, first, last in zip(timeline, firsts, lasts)
+        ]
 
-    def segment_by_semantic(self, transcription: List[Dict], segment_duration: int = 600) -> List[Dict]:
+    def segment_by_semantic(self, transcription: List[Dict]) -> List[Dict]:
         """
-        根据语义分块（简单版本：按固定时间间隔分块）
+        根据语义分块（TextTiling：相邻窗口的相似度出现深谷处切分，标题取话题内的关键词）
 
         Args:
             transcription: 语音识别结果
-            segment_duration: 每块的时长（秒），默认10分钟
 
         Returns:
-            分块列表
+            分块列表，每个元素包含start, end, topic, first, last
         """
-        if not transcription:
-            return []
-
-        segments = []
-        total_duration = transcription[-1]['end']
-
-        current_segment = []
-        segment_start = 0
-        segment_num = 1
-
-        for seg in transcription:
-            # 如果当前段超过设定时长，保存并开始新段
-            if seg['end'] - segment_start >= segment_duration:
-                if current_segment:
-                    segments.append({
-                        'start': segment_start,
-                        'end': seg['start'],
-                        'topic': f'话题 {segment_num}',
-                        'dialogue': current_segment,
-                    })
-                    segment_num += 1
-
-                segment_start = seg['start']
-                current_segment = [seg]
-            else:
-                current_segment.append(seg)
+        if self.semantic is None:
+            # 依赖numpy（以及可选的sentence-transformers），用到时才导入
+            from .semantic import SemanticSegmenter
 
-        # 添加最后一段
-        if current_segment:
-            segments.append({
-                'start': segment_start,
-                'end': transcription[-1]['end'],
-                'topic': f'话题 {segment_num}',
-                'dialogue': current_segment,
-            })
-
-        return segments
+            self.semantic = SemanticSegmenter()
+        return self.semantic.segment(transcription)
 
     def segment(self, description: Optional[str], transcription: List[Dict], duration: int) -> List[Dict]:
         """
@@ -115,12 +106,189 @@ class Segmenter:
         Returns:
             分块列表
         """
-        # 尝试用timeline分块
-        timeline = self.timeline_parser.parse(description)
+        with metrics.stage('segment', audio_seconds=duration or None, lines=len(transcription)):
+            # 尝试用timeline分块
+            timeline = self.timeline_parser.parse(description)
 
+            if timeline and len(timeline) >= 2:
+                print(f"✓ 使用作者timeline分块，共{len(timeline)}个话题")
+                return self.segment_by_timeline(description, transcription, duration, timeline=timeline)
+            else:
+                print(f"✓ 未找到timeline，使用语义分块")
+                return self.segment_by_semantic(transcription)
+
+    def incremental(self, description: Optional[str], duration: int):
+        """
+        增量分块器：文字稿分批输入，话题的分界确定后立即输出（与segment的选择方式相同）
+
+        Args:
+            description: 视频描述
+            duration: 音频总时长（秒）
+
+        Returns:
+            IncrementalTimelineSegmenter或IncrementalSemanticSegmenter，
+            用feed(lines)输入、finish()结束，两者都返回新确定的话题
+        """
+        timeline = self.timeline_parser.parse(description)
         if timeline and len(timeline) >= 2:
-            print(f"✓ 使用作者timeline分块，共{len(timeline)}个话题")
-            return self.segment_by_timeline(description, transcription, duration)
+            return IncrementalTimelineSegmenter(timeline, duration)
+
+        from .semantic import IncrementalSemanticSegmenter, SemanticSegmenter
+
+        if self.semantic is None:
+            self.semantic = SemanticSegmenter()
+        return IncrementalSemanticSegmenter(self.semantic)
+
+
+class IncrementalTimelineSegmenter:
+    """
+    增量timeline分块
+
+    话题k的起始下标在第一条起始时间不早于其开始时间的对话到达时确定（与segment_by_timeline的二分查找相同），
+    再向前收回中点已经越过分界的对话。向前收回只需要"中点最小的后缀"：
+    保留中点严格递增的对话栈，中点早于最新对话起始时间的只保留最后一条，栈的大小只与同时重叠的对话数有关。
+    """
+
+    def __init__(self, timeline: List[Dict], duration: int):
+        """
+        Args:
+            timeline: 解析后的timeline（至少一个话题）
+            duration: 音频总时长（秒），作为最后一个话题的结束时间
+        """
+        self.timeline = [dict(topic) for topic in timeline]
+        if self.timeline[-1]['end'] is None:
+            self.timeline[-1]['end'] = duration
+        self.n_lines = 0
+        self.finished = False
+        # 下一个待确定起始下标的话题，及上一个话题的起始下标
+        self.next_topic = 1
+        self.first = 0
+        # (下标, 中点)，中点严格递增
+        self._midpoints = []
+
+    def feed(self, lines: List[Dict]) -> List[Dict]:
+        """
+        输入一批文字稿行（按起始时间排序，接在之前输入的行之后）
+
+        Returns:
+            本批之后确定下来的话题，格式与segment_by_timeline相同
+        """
+        if self.finished:
+            raise ValueError("增量分块已经结束")
+        segments = []
+        for line in lines:
+            segments.extend(self._resolve(line['start']))
+            midpoint = (line['start'] + line['end']) / 2
+            stack = self._midpoints
+            while stack and stack[-1][1] >= midpoint:
+                stack.pop()
+            stack.append((self.n_lines, midpoint))
+            # 之后的分界都晚于这条对话的起始时间，中点早于它的对话只有最后一条可能用到
+            while len(stack) >= 2 and stack[1][1] < line['start']:
+                del stack[0]
+            self.n_lines += 1
+        return segments
+
+    def finish(self) -> List[Dict]:
+        """输入结束，输出剩余的话题"""
+        if self.finished:
+            return []
+        self.finished = True
+        segments = self._resolve(float('inf'))
+        segments.append(self._emit(len(self.timeline) - 1, self.n_lines))
+        return segments
+
+    def _resolve(self, start: float) -> List[Dict]:
+        """起始时间为start的对话（下标n_lines）到达前，确定开始时间不晚于start的话题分界"""
+        segments = []
+        while self.next_topic < len(self.timeline) and self.timeline[self.next_topic]['start'] <= start:
+            boundary = self.timeline[self.next_topic]['start']
+            # 最后一条中点早于分界的对话之后即为新话题的起始下标
+            first = self.first
+            for index, midpoint in reversed(self._midpoints):
+                if midpoint < boundary:
+                    first = max(first, index + 1)
+                    break
+            segments.append(self._emit(self.next_topic - 1, first))
+            self.first = first
+            self.next_topic += 1
+        return segments
+
+    def _emit(self, k: int, last: int) -> Dict:
+        topic = self.timeline[k]
+        return {'start': topic['start'], 'end': topic['end'], 'topic': topic['topic'],
+                'first': self.first, 'last': last}
+
+
+def segment_dialogue(segment: Dict, transcription) -> List[Dict]:
+    """
+    分块的对话
+
+    Args:
+        segment: 分块（包含first, last）
+        transcription: 文字稿列表，或按切片解码的列式文字稿（transcript.Transcript）
+
+    Returns:
+        transcription[first:last]
+    """
+    return transcription[segment['first']:segment['last']]
+
+
+def filter_segments(segments: List[Dict], transcription, query: str) -> List[Dict]:
+    """
+    搜索话题和对话内容
+
+    Args:
+        segments: 分块列表
+        transcription: 分块所引用的文字稿（列表或列式文字稿）
+        query: 搜索关键词（不区分大小写）
+
+    Returns:
+        话题或任一对话包含关键词的分块
+    """
+    query = query.lower()
+    return [
+        seg for seg in segments
+        if query in seg['topic'].lower()
+        or any(query in d['text'].lower() for d in segment_dialogue(seg, transcription))
+    ]
+
+
+def ranges_from_dialogue(segments: List[Dict],
+                         transcription: List[Dict] = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    把旧版分块（每块复制一份dialogue）转换为下标范围
+
+    Args:
+        segments: 旧版分块列表，每个元素包含start, end, topic, dialogue
+        transcription: 完整文字稿；不提供时（旧版_streamlit.json）由各块的对话拼接而成
+
+    Returns:
+        (文字稿, 每个元素包含start, end, topic, first, last的分块列表)
+    """
+    if transcription is None:
+        transcription = [line for seg in segments for line in seg['dialogue']]
+
+    index = {}
+    for i, line in enumerate(transcription):
+        index.setdefault((line['start'], line['end'], line.get('text')), i)
+
+    result = []
+    position = 0
+    for seg in segments:
+        dialogue = seg['dialogue']
+        if dialogue:
+            first = index.get((dialogue[0]['start'], dialogue[0]['end'], dialogue[0].get('text')))
+            if first is None:
+                raise ValueError(f"对话不在文字稿中: {dialogue[0]['start']}s")
+            position = first + len(dialogue)
         else:
-            print(f"✓ 未找到timeline，使用语义分块")
-            return self.segment_by_semantic(transcription)
+            first = position
+        result.append({
+            'start': seg['start'],
+            'end': seg['end'],
+            'topic': seg['topic'],
+            'first': first,
+            'last': first + len(dialogue),
+        })
+    return transcription, result
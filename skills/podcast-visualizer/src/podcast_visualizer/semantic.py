@@ -0,0 +1,551 @@
+"""
+语义分块模块
+把文字稿按时间切成小块并编码为向量（安装了sentence-transformers时使用句向量，否则使用哈希词频），
+比较每个间隙左右两侧窗口的余弦相似度，在相似度的深谷处切分话题（TextTiling），并用关键词生成标题
+
+所有判断只依赖附近的若干小块（相似度窗口、深谷的峰值窗口、相邻分界的抑制范围），
+不使用全局统计量，分块结果与文字稿的总长度无关。
+"""
+
+import os
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# 句向量模型，设置为none时始终使用词频
+EMBEDDING_MODEL = os.environ.get('PODCAST_VISUALIZER_EMBEDDING_MODEL', 'paraphrase-multilingual-MiniLM-L12-v2')
+
+# 深谷分数超过该值才切分；两种向量的相似度分布不同，阈值分别设置
+THRESHOLDS = {
+    'tf': 0.25,
+    'embedding': 0.15,
+}
+
+STOPWORDS = frozenset("""
+the a an and or but if so of to in on at by for with from as is are was were be been being it its this
+that these those there here what which who whom whose when where why how all any both each few more most
+other some such no nor not only own same than too very can will just should now i me my we our you your
+he him his she her they them their do does did doing have has had having would could about into over
+then also like yeah okay oh um uh really know think going get got one two lot thing things kind sort
+我们 你们 他们 她们 它们 这个 那个 这些 那些 就是 然后 一个 什么 没有 可以 因为 所以 但是 其实 觉得
+如果 现在 还是 自己 知道 这样 那么 时候 已经 怎么 一些 非常 今天 的话 还有 比如 或者 而且 大家 我们的
+对吧 是的 不是 这种 那种 一下 一点 有点 也是 就是说 这里 那里 东西 事情 问题 可能 应该 需要 里面
+""".split())
+
+_TOKEN = re.compile(r"[a-z][a-z0-9'+#.-]*[a-z0-9+#]|[\u3400-\u9fff]+")
+
+
+def embedding_model() -> Optional[str]:
+    """使用的句向量模型名称；未安装sentence-transformers或已禁用时返回None"""
+    if EMBEDDING_MODEL.lower() == 'none' or find_spec('sentence_transformers') is None:
+        return None
+    return EMBEDDING_MODEL
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    切分关键词：英文按单词，中文按连续汉字的二元组（两个字的词整体保留），去掉停用词
+
+    Args:
+        text: 文本
+
+    Returns:
+        词列表
+    """
+    tokens = []
+    for match in _TOKEN.findall(text.lower()):
+        if match[0] < '\u3400':
+            if len(match) > 2 and match not in STOPWORDS:
+                tokens.append(match)
+        elif len(match) <= 2:
+            if len(match) == 2 and match not in STOPWORDS:
+                tokens.append(match)
+        else:
+            tokens.extend(b for b in (match[i:i + 2] for i in range(len(match) - 1)) if b not in STOPWORDS)
+    return tokens
+
+
+@lru_cache(maxsize=1 << 16)
+def _column(token: str, dim: int) -> int:
+    # crc32而不是hash()：字符串的hash()每个进程不同，结果需要可缓存
+    return zlib.crc32(token.encode('utf-8')) % dim
+
+
+class BlockEncoder:
+    """把文字块编码为单位向量"""
+
+    def __init__(self, model_name: Optional[str] = None, dim: int = 2048, batch_size: int = 64):
+        """
+        Args:
+            model_name: 句向量模型名称（None时使用哈希词频）
+            dim: 哈希词频的维数
+            batch_size: 句向量模型每批编码的块数
+        """
+        self.model_name = model_name
+        self.dim = dim
+        self.batch_size = batch_size
+        self._model = None
+
+    @property
+    def backend(self) -> str:
+        return 'embedding' if self.model_name else 'tf'
+
+    @property
+    def name(self) -> str:
+        return self.model_name or f'tf-{self.dim}'
+
+    def encode(self, texts: Sequence[str], tokens: Sequence[List[str]]) -> np.ndarray:
+        """
+        Args:
+            texts: 每块的文本
+            tokens: 每块的关键词（tokenize的结果）
+
+        Returns:
+            (块数, 维数) 的float32数组，每行为单位向量（没有内容的块为零向量）
+        """
+        if self.model_name:
+            return self._encode_embeddings(texts)
+        return self._encode_tf(tokens)
+
+    def _encode_embeddings(self, texts: Sequence[str]) -> np.ndarray:
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            print(f"🧠 加载句向量模型: {self.model_name}")
+            self._model = SentenceTransformer(self.model_name, device='cpu')
+        vectors = self._model.encode(list(texts), batch_size=self.batch_size, normalize_embeddings=True,
+                                     convert_to_numpy=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _encode_tf(self, tokens: Sequence[List[str]]) -> np.ndarray:
+        counts = np.zeros((len(tokens), self.dim), dtype=np.float32)
+        rows = np.repeat(np.arange(len(tokens)), [len(t) for t in tokens])
+        columns = np.fromiter((_column(token, self.dim) for block in tokens for token in block),
+                              dtype=np.int64, count=len(rows))
+        np.add.at(counts, (rows, columns), 1.0)
+        # 对数词频：高频词不至于压倒其余的词
+        np.log1p(counts, out=counts)
+        norms = np.linalg.norm(counts, axis=1, keepdims=True)
+        np.divide(counts, norms, out=counts, where=norms > 0)
+        return counts
+
+
+def gap_similarity(vectors: np.ndarray, window: int) -> np.ndarray:
+    """
+    每个间隙左右两侧窗口的余弦相似度
+
+    间隙g（1 <= g < n）位于第g-1块和第g块之间，左侧窗口为 [g-window, g)，右侧为 [g, g+window)，
+    超出范围的部分按零向量处理。窗口和逐块相加，每个间隙的结果只取决于它两侧的块。
+
+    Args:
+        vectors: (n, 维数) 的块向量
+        window: 每侧的块数
+
+    Returns:
+        长度为n-1的数组，第i个元素为间隙i+1的相似度
+    """
+    n = len(vectors)
+    gaps = n - 1
+    if gaps <= 0:
+        return np.zeros(0, dtype=np.float32)
+    padded = np.zeros((n + 2 * window, vectors.shape[1]), dtype=np.float32)
+    padded[window:window + n] = vectors
+
+    left = np.zeros((gaps, vectors.shape[1]), dtype=np.float32)
+    right = np.zeros_like(left)
+    for j in range(window):
+        left += padded[1 + j:1 + j + gaps]
+        right += padded[1 + window + j:1 + window + j + gaps]
+
+    dot = np.einsum('ij,ij->i', left, right)
+    norms = np.sqrt(np.einsum('ij,ij->i', left, left)) * np.sqrt(np.einsum('ij,ij->i', right, right))
+    return np.divide(dot, norms, out=np.zeros_like(dot), where=norms > 0)
+
+
+def depth_scores(similarity: np.ndarray, peak_window: int) -> np.ndarray:
+    """
+    TextTiling深谷分数：左右peak_window个间隙内的最高相似度与本间隙相似度之差的和
+
+    Args:
+        similarity: gap_similarity的结果
+        peak_window: 每侧寻找峰值的间隙数
+
+    Returns:
+        与similarity等长的深谷分数
+    """
+    if len(similarity) == 0:
+        return similarity
+    padded = np.full(len(similarity) + 2 * peak_window, -np.inf, dtype=similarity.dtype)
+    padded[peak_window:peak_window + len(similarity)] = similarity
+    windows = sliding_window_view(padded, 2 * peak_window + 1)
+    left_peak = windows[:, :peak_window + 1].max(axis=1)
+    right_peak = windows[:, peak_window:].max(axis=1)
+    return (left_peak - similarity) + (right_peak - similarity)
+
+
+def pick_boundaries(depth: np.ndarray, threshold: float, min_blocks: int, first_gap: int = 1) -> List[int]:
+    """
+    选择分界间隙
+
+    深谷分数不低于threshold，且是前后min_blocks-1个间隙内的最大值（相等时取靠前的），
+    并且离开头和结尾都至少min_blocks块，因此每个话题至少min_blocks块。
+
+    Args:
+        depth: depth_scores的结果（或其中连续的一段）
+        threshold: 深谷分数阈值
+        min_blocks: 每个话题的最少块数
+        first_gap: depth[0]对应的间隙；depth最后一个元素视为最后一个间隙
+
+    Returns:
+        分界间隙列表（间隙g表示第g块开始新话题）
+    """
+    if len(depth) == 0:
+        return []
+    n_blocks = first_gap + len(depth)
+    radius = max(0, min_blocks - 1)
+    padded = np.full(len(depth) + 2 * radius, -np.inf, dtype=depth.dtype)
+    padded[radius:radius + len(depth)] = depth
+    windows = sliding_window_view(padded, 2 * radius + 1)
+    before = windows[:, :radius].max(axis=1, initial=-np.inf)
+    after = windows[:, radius + 1:].max(axis=1, initial=-np.inf)
+
+    gaps = np.arange(first_gap, n_blocks)
+    selected = ((depth >= threshold) & (depth > before) & (depth >= after)
+                & (gaps >= min_blocks) & (n_blocks - gaps >= min_blocks))
+    return gaps[selected].tolist()
+
+
+def block_firsts(transcription: Sequence[Dict], block_seconds: float) -> List[int]:
+    """
+    按起始时间把文字稿切成小块，返回每块第一行的下标
+
+    同一个block_seconds时间格内连续的行为一块，没有对话的时间格不产生空块。
+    """
+    firsts = []
+    previous = None
+    for i, line in enumerate(transcription):
+        cell = int(line['start'] // block_seconds)
+        if cell != previous:
+            firsts.append(i)
+            previous = cell
+    return firsts
+
+
+def keyword_title(counts: Counter, n_words: int = 3) -> Optional[str]:
+    """
+    用话题内出现最多的词作为标题（至少出现两次；次数相同时按字典序，结果与统计顺序无关）
+
+    首尾相接的中文二元组合并为一个词（"本地" + "地化" -> "本地化"）。
+
+    Returns:
+        标题，没有合适的词时返回None
+    """
+    words = sorted((item for item in counts.items() if item[1] >= 2), key=lambda item: (-item[1], item[0]))
+    picked = []
+    for word, _ in words:
+        if len(picked) == n_words:
+            break
+        for i, other in enumerate(picked):
+            if word[0] >= '\u3400' and other[-1] == word[0]:
+                picked[i] = other + word[1:]
+                break
+            if word[0] >= '\u3400' and word[-1] == other[0]:
+                picked[i] = word + other[1:]
+                break
+        else:
+            picked.append(word)
+    return ' · '.join(picked) if picked else None
+
+
+def make_segment(number: int, counts: Counter, first: int, last: int, start: float, end: float) -> Dict:
+    """一个语义分块（没有关键词时标题为"话题 N"）"""
+    return {
+        'start': start,
+        'end': end,
+        'topic': keyword_title(counts) or f'话题 {number}',
+        'first': first,
+        'last': last,
+    }
+
+
+class SemanticSegmenter:
+    """TextTiling语义分块器"""
+
+    def __init__(self, model_name: Optional[str] = None, block_seconds: float = 30.0, window: int = 4,
+                 peak_window: int = 4, min_topic_seconds: float = 180.0, threshold: Optional[float] = None,
+                 chunk_blocks: int = 1024):
+        """
+        Args:
+            model_name: 句向量模型（None时自动选择：已安装sentence-transformers时用EMBEDDING_MODEL，否则用词频）
+            block_seconds: 小块时长（秒）
+            window: 计算相似度时每侧的块数
+            peak_window: 计算深谷分数时每侧寻找峰值的间隙数
+            min_topic_seconds: 话题的最短时长（秒）
+            threshold: 深谷分数阈值（默认按向量类型取THRESHOLDS）
+            chunk_blocks: 每次编码和计算相似度的块数，限制长文字稿的内存占用
+        """
+        self.encoder = BlockEncoder(model_name if model_name is not None else embedding_model())
+        self.block_seconds = block_seconds
+        self.window = window
+        self.peak_window = peak_window
+        self.min_blocks = max(1, int(round(min_topic_seconds / block_seconds)))
+        self.threshold = threshold if threshold is not None else THRESHOLDS[self.encoder.backend]
+        self.chunk_blocks = chunk_blocks
+
+    def block_texts(self, transcription: Sequence[Dict], firsts: List[int]) -> List[str]:
+        lasts = firsts[1:] + [len(transcription)]
+        return [' '.join(line['text'] for line in transcription[first:last]) for first, last in zip(firsts, lasts)]
+
+    def similarity(self, texts: List[str], tokens: List[List[str]]) -> np.ndarray:
+        """分批编码并计算全部间隙的相似度，每批多编码两侧各window块作为上下文"""
+        n = len(texts)
+        result = np.zeros(max(0, n - 1), dtype=np.float32)
+        for start in range(1, n, self.chunk_blocks):
+            stop = min(n, start + self.chunk_blocks)
+            lo, hi = max(0, start - self.window), min(n, stop + self.window - 1)
+            vectors = self.encoder.encode(texts[lo:hi], tokens[lo:hi])
+            result[start - 1:stop - 1] = gap_similarity(vectors, self.window)[start - lo - 1:stop - lo - 1]
+        return result
+
+    def build_segments(self, transcription: Sequence[Dict], firsts: List[int], tokens: List[List[str]],
+                       boundaries: List[int], number: int = 1) -> List[Dict]:
+        """
+        把分界间隙转换为分块
+
+        Args:
+            transcription: 文字稿
+            firsts: 每块第一行的下标
+            tokens: 每块的关键词
+            boundaries: 分界间隙
+            number: 第一个话题的编号（没有关键词时标题为"话题 N"）
+
+        Returns:
+            分块列表，每个元素包含start, end, topic, first, last
+        """
+        edges = [0] + boundaries + [len(firsts)]
+        segments = []
+        for i, (a, b) in enumerate(zip(edges, edges[1:])):
+            counts = Counter()
+            for block in tokens[a:b]:
+                counts.update(block)
+            first = firsts[a]
+            last = firsts[b] if b < len(firsts) else len(transcription)
+            segments.append(make_segment(
+                number + i, counts, first, last,
+                start=transcription[first]['start'] if a else 0,
+                end=transcription[last]['start'] if b < len(firsts) else transcription[-1]['end']))
+        return segments
+
+    def segment(self, transcription: Sequence[Dict]) -> List[Dict]:
+        """
+        语义分块
+
+        Args:
+            transcription: 语音识别结果（按起始时间排序）
+
+        Returns:
+            分块列表，每个元素包含start, end, topic, first, last
+        """
+        if not transcription:
+            return []
+        firsts = block_firsts(transcription, self.block_seconds)
+        texts = self.block_texts(transcription, firsts)
+        tokens = [tokenize(text) for text in texts]
+        depth = depth_scores(self.similarity(texts, tokens), self.peak_window)
+        boundaries = pick_boundaries(depth, self.threshold, self.min_blocks)
+        return self.build_segments(transcription, firsts, tokens, boundaries)
+
+
+class IncrementalSemanticSegmenter:
+    """
+    增量语义分块：文字稿分批到达，分界确定后立即输出完成的话题
+
+    间隙g的相似度需要其后window块，深谷分数还需要其后peak_window个间隙，是否分界还需要其后
+    min_blocks-1个间隙的深谷分数，所以一个间隙在之后约 window + peak_window + min_blocks 块
+    （默认约7分钟）到达后就能确定。内存中只保留尚未确定的间隙附近的块、相似度和深谷分数，
+    以及当前话题的关键词计数，与文字稿总长度无关。
+
+    每个数值的计算方式与SemanticSegmenter.segment相同，全部输入结束后的结果与一次性分块完全一致。
+    """
+
+    def __init__(self, semantic: Optional[SemanticSegmenter] = None):
+        """
+        Args:
+            semantic: 分块参数（默认新建SemanticSegmenter）
+        """
+        self.semantic = semantic or SemanticSegmenter()
+        self.finished = False
+
+        # 已到达的行数和最后一行的结束时间
+        self.n_lines = 0
+        self.last_end = 0
+        # 正在累积的块：(时间格, 第一行下标, 文本)
+        self._cell = None
+        self._open_first = 0
+        self._open_texts = []
+
+        # 已完成的块，blocks[i]对应全局第 block_base + i 块：(第一行下标, 第一行起始时间, 文本, 关键词)
+        self.n_blocks = 0
+        self.block_base = 0
+        self.blocks = []
+        self.vectors = []
+        # sims[i] / depths[i] 对应间隙 sim_base + i / depth_base + i
+        self.sim_base = 1
+        self.sims = []
+        self.depth_base = 1
+        self.depths = []
+        # 下一个待确定的间隙；当前话题的第一块、第一行下标、起始时间和关键词计数
+        self.next_gap = 1
+        self.topic_block = 0
+        self.topic_first = 0
+        self.topic_start = 0
+        self.topic_counts = Counter()
+        self.n_topics = 0
+
+    def feed(self, lines: Sequence[Dict]) -> List[Dict]:
+        """
+        输入一批文字稿行（按起始时间排序，接在之前输入的行之后）
+
+        Args:
+            lines: 文字稿行，每个元素至少包含start, end, text
+
+        Returns:
+            本批之后确定下来的话题（可能为空），格式与SemanticSegmenter.segment相同
+        """
+        if self.finished:
+            raise ValueError("增量分块已经结束")
+        for line in lines:
+            cell = int(line['start'] // self.semantic.block_seconds)
+            if cell != self._cell:
+                self._close_block()
+                self._cell = cell
+                self._open_first = self.n_lines
+                self._open_start = line['start']
+            self._open_texts.append(line['text'])
+            self.n_lines += 1
+            self.last_end = line['end']
+        return self._advance()
+
+    def finish(self) -> List[Dict]:
+        """
+        输入结束，确定剩余的话题
+
+        Returns:
+            剩余的话题
+        """
+        if self.finished:
+            return []
+        self._close_block()
+        self.finished = True
+        if self.n_blocks == 0:
+            return []
+        return self._advance()
+
+    def _close_block(self):
+        if self._open_texts:
+            text = ' '.join(self._open_texts)
+            self.blocks.append((self._open_first, self._open_start, text, tokenize(text)))
+            self.n_blocks += 1
+            self._open_texts = []
+
+    def _block(self, index: int):
+        return self.blocks[index - self.block_base]
+
+    def _take_block(self, index: int):
+        """把一块的关键词计入当前话题"""
+        self.topic_counts.update(self._block(index)[3])
+
+    def _emit(self, block: int) -> Dict:
+        """输出从topic_block到block（不含）的话题，并从block开始新话题"""
+        if block < self.n_blocks:
+            last, end = self._block(block)[:2]
+        else:
+            last, end = self.n_lines, self.last_end
+        self.n_topics += 1
+        segment = make_segment(self.n_topics, self.topic_counts, self.topic_first, last,
+                               start=self.topic_start if self.topic_block else 0, end=end)
+        self.topic_block, self.topic_first, self.topic_start = block, last, end
+        self.topic_counts = Counter()
+        return segment
+
+    def _advance(self) -> List[Dict]:
+        semantic = self.semantic
+        n = self.n_blocks
+        last_gap = n - 1
+
+        # 1. 编码新完成的块
+        missing = len(self.blocks) - len(self.vectors)
+        if missing:
+            new = self.blocks[-missing:]
+            self.vectors.extend(semantic.encoder.encode([b[2] for b in new], [b[3] for b in new]))
+
+        # 2. 相似度：间隙g需要 [g - window, g + window) 的块
+        sim_stop = last_gap if self.finished else n - semantic.window
+        sim_start = self.sim_base + len(self.sims)
+        if sim_stop >= sim_start:
+            lo, hi = max(0, sim_start - semantic.window), min(n, sim_stop + semantic.window)
+            vectors = np.stack(self.vectors[lo - self.block_base:hi - self.block_base])
+            similarity = gap_similarity(vectors, semantic.window)
+            self.sims.extend(similarity[sim_start - lo - 1:sim_stop - lo])
+
+        # 3. 深谷分数：间隙g需要 [g - peak_window, g + peak_window] 的相似度
+        computed_sims = self.sim_base + len(self.sims) - 1
+        depth_stop = last_gap if self.finished else computed_sims - semantic.peak_window
+        depth_start = self.depth_base + len(self.depths)
+        if depth_stop >= depth_start:
+            lo = max(1, depth_start - semantic.peak_window)
+            hi = min(computed_sims, depth_stop + semantic.peak_window)
+            sims = np.asarray(self.sims[lo - self.sim_base:hi - self.sim_base + 1], dtype=np.float32)
+            depth = depth_scores(sims, semantic.peak_window)
+            self.depths.extend(depth[depth_start - lo:depth_stop - lo + 1])
+
+        # 4. 分界：间隙g需要 [g - (min_blocks - 1), g + (min_blocks - 1)] 的深谷分数
+        radius = semantic.min_blocks - 1
+        computed_depths = self.depth_base + len(self.depths) - 1
+        decide_stop = last_gap if self.finished else computed_depths - radius
+        segments = []
+        if decide_stop >= self.next_gap:
+            lo = max(1, self.next_gap - radius)
+            hi = min(computed_depths, decide_stop + radius)
+            depth = np.asarray(self.depths[lo - self.depth_base:hi - self.depth_base + 1], dtype=np.float32)
+            boundaries = set(pick_boundaries(depth, semantic.threshold, semantic.min_blocks, first_gap=lo))
+            for gap in range(self.next_gap, decide_stop + 1):
+                self._take_block(gap - 1)
+                if gap in boundaries:
+                    segments.append(self._emit(gap))
+            self.next_gap = decide_stop + 1
+
+        if self.finished:
+            # 最后一个话题到文字稿结尾
+            self._take_block(n - 1)
+            segments.append(self._emit(n))
+        self._prune()
+        return segments
+
+    def _prune(self):
+        """丢弃之后不再需要的块、向量、相似度和深谷分数"""
+        semantic = self.semantic
+        next_sim = self.sim_base + len(self.sims)
+        next_depth = self.depth_base + len(self.depths)
+        # 块：待计算相似度的窗口和待计入话题的块
+        keep_block = self.n_blocks if self.finished else min(next_sim - semantic.window, self.next_gap - 1)
+        drop = max(0, keep_block - self.block_base)
+        if drop:
+            del self.blocks[:drop]
+            del self.vectors[:drop]
+            self.block_base += drop
+        # 相似度和深谷分数
+        drop = max(0, next_depth - semantic.peak_window - self.sim_base)
+        if drop:
+            del self.sims[:drop]
+            self.sim_base += drop
+        drop = max(0, self.next_gap - (semantic.min_blocks - 1) - self.depth_base)
+        if drop:
+            del self.depths[:drop]
+            self.depth_base += drop
@@ -0,0 +1,284 @@
+"""
+常驻模型服务
+在本地常驻进程中保持Whisper和pyannote模型加载，避免每个播客都重新加载模型
+"""
+
+import argparse
+import json
+import os
+import resource
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Optional
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = os.getenv('PODCAST_VISUALIZER_SERVER', f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+
+
+def current_rss() -> int:
+    """当前进程的常驻内存（字节）"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # 非Linux系统退而使用峰值内存
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if os.uname().sysname == 'Darwin' else usage * 1024
+
+
+class ModelServer:
+    """
+    常驻模型管理：按模型大小缓存Whisper，说话人分离模型只加载一次
+
+    workers大于1时每个模型大小保留一个进程池，各工作进程在第一个任务时加载模型，之后的任务直接复用。
+    """
+
+    def __init__(self, hf_token: str = None, workers: int = 1):
+        self.hf_token = hf_token
+        self.workers = workers
+        self.transcribers = {}
+        self.diarization = None
+        self.memory = {}
+        self.jobs_done = 0
+        self.current_job = None
+        self.started_at = time.time()
+        # 模型不是线程安全的，同一时间只处理一个任务
+        self.job_lock = threading.Lock()
+
+    def _load(self, name: str, loader):
+        rss_before = current_rss()
+        model = loader()
+        self.memory[name] = max(0, current_rss() - rss_before)
+        return model
+
+    def get_transcriber(self, model_size: str, vad: bool = False, load_whisper: bool = True):
+        """
+        获取带说话人分离的识别器
+
+        Args:
+            model_size: Whisper模型大小
+            vad: 是否跳过非语音部分
+            load_whisper: 是否加载Whisper模型（语音识别使用调用方缓存的结果时不需要）
+        """
+        from .transcriber import Transcriber, SpeakerDiarization, TranscriberWithSpeaker
+
+        if self.diarization is None:
+            self.diarization = self._load(
+                'pyannote', lambda: SpeakerDiarization(hf_token=self.hf_token))
+        if model_size not in self.transcribers:
+            self.transcribers[model_size] = Transcriber(model_size=model_size, workers=self.workers, keep_pool=True)
+        transcriber = self.transcribers[model_size]
+        if load_whisper and transcriber.workers <= 1 and not transcriber.loaded:
+            self._load(f'whisper-{model_size}', lambda: transcriber.model)
+
+        return TranscriberWithSpeaker(
+            transcriber=self.transcribers[model_size],
+            diarization=self.diarization,
+            vad=vad,
+        )
+
+    def transcribe(self, audio_path: str, model_size: str = "medium", cache_dir: str = None,
+                   checkpoint_path: str = None, resume: bool = True, words_path: str = None,
+                   vad: bool = False, asr: List[Dict] = None, speakers: List[Dict] = None) -> Dict:
+        """处理一个识别任务（asr、speakers为调用方缓存的分支结果）"""
+        from .audio import load_audio
+
+        with self.job_lock:
+            self.current_job = {'audio_path': audio_path, 'model_size': model_size, 'started_at': time.time()}
+            try:
+                transcriber = self.get_transcriber(model_size, vad=vad, load_whisper=asr is None)
+                transcription = transcriber.process(
+                    load_audio(audio_path, cache_dir=cache_dir),
+                    checkpoint_path=checkpoint_path, resume=resume,
+                    word_timestamps=bool(words_path), asr=asr, speakers=speakers,
+                )
+                if words_path and transcriber.words:
+                    transcriber.words.save(words_path)
+                self.jobs_done += 1
+                return {
+                    'transcription': transcription,
+                    'asr': transcriber.asr_result,
+                    'speakers': transcriber.speakers,
+                    'timings': transcriber.timings,
+                    'vad': transcriber.vad_report,
+                }
+            finally:
+                self.current_job = None
+
+    def status(self) -> Dict:
+        """已加载的模型和内存占用"""
+        return {
+            'models': {name: {'memory_bytes': size} for name, size in self.memory.items()},
+            'rss_bytes': current_rss(),
+            'busy': self.current_job is not None,
+            'current_job': self.current_job,
+            'jobs_done': self.jobs_done,
+            'uptime': time.time() - self.started_at,
+        }
+
+    def close(self):
+        """关闭各模型保留的进程池"""
+        for transcriber in self.transcribers.values():
+            transcriber.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "PodcastVisualizer/0.1"
+
+    def _send_json(self, status: int, data: Dict):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/status':
+            self._send_json(200, self.server.models.status())
+        else:
+            self._send_json(404, {'error': f"未知路径: {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/transcribe':
+            self._send_json(404, {'error': f"未知路径: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            job = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(job, dict):
+                raise ValueError("请求体必须是JSON对象")
+            audio_path = job['audio_path']
+        except (ValueError, KeyError) as e:
+            self._send_json(400, {'error': f"无效请求: {e}"})
+            return
+
+        if not os.path.exists(audio_path):
+            self._send_json(404, {'error': f"音频文件不存在: {audio_path}"})
+            return
+
+        try:
+            result = self.server.models.transcribe(
+                audio_path,
+                model_size=job.get('model_size', 'medium'),
+                cache_dir=job.get('cache_dir'),
+                checkpoint_path=job.get('checkpoint_path'),
+                resume=job.get('resume', True),
+                words_path=job.get('words_path'),
+                vad=job.get('vad', False),
+                asr=job.get('asr'),
+                speakers=job.get('speakers'),
+            )
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, result)
+
+    def log_message(self, format, *args):
+        print(f"[server] {self.address_string()} {format % args}")
+
+
+def server_available(url: str = DEFAULT_URL, timeout: float = 0.5) -> bool:
+    """检查模型服务是否在运行"""
+    try:
+        with urllib.request.urlopen(f"{url}/health", timeout=timeout) as resp:
+            return resp.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def request_transcription(audio_path: str, model_size: str = "medium", cache_dir: str = None,
+                          checkpoint_path: str = None, resume: bool = True, words_path: str = None,
+                          vad: bool = False, asr: List[Dict] = None, speakers: List[Dict] = None,
+                          url: str = DEFAULT_URL) -> Optional[Dict]:
+    """
+    通过模型服务进行识别
+
+    Args:
+        audio_path: 音频文件路径（服务与调用方共用文件系统）
+        model_size: Whisper模型大小
+        cache_dir: PCM缓存目录
+        checkpoint_path: 语音识别断点文件路径（可选）
+        resume: 是否从已有断点继续
+        words_path: 词级时间戳输出路径，提供时才进行词级对齐
+        vad: 是否跳过非语音部分
+        asr: 缓存的语音识别结果（提供时服务跳过语音识别）
+        speakers: 缓存的说话人分离结果（提供时服务跳过说话人分离）
+        url: 模型服务地址
+
+    Returns:
+        包含transcription（带说话人标签的文字稿）以及合并前的asr、speakers的字典；
+        服务未运行时返回None，由调用方在本进程内加载模型
+    """
+    if not server_available(url):
+        return None
+
+    print(f"🔌 使用常驻模型服务: {url}")
+    payload = json.dumps({
+        'audio_path': os.path.abspath(audio_path),
+        'model_size': model_size,
+        'cache_dir': cache_dir,
+        'checkpoint_path': checkpoint_path and os.path.abspath(checkpoint_path),
+        'resume': resume,
+        'words_path': words_path and os.path.abspath(words_path),
+        'vad': vad,
+        'asr': asr,
+        'speakers': speakers,
+    }).encode('utf-8')
+    req = urllib.request.Request(
+        f"{url}/transcribe", data=payload,
+        headers={'Content-Type': 'application/json'}, method='POST',
+    )
+    try:
+        with urllib.request.urlopen(req) as resp:
+            result = json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        message = json.loads(e.read() or b'{}').get('error', e.reason)
+        raise RuntimeError(f"模型服务处理失败: {message}") from e
+
+    return result
+
+
+def main():
+    """启动模型服务"""
+    parser = argparse.ArgumentParser(description="播客可视化工具 - 常驻模型服务")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"监听地址 (默认: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"监听端口 (默认: {DEFAULT_PORT})")
+    parser.add_argument(
+        "--model-size",
+        action="append",
+        choices=["tiny", "base", "small", "medium", "large"],
+        help="启动时预加载的Whisper模型，可重复指定",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="语音识别的并行进程数 (默认: 1)")
+    args = parser.parse_args()
+
+    models = ModelServer(workers=args.workers)
+    for model_size in args.model_size or []:
+        models.get_transcriber(model_size)
+
+    httpd = ThreadingHTTPServer((args.host, args.port), _Handler)
+    httpd.models = models
+    print(f"🚀 模型服务已启动: http://{args.host}:{args.port}")
+    print("  GET /health, GET /status, POST /transcribe")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        models.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+分环节结果缓存
+语音识别、说话人分离、合并后的文字稿和分块结果分别缓存为列式文件 {video_id}.{环节}.{键}.col，
+键是输入的哈希加模型、版本和参数；参数或代码版本变化时只有受影响的环节重新运行
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+from . import metrics
+from .alignment import merge_speakers
+from .cache import CacheManager, file_digest
+from .segmenter import Segmenter
+from .server import request_transcription
+
+# 各环节的代码版本：输出逻辑变化时加一，让旧的缓存失效
+STAGE_VERSIONS = {
+    'asr': 5,
+    'diarization': 1,
+    'merge': 1,
+    'segments': Segmenter.VERSION,
+}
+
+STAGE_NAMES = {
+    'asr': '语音识别',
+    'diarization': '说话人分离',
+    'merge': '文字稿',
+    'segments': '分块',
+}
+
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
+# 分块识别每块的目标时长（秒，与Transcriber的chunk_duration默认值一致）；流式处理的窗口时长由结果中的window给出
+CHUNK_DURATION = 600.0
+
+
+def package_version(name: str) -> Optional[str]:
+    """已安装的包版本（未安装时返回None）"""
+    from importlib import metadata
+
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def stage_key(stage: str, **inputs) -> str:
+    """
+    环节缓存键：环节名、代码版本和全部输入的哈希
+
+    Args:
+        stage: 环节名称（见STAGE_VERSIONS）
+        **inputs: 影响该环节输出的输入和参数（可JSON序列化）
+
+    Returns:
+        16位十六进制字符串
+    """
+    payload = json.dumps({'stage': stage, 'version': STAGE_VERSIONS[stage], 'inputs': inputs},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def stage_keys(audio_digest: str, metadata: Dict, model_size: str = "medium",
+               word_timestamps: bool = False, vad: bool = False, streamed: bool = False,
+               window: float = CHUNK_DURATION) -> Dict[str, str]:
+    """
+    计算一次处理中各环节的缓存键
+
+    下游环节的键包含上游环节的键，上游变化时下游一起失效；
+    语音识别的键包含识别方式和窗口时长（窗口边界处的识别结果不同）；
+    分块的键还包含语义分块使用的句向量模型（未安装时为词频）。
+
+    Args:
+        audio_digest: 音频文件的sha256
+        metadata: 视频元数据（分块使用description和duration）
+        model_size: Whisper模型大小
+        word_timestamps: 是否进行词级对齐
+        vad: 是否跳过非语音部分
+        streamed: 是否为边下载边识别（按窗口流式识别）
+        window: 语音识别的窗口时长（秒）
+
+    Returns:
+        {环节名: 缓存键}
+    """
+    from .semantic import embedding_model
+
+    asr = stage_key('asr', audio=audio_digest, model=model_size, whisper=package_version('openai-whisper'),
+                    word_timestamps=word_timestamps, vad=vad,
+                    mode='stream' if streamed else 'chunked', window=window)
+    diarization = stage_key('diarization', audio=audio_digest, model=DIARIZATION_MODEL,
+                            pyannote=package_version('pyannote.audio'), vad=vad)
+    merge = stage_key('merge', asr=asr, diarization=diarization)
+    segments = stage_key('segments', transcript=merge, description=metadata.get('description') or '',
+                         duration=metadata.get('duration') or 0, embedding=embedding_model())
+    return {'asr': asr, 'diarization': diarization, 'merge': merge, 'segments': segments}
+
+
+def audio_digest(cache: CacheManager, video_id: str, audio_path: str) -> str:
+    """音频的sha256：缓存中的音频直接使用清单记录的摘要，其他文件现场计算"""
+    suffix = os.path.splitext(audio_path)[1]
+    if os.path.abspath(audio_path) == os.path.abspath(cache.path(video_id, suffix)):
+        digest = cache.digest(video_id, suffix)
+        if digest:
+            return digest
+    return file_digest(audio_path)
+
+
+class StageCache:
+    """一个视频的分环节结果缓存"""
+
+    def __init__(self, cache: CacheManager, video_id: str, reuse: bool = True):
+        """
+        Args:
+            cache: 缓存管理器
+            video_id: 视频ID
+            reuse: 是否读取已有结果（False时只写入，相当于--skip-cache）
+        """
+        self.cache = cache
+        self.video_id = video_id
+        self.reuse = reuse
+
+    @staticmethod
+    def suffix(stage: str, key: str) -> str:
+        return f".{stage}.{key}.col"
+
+    def load(self, stage: str, key: str) -> Optional[List[Dict]]:
+        """读取环节结果（没有缓存或不复用时返回None）"""
+        from .transcript import load_transcript
+
+        if not self.reuse:
+            return None
+        path = self.cache.get(self.video_id, self.suffix(stage, key))
+        if not path:
+            return None
+        with metrics.stage(f'load_{stage}'):
+            transcript, segments, _ = load_transcript(path)
+            data = segments.to_dicts() if segments is not None else transcript.lines()
+        print(f"✓ 使用缓存的{STAGE_NAMES[stage]}结果 ({key})")
+        return data
+
+    def save(self, stage: str, key: str, data: List[Dict], transcription: List[Dict] = None) -> str:
+        """
+        写入环节结果并登记到缓存清单
+
+        Args:
+            stage: 环节名称
+            key: 缓存键
+            data: 环节结果（文字稿行列表或分块列表）
+            transcription: 分块所引用的文字稿（stage为segments时必须提供）
+        """
+        from .transcript import save_transcript
+
+        if stage == 'segments':
+            save_transcript(self.cache.path(self.video_id, self.suffix(stage, key)), transcription, data)
+        else:
+            save_transcript(self.cache.path(self.video_id, self.suffix(stage, key)), data)
+        return self.cache.put(self.video_id, self.suffix(stage, key), stage=stage)
+
+
+def run_stages(cache: CacheManager, video_id: str, audio_path: str, metadata: Dict,
+               model_size: str = "medium", workers: int = 1, word_timestamps: bool = False,
+               vad: bool = False, reuse: bool = True, streamed: Dict = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    识别、说话人分离、合并和分块，每个环节优先使用缓存
+
+    语音识别断点和词级时间戳也按语音识别的缓存键命名，换模型后不会从别的模型的断点继续。
+
+    Args:
+        cache: 缓存管理器
+        video_id: 视频ID
+        audio_path: 音频文件路径
+        metadata: 视频元数据
+        model_size: Whisper模型大小
+        workers: 语音识别的并行进程数
+        word_timestamps: 是否保留词级时间戳
+        vad: 是否跳过非语音部分
+        reuse: 是否复用已有的环节结果和断点
+        streamed: 流式处理的结果（已包含语音识别和说话人分离）
+
+    Returns:
+        (带说话人标签的文字稿, 分块列表)
+    """
+    keys = stage_keys(audio_digest(cache, video_id, audio_path), metadata,
+                      model_size=model_size, word_timestamps=word_timestamps, vad=vad,
+                      streamed=bool(streamed), window=streamed['window'] if streamed else CHUNK_DURATION)
+    stages = StageCache(cache, video_id, reuse=reuse)
+    checkpoint_path = cache.path(video_id, f".asr.{keys['asr']}.jsonl")
+    words_path = cache.path(video_id, f".words.{keys['asr']}.col") if word_timestamps else None
+    # 本次是否实际运行了语音识别（写入运行报告，批量处理估计实时率时跳过使用缓存的运行）
+    asr_ran = bool(streamed)
+
+    if streamed:
+        # 流式处理时识别和说话人分离已经完成
+        stages.save('asr', keys['asr'], streamed['asr'])
+        stages.save('diarization', keys['diarization'], streamed['speakers'])
+        transcription = streamed['transcription']
+        stages.save('merge', keys['merge'], transcription)
+        if words_path and streamed['words']:
+            streamed['words'].save(words_path)
+            cache.put(video_id, f".words.{keys['asr']}.col", stage='transcribe')
+    else:
+        transcription = stages.load('merge', keys['merge'])
+
+    if transcription is None:
+        asr = stages.load('asr', keys['asr'])
+        speakers = stages.load('diarization', keys['diarization'])
+        cached = {'asr': asr is not None, 'diarization': speakers is not None}
+        asr_ran = not cached['asr']
+
+        if asr is None or speakers is None:
+            # 优先使用常驻模型服务，未运行时在本进程内加载模型；已缓存的分支不再运行
+            remote_start = time.perf_counter()
+            result = request_transcription(
+                audio_path, model_size=model_size, cache_dir=cache.directory(video_id),
+                checkpoint_path=checkpoint_path, resume=reuse, words_path=words_path, vad=vad,
+                asr=asr, speakers=speakers)
+            if result is not None:
+                metrics.record('transcribe_remote', wall=time.perf_counter() - remote_start,
+                               audio_seconds=metadata.get('duration') or None)
+            else:
+                from .audio import load_audio
+                from .transcriber import TranscriberWithSpeaker
+
+                transcriber = TranscriberWithSpeaker(
+                    model_size=model_size, workers=workers, word_timestamps=word_timestamps, vad=vad)
+                # 解码音频（语音识别和说话人分离共用同一份PCM）
+                audio = load_audio(audio_path, cache_dir=cache.directory(video_id))
+                transcription = transcriber.process(audio, checkpoint_path=checkpoint_path, resume=reuse,
+                                                    asr=asr, speakers=speakers)
+                if words_path and transcriber.words:
+                    transcriber.words.save(words_path)
+                result = {'transcription': transcription, 'asr': transcriber.asr_result,
+                          'speakers': transcriber.speakers}
+
+            transcription = result['transcription']
+            if not cached['asr']:
+                stages.save('asr', keys['asr'], result['asr'])
+            if not cached['diarization']:
+                stages.save('diarization', keys['diarization'], result['speakers'])
+        else:
+            with metrics.stage('merge', segments=len(asr), turns=len(speakers)):
+                transcription = merge_speakers(asr, speakers)
+
+        stages.save('merge', keys['merge'], transcription)
+
+        # 登记识别过程中产生的中间产物
+        for suffix, stage in (('.f32', 'decode'), ('.speech.f32', 'vad'),
+                              (f".asr.{keys['asr']}.jsonl", 'transcribe'),
+                              (f".words.{keys['asr']}.col", 'transcribe')):
+            if os.path.exists(cache.path(video_id, suffix)):
+                cache.put(video_id, suffix, stage=stage)
+
+    report = metrics.active_report()
+    if report is not None:
+        report.info['asr_cached'] = not asr_ran
+
+    segments = stages.load('segments', keys['segments'])
+    if segments is None:
+        segmenter = Segmenter()
+        segments = segmenter.segment(
+            description=metadata.get('description', ''),
+            transcription=transcription,
+            duration=metadata.get('duration', 0)
+        )
+        stages.save('segments', keys['segments'], segments, transcription=transcription)
+
+    return transcription, segments
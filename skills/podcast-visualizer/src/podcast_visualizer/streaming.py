@@ -0,0 +1,378 @@
+"""
+流式处理模块
+边下载边解码：yt-dlp把原始音频写到管道，同时存入缓存并送入ffmpeg解码为16kHz PCM，
+语音识别按窗口处理已到达的音频，与下载剩余部分重叠进行
+"""
+
+import os
+import sys
+import shutil
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from . import metrics
+from .alignment import merge_speakers, stitch_segments
+from .audio import SAMPLE_RATE, find_split_points, load_pcm
+from .words import WordTimings
+
+
+class PCMStream:
+    """
+    边下载边解码的音频流
+
+    原始音频写入 audio_path，解码后的PCM追加写入 pcm_path（均先写临时文件，完成后改名），
+    已解码的部分可以随时读取。
+    """
+
+    def __init__(self, url: str, audio_path: str, pcm_path: str, format_selector: str = 'bestaudio/best',
+                 cookies_path: str = None, block_size: int = 1 << 16):
+        """
+        Args:
+            url: YouTube视频URL
+            audio_path: 原始音频的缓存路径
+            pcm_path: PCM的缓存路径 ({name}.f32)
+            format_selector: yt-dlp格式选择
+            cookies_path: Cookies文件路径
+            block_size: 每次从管道读取的字节数
+        """
+        self.url = url
+        self.audio_path = audio_path
+        self.pcm_path = pcm_path
+        self.format_selector = format_selector
+        self.cookies_path = cookies_path
+        self.block_size = block_size
+
+        self.samples = 0
+        self.bytes = 0
+        self.download_seconds = None
+        self.error = None
+        self._source_killed = False
+        self.done = threading.Event()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._started = None
+
+    def start(self):
+        """启动yt-dlp和ffmpeg，并在后台线程中搬运数据"""
+        cmd = [sys.executable, '-m', 'yt_dlp', '--quiet', '--no-warnings', '--no-part',
+               '-f', self.format_selector, '-o', '-', self.url]
+        if self.cookies_path:
+            # yt-dlp退出时会把cookies写回--cookies指定的文件，传给它一份私有副本，不改动共享的cookies文件
+            shutil.copyfile(self.cookies_path, self.audio_path + '.cookies.tmp')
+            cmd[3:3] = ['--cookies', self.audio_path + '.cookies.tmp']
+
+        self._started = time.perf_counter()
+        self._source = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._decoder = subprocess.Popen(
+            ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", "pipe:0",
+             "-f", "f32le", "-acodec", "pcm_f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        # 先创建PCM临时文件，读取方在第一个采样到达前也能打开
+        open(self.pcm_path + '.tmp', 'wb').close()
+
+        for target in (self._pump_source, self._pump_pcm):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _pump_source(self):
+        """yt-dlp输出 -> 原始音频缓存 + ffmpeg输入"""
+        try:
+            with open(self.audio_path + '.tmp', 'wb') as raw:
+                for block in iter(lambda: self._source.stdout.read(self.block_size), b''):
+                    raw.write(block)
+                    self.bytes += len(block)
+                    self._decoder.stdin.write(block)
+        except Exception as e:
+            # ffmpeg提前退出或写缓存失败：之后没有人读取yt-dlp的输出，管道写满后它会一直阻塞，
+            # 必须结束它，否则下面的wait()和_pump_pcm都不会返回
+            self._source_killed = True
+            self._source.kill()
+            if not isinstance(e, BrokenPipeError):
+                self.error = f"写入音频缓存失败: {e}"
+        finally:
+            try:
+                self._decoder.stdin.close()
+            except BrokenPipeError:
+                pass
+            self._source.wait()
+            self.download_seconds = time.perf_counter() - self._started
+
+    def _pump_pcm(self):
+        """ffmpeg输出 -> PCM缓存文件"""
+        try:
+            with open(self.pcm_path + '.tmp', 'ab') as pcm:
+                written = 0
+                for block in iter(lambda: self._decoder.stdout.read(self.block_size), b''):
+                    pcm.write(block)
+                    pcm.flush()
+                    written += len(block)
+                    with self._condition:
+                        self.samples = written // 4
+                        self._condition.notify_all()
+        except Exception as e:
+            # 写PCM失败：结束两个子进程，让_pump_source也能退出
+            self._source_killed = True
+            self._decoder.kill()
+            self._source.kill()
+            self.error = f"写入PCM缓存失败: {e}"
+        try:
+            self._decoder.wait()
+            self._source.wait()
+            if self.error is None:
+                if self._source.returncode != 0 and not self._source_killed:
+                    self.error = f"下载失败: {self._source.stderr.read().decode(errors='ignore').strip()}"
+                elif self._decoder.returncode != 0 or self._source_killed:
+                    detail = self._decoder.stderr.read().decode(errors='ignore').strip()
+                    self.error = f"音频解码失败: {detail or 'ffmpeg提前退出'}"
+        finally:
+            with self._condition:
+                self.done.set()
+                self._condition.notify_all()
+
+    def wait(self, samples: int) -> int:
+        """等待至少samples个采样可读（或流结束），返回当前可读的采样数"""
+        with self._condition:
+            while self.samples < samples and not self.done.is_set():
+                self._condition.wait()
+            return self.samples
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """读取已解码的 [start, end) 采样"""
+        return np.fromfile(self.pcm_path + '.tmp', dtype=np.float32, count=end - start, offset=start * 4)
+
+    def audio(self) -> np.ndarray:
+        """流结束后的完整音频（内存映射）"""
+        self.done.wait()
+        return load_pcm(self.pcm_path + '.tmp')
+
+    def _remove_tmp(self):
+        for path in (self.audio_path + '.tmp', self.pcm_path + '.tmp', self.audio_path + '.cookies.tmp'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def abort(self):
+        """中止：结束yt-dlp和ffmpeg，等待搬运线程退出并删除临时文件（可重复调用）"""
+        if self.error is None:
+            self.error = "流式处理已中止"
+        self._source_killed = True
+        for process in (self._source, self._decoder):
+            if process.poll() is None:
+                process.kill()
+        for process in (self._source, self._decoder):
+            process.wait()
+        for thread in self._threads:
+            thread.join()
+        self._remove_tmp()
+
+    def finish(self) -> str:
+        """
+        等待流结束，把临时文件改名为缓存文件
+
+        Returns:
+            PCM文件路径
+        """
+        for thread in self._threads:
+            thread.join()
+        if self.error:
+            self._remove_tmp()
+            raise RuntimeError(self.error)
+        os.replace(self.audio_path + '.tmp', self.audio_path)
+        os.replace(self.pcm_path + '.tmp', self.pcm_path)
+        self._remove_tmp()
+        return self.pcm_path
+
+
+def transcribe_stream(model, stream: PCMStream, options: Dict, window: float = 60.0,
+                      search_window: float = 5.0,
+                      on_segments: Optional[Callable[[List[Dict]], None]] = None) -> List[Dict]:
+    """
+    按窗口识别正在到达的音频
+
+    每个窗口等到窗口末尾之后再多search_window秒的音频到达，在这段范围内的静音处结束窗口。
+    未指定语言时用第一个窗口检测一次，之后的窗口使用同一语言；每个窗口以上一个窗口结尾的文字作为提示。
+
+    Args:
+        model: Whisper模型
+        stream: 音频流
+        options: 传给model.transcribe的参数
+        window: 窗口目标时长（秒）
+        search_window: 在窗口末尾前搜索静音的范围（秒）
+        on_segments: 每个窗口识别完成后的回调
+
+    Returns:
+        拼接后的识别结果
+    """
+    from .transcriber import _detect_language, _transcribe_window, _window_prompt
+
+    window_samples = int(window * SAMPLE_RATE)
+    lookahead = window_samples + int(search_window * SAMPLE_RATE)
+    chunks = []
+    start = 0
+    while True:
+        available = stream.wait(start + lookahead)
+        if available <= start:
+            break
+        if available >= start + lookahead:
+            split = find_split_points(stream.read(start, start + lookahead), window, search_window)[0][1]
+            end = start + split
+        else:
+            # 流已结束，剩余部分作为最后一个窗口
+            end = available
+
+        audio = stream.read(start, end)
+        if options.get('language') is None:
+            options = dict(options, language=_detect_language(model, audio))
+            print(f"✓ 检测到语言: {options['language']}")
+        segments = _transcribe_window(model, audio, start, end,
+                                      dict(options, initial_prompt=_window_prompt(chunks[-1] if chunks else [])))
+        chunks.append(segments)
+        if on_segments:
+            on_segments(segments)
+        start = end
+
+    return stitch_segments(chunks)
+
+
+def stream_process(url: str, audio_path: str, pcm_path: str, processor, format_selector: str = 'bestaudio/best',
+                   cookies_path: str = None, window: float = 60.0) -> Dict:
+    """
+    边下载边识别，下载完成后进行说话人分离（与剩余的语音识别同时进行），最后合并
+
+    Args:
+        url: YouTube视频URL
+        audio_path: 原始音频的缓存路径
+        pcm_path: PCM的缓存路径
+        processor: 返回TranscriberWithSpeaker的函数，在下载开始后调用，让模型加载与下载重叠
+        format_selector: yt-dlp格式选择
+        cookies_path: Cookies文件路径
+        window: 语音识别窗口时长（秒）
+
+    Returns:
+        包含transcription, asr, speakers, words, window, bytes, download_seconds, time_to_first_segment的字典
+    """
+    print(f"📡 流式处理: 边下载边识别 ({url})")
+    start = time.perf_counter()
+    stream = PCMStream(url, audio_path, pcm_path, format_selector, cookies_path).start()
+    try:
+        return _consume_stream(stream, processor, window, start)
+    except BaseException:
+        # 识别或说话人分离出错（包括Ctrl+C）：结束下载和解码进程，不留下临时文件
+        stream.abort()
+        raise
+
+
+def _consume_stream(stream: PCMStream, processor, window: float, start: float) -> Dict:
+    """stream_process的识别部分：按窗口识别、说话人分离、合并"""
+    with metrics.stage('load_models'):
+        transcriber = processor()
+    if transcriber.transcriber.model is None:
+        raise ValueError("流式处理需要在本进程内加载Whisper模型（workers=1）")
+
+    options = transcriber.transcriber._transcribe_options()
+    first_segment = []
+
+    def on_segments(segments):
+        if segments and not first_segment:
+            first_segment.append(time.perf_counter() - start)
+            print(f"⏱  首段文字稿: {first_segment[0]:.1f}s (已下载 {stream.bytes / 1024 ** 2:.1f}MB)")
+
+    def diarize():
+        # 说话人分离需要完整音频，下载结束后立即开始
+        audio = stream.audio()
+        if stream.error:
+            return []
+        with metrics.stage('diarization', audio_seconds=len(audio) / SAMPLE_RATE):
+            return transcriber.diarization.diarize(audio)
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        diar_future = pool.submit(diarize)
+        try:
+            with metrics.stage('asr_stream') as stage:
+                transcription = transcribe_stream(
+                    transcriber.transcriber.model, stream, options, window=window, on_segments=on_segments)
+                stage['audio_seconds'] = stream.samples / SAMPLE_RATE
+        except BaseException:
+            # 先中止下载，等待完整音频的说话人分离线程才能退出
+            stream.abort()
+            raise
+        speakers = diar_future.result()
+    words = WordTimings.from_segments(transcription) if options['word_timestamps'] else None
+
+    stream.finish()
+    metrics.record('download', wall=stream.download_seconds, audio_seconds=stream.samples / SAMPLE_RATE,
+                   bytes=stream.bytes, streaming=True,
+                   throughput=round(stream.bytes / stream.download_seconds) if stream.download_seconds else None)
+    if first_segment:
+        metrics.record('first_segment', wall=first_segment[0])
+
+    with metrics.stage('merge', segments=len(transcription), turns=len(speakers)):
+        merged = merge_speakers(transcription, speakers)
+
+    print(f"✓ 流式处理完成: 下载 {stream.download_seconds:.1f}s，总计 {time.perf_counter() - start:.1f}s")
+    return {
+        'transcription': merged,
+        'asr': transcription,
+        'speakers': speakers,
+        'words': words,
+        'window': window,
+        'bytes': stream.bytes,
+        'download_seconds': stream.download_seconds,
+        'time_to_first_segment': first_segment[0] if first_segment else None,
+    }
+
+
+def stream_episode(downloader, url: str, model_size: str = "medium", word_timestamps: bool = False,
+                   window: float = 60.0) -> Dict:
+    """
+    流式下载并识别一期节目，产物登记到下载器的缓存
+
+    先只获取元数据（确定音频格式和描述），再边下载边识别。
+
+    Args:
+        downloader: YouTubeDownloader（提供缓存、下载档位和cookies）
+        url: YouTube视频URL
+        model_size: Whisper模型大小
+        word_timestamps: 是否保留词级时间戳
+        window: 语音识别窗口时长（秒）
+
+    Returns:
+        与download_audio格式相同的字典，另含transcription, words, time_to_first_segment；
+        等待期间其他进程已下载完音频时，返回download_audio的缓存结果（不含transcription）
+    """
+    from .transcriber import TranscriberWithSpeaker
+
+    metadata = downloader.fetch_metadata(url)
+    if metadata.get('format_selector') != downloader.format_selector() or not metadata.get('format_id'):
+        # 缓存的元数据是按其他下载档位（或由download_audio）得到的，重新确定本次下载的格式和扩展名
+        metadata = downloader.fetch_metadata(url, skip_cache=True)
+    video_id = metadata['video_id']
+    cache = downloader.cache
+    audio_ext = metadata.get('audio_ext') or '.webm'
+    audio_path = cache.path(video_id, audio_ext)
+
+    # 与download_audio共用下载锁，同一视频不会被同时下载
+    with cache.lock(video_id, 'download') as lock:
+        cached = downloader.cached_audio(video_id) if lock.waited else None
+        if cached:
+            print(f"✓ 使用其他进程刚下载的音频: {video_id}")
+            return cached
+
+        result = stream_process(
+            url, audio_path, cache.path(video_id, '.f32'),
+            processor=lambda: TranscriberWithSpeaker(model_size=model_size, word_timestamps=word_timestamps),
+            # 按元数据中选定的格式下载，保证缓存文件的扩展名与实际格式一致
+            format_selector=metadata.get('format_id') or downloader.format_selector(),
+            cookies_path=downloader.cookies_path, window=window,
+        )
+        cache.put(video_id, audio_ext, stage='download')
+        cache.put(video_id, '.f32', stage='decode')
+
+    return dict(result, audio_path=audio_path, metadata=metadata, video_id=video_id, cached=False)
@@ -5,63 +5,340 @@
 
 import os
 import json
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple, Union
+import numpy as np
 import torch
-from typing import List, Dict
 from tqdm import tqdm
 import whisper
 from pyannote.audio import Pipeline
 from dotenv import load_dotenv
 
+from . import metrics
+from .alignment import merge_speakers, stitch_segments
+from .audio import SAMPLE_RATE, find_split_points, load_audio, load_pcm
+from .checkpoint import TranscriptCheckpoint
+from .vad import SpeechMap, detect_speech, plan_windows
+from .words import WordTimings
+
 load_dotenv()
 
 
+# 分块识别时，每个工作进程各自持有一份Whisper模型
+_worker_model = None
+
+
+def _init_worker(model_size: str, device: str, num_threads: int):
+    """进程池初始化：限制线程数并加载Whisper模型"""
+    global _worker_model
+    torch.set_num_threads(num_threads)
+    _worker_model = whisper.load_model(model_size, device=device)
+
+
+def _collect_segments(result: Dict, offset: float = 0.0, limit: float = None) -> List[Dict]:
+    """
+    从Whisper结果中取出片段，时间戳加上offset
+
+    开启词级时间戳时，words字段为紧凑的 [start, end, probability, word] 列表，
+    之后由WordTimings取出。
+    """
+    segments = []
+    for seg in result['segments']:
+        end = offset + seg['end']
+        item = {
+            'start': offset + seg['start'],
+            'end': min(end, limit) if limit is not None else end,
+            'text': seg['text'].strip(),
+        }
+        if 'words' in seg:
+            item['words'] = [
+                [offset + w['start'], offset + w['end'], w['probability'], w['word']]
+                for w in seg['words']
+            ]
+        segments.append(item)
+    return segments
+
+
+def _transcribe_window(model, audio: np.ndarray, start: int, end: int, options: Dict) -> List[Dict]:
+    """
+    识别一个音频块，并把时间戳换算到原始音频的时间轴
+
+    Args:
+        model: Whisper模型
+        audio: 音频块采样
+        start: 该块在原始音频中的起始采样
+        end: 该块在原始音频中的结束采样
+        options: 传给model.transcribe的参数
+
+    Returns:
+        使用绝对时间戳的片段列表
+    """
+    result = model.transcribe(audio, **options)
+    return _collect_segments(result, start / SAMPLE_RATE, end / SAMPLE_RATE)
+
+
+def _window_prompt(segments: List[Dict], max_chars: int = 200) -> Optional[str]:
+    """
+    上一块末尾的文字，作为下一块的initial_prompt
+
+    每块各自从头解码，用上一块的结尾延续上下文（用词、人名和标点风格）；Whisper只保留提示的最后223个token。
+    """
+    text = ' '.join(seg['text'] for seg in segments[-5:] if seg['text'])
+    return text[-max_chars:] or None
+
+
+def _detect_language(model, audio: np.ndarray) -> str:
+    """
+    用音频开头30秒检测语言（与whisper.transcribe自动检测的方式相同）
+
+    Args:
+        model: Whisper模型
+        audio: 音频采样
+
+    Returns:
+        语言代码（如 'zh'、'en'）
+    """
+    mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(np.ascontiguousarray(audio[:30 * SAMPLE_RATE])),
+                                      model.dims.n_mels)
+    _, probs = model.detect_language(mel.to(model.device))
+    return max(probs, key=probs.get)
+
+
+def _detect_chunk_language(source: Union[str, np.ndarray], start: int, end: int) -> str:
+    """检测一个音频块的语言（在工作进程中执行，source同_transcribe_chunk）"""
+    audio = load_pcm(source)[start:end] if isinstance(source, str) else source
+    return _detect_language(_worker_model, audio)
+
+
+def _transcribe_chunk(source: Union[str, np.ndarray], start: int, end: int, options: Dict) -> List[Dict]:
+    """
+    识别单个音频块（在工作进程中执行）
+
+    Args:
+        source: PCM文件路径（由工作进程自行内存映射）或已切好的音频块
+        start: 该块在原始音频中的起始采样
+        end: 该块在原始音频中的结束采样
+        options: 传给model.transcribe的参数
+
+    Returns:
+        使用绝对时间戳的片段列表
+    """
+    audio = load_pcm(source)[start:end] if isinstance(source, str) else source
+    return _transcribe_window(_worker_model, audio, start, end, options)
+
+
 class Transcriber:
     """语音识别器"""
 
-    def __init__(self, model_size: str = "medium", device: str = None):
+    def __init__(self, model_size: str = "medium", device: str = None, workers: int = 1,
+                 chunk_duration: float = 600, word_timestamps: bool = False, keep_pool: bool = False):
         """
         初始化语音识别器
 
         Args:
             model_size: Whisper模型大小 (tiny, base, small, medium, large)
             device: 使用的设备 (cuda/cpu)
+            workers: 并行识别的进程数，大于1时启用分块识别
+            chunk_duration: 分块识别时每块的目标时长（秒）
+            word_timestamps: 是否进行词级对齐，开启后结果保存在self.words
+            keep_pool: 多进程时保留进程池（及各进程加载的模型）供之后的识别复用，用完后调用close()
         """
         self.model_size = model_size
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
-
-        print(f"📝 加载Whisper模型 ({model_size})...")
-        self.model = whisper.load_model(model_size, device=self.device)
-        print(f"✓ Whisper模型加载完成 (设备: {self.device})")
-
-    def transcribe(self, audio_path: str) -> List[Dict]:
+        self.workers = max(1, workers)
+        self.chunk_duration = chunk_duration
+        self.word_timestamps = word_timestamps
+        self.keep_pool = keep_pool
+        self.words = None
+        self._model = None
+        self._pool = None
+
+        if self.workers > 1:
+            # 模型由各工作进程自行加载
+            print(f"✓ 分块识别模式: {self.workers}个进程 (每块约{int(chunk_duration)}秒)")
+
+    @property
+    def model(self):
+        """Whisper模型：单进程时在第一次使用时加载（语音识别使用缓存时不加载），多进程时为None"""
+        if self._model is None and self.workers <= 1:
+            print(f"📝 加载Whisper模型 ({self.model_size})...")
+            self._model = whisper.load_model(self.model_size, device=self.device)
+            print(f"✓ Whisper模型加载完成 (设备: {self.device})")
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        """Whisper模型是否已经加载（多进程时始终为False）"""
+        return self._model is not None
+
+    def _transcribe_options(self, word_timestamps: bool = None) -> Dict:
+        if word_timestamps is None:
+            word_timestamps = self.word_timestamps
+        return {
+            'language': None,  # 自动检测语言：分块识别时只检测一次，用于全部块
+            'task': "transcribe",
+            'word_timestamps': word_timestamps,  # 词级对齐有额外开销，只在需要时开启
+        }
+
+    def transcribe(self, audio: Union[str, np.ndarray], num_threads: int = None,
+                   checkpoint_path: str = None, resume: bool = True,
+                   word_timestamps: bool = None, windows: List[Tuple[int, int]] = None) -> List[Dict]:
         """
         语音识别
 
         Args:
-            audio_path: 音频文件路径
+            audio: 音频文件路径或16kHz单声道采样数组
+            num_threads: 分块识别时所有工作进程共用的CPU线程数（默认全部核心）
+            checkpoint_path: 断点文件路径，提供时逐块识别并把完成的块写入断点
+            resume: 是否从已有断点继续
+            word_timestamps: 是否进行词级对齐（默认使用初始化时的设置）
+            windows: 只识别这些采样区间（如VAD得到的语音窗口），其余音频跳过
 
         Returns:
-            识别结果列表，每个元素包含start, end, text
+            识别结果列表，每个元素包含start, end, text；词级时间戳保存在self.words
         """
-        print(f"📝 正在进行语音识别...")
-        result = self.model.transcribe(
-            audio_path,
-            language=None,  # 自动检测语言
-            task="transcribe",
-            word_timestamps=True,  # 获取词级时间戳
-        )
+        options = self._transcribe_options(word_timestamps)
+
+        if self.workers > 1 or checkpoint_path or windows is not None:
+            segments = self.transcribe_chunked(audio, num_threads=num_threads, options=options,
+                                               checkpoint_path=checkpoint_path, resume=resume,
+                                               windows=windows)
+        else:
+            print(f"📝 正在进行语音识别...")
+            segments = _collect_segments(self.model.transcribe(audio, **options))
+            print(f"✓ 识别完成，共{len(segments)}个片段")
+
+        self.words = WordTimings.from_segments(segments) if options['word_timestamps'] else None
+        return segments
 
-        segments = []
-        for seg in result['segments']:
-            segments.append({
-                'start': seg['start'],
-                'end': seg['end'],
-                'text': seg['text'].strip(),
-            })
+    def transcribe_chunked(self, audio: Union[str, np.ndarray], num_threads: int = None,
+                           options: Dict = None, checkpoint_path: str = None,
+                           resume: bool = True, windows: List[Tuple[int, int]] = None) -> List[Dict]:
+        """
+        分块语音识别
+
+        在静音处把音频切成若干块，多进程时由进程池并行识别，再按绝对时间戳拼接。
+        内存映射的PCM只把文件路径和采样范围交给工作进程，不复制音频数据。
+        未指定语言时用第一块检测一次，之后所有块使用同一语言（否则Whisper在每块开头各自检测）。
+        单进程时每块以上一块结尾的文字作为提示，延续块之间的上下文；多进程并行的块之间没有上下文。
+        提供断点文件时，每完成一块（按时间顺序）就提交到断点，重启后从最后提交的时间点继续。
 
+        Args:
+            audio: 音频文件路径或16kHz单声道采样数组
+            num_threads: 所有工作进程共用的CPU线程数（默认全部核心）
+            options: 传给model.transcribe的参数（默认使用初始化时的设置）
+            checkpoint_path: 断点文件路径（可选）
+            resume: 是否从已有断点继续
+            windows: 只识别这些采样区间（默认在静音处切分整段音频）
+
+        Returns:
+            识别结果列表，每个元素包含start, end, text
+        """
+        if isinstance(audio, str):
+            audio = load_audio(audio)
+        options = options or self._transcribe_options()
+        vad = windows is not None
+        if windows is None:
+            windows = find_split_points(audio, self.chunk_duration, sample_rate=SAMPLE_RATE)
+
+        pool = None
+        if self.workers > 1:
+            # 保留的进程池按全部进程创建，线程数在第一次识别时确定
+            workers = self.workers if self.keep_pool else min(self.workers, max(1, len(windows)))
+            pool = self._pool or self._new_pool(workers, max(1, (num_threads or os.cpu_count() or 1) // workers))
+            if self.keep_pool:
+                self._pool = pool
+
+        checkpoint = None
+        results = None
+        try:
+            if options['language'] is None and windows:
+                options = dict(options, language=self._detect_language(audio, windows[0], pool))
+                print(f"✓ 检测到语言: {options['language']}")
+
+            chunks = []
+            resume_sample = 0
+            if checkpoint_path:
+                # 识别参数（包括检测到的语言）变化后旧断点作废
+                params = dict(options, model_size=self.model_size, chunk_duration=self.chunk_duration, vad=vad,
+                              context=pool is None)
+                checkpoint = TranscriptCheckpoint(checkpoint_path, params, resume=resume)
+                chunks = list(checkpoint.chunks)
+                resume_sample = int(round(checkpoint.committed * SAMPLE_RATE))
+                if resume_sample:
+                    print(f"↻ 从断点继续: 已完成 {checkpoint.committed:.1f}s")
+
+            bounds = [(start, end) for start, end in windows if start >= resume_sample]
+            print(f"📝 正在进行分块语音识别 ({len(bounds)}块, {min(self.workers, max(1, len(bounds)))}个进程)...")
+            results = self._run_chunks(audio, bounds, options, pool, previous=chunks[-1] if chunks else None)
+            for (start, end), segments in tqdm(zip(bounds, results), total=len(bounds), desc="分块识别"):
+                chunks.append(segments)
+                if checkpoint:
+                    checkpoint.commit(start / SAMPLE_RATE, end / SAMPLE_RATE, segments)
+        finally:
+            if results is not None:
+                results.close()  # 出错时取消尚未开始的块
+            if checkpoint:
+                checkpoint.close()
+            if pool is not None and pool is not self._pool:
+                pool.shutdown()
+
+        segments = stitch_segments(chunks)
         print(f"✓ 识别完成，共{len(segments)}个片段")
         return segments
 
+    def _detect_language(self, audio: np.ndarray, window: Tuple[int, int],
+                         pool: ProcessPoolExecutor = None) -> str:
+        """检测第一块的语言（多进程时在工作进程中检测）"""
+        start, end = window
+        if pool is None:
+            return _detect_language(self.model, audio[start:end])
+        pcm_path = audio.filename if isinstance(audio, np.memmap) else None
+        return pool.submit(_detect_chunk_language, pcm_path or audio[start:end], start, end).result()
+
+    def _run_chunks(self, audio: np.ndarray, bounds: List[Tuple[int, int]], options: Dict,
+                    pool: ProcessPoolExecutor = None, previous: List[Dict] = None):
+        """
+        按时间顺序逐块产出识别结果
+
+        没有进程池时在本进程内逐块识别，每块以上一块（从断点继续时为最后提交的块）结尾的文字作为提示。
+        """
+        if pool is None:
+            for start, end in bounds:
+                options = dict(options, initial_prompt=_window_prompt(previous or []))
+                previous = _transcribe_window(self.model, audio[start:end], start, end, options)
+                yield previous
+            return
+
+        pcm_path = audio.filename if isinstance(audio, np.memmap) else None
+        futures = []
+        try:
+            futures = [
+                pool.submit(_transcribe_chunk, pcm_path or audio[start:end], start, end, options)
+                for start, end in bounds
+            ]
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _new_pool(self, workers: int, threads_per_worker: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_size, self.device, threads_per_worker),
+        )
+
+    def close(self):
+        """关闭保留的进程池"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
 
 class SpeakerDiarization:
     """说话人分离器"""
@@ -94,18 +371,27 @@ class SpeakerDiarization:
         self.pipeline = self.pipeline.to(device)
         print(f"✓ 说话人分离模型加载完成 (设备: {device})")
 
-    def diarize(self, audio_path: str) -> List[Dict]:
+    def diarize(self, audio: Union[str, np.ndarray]) -> List[Dict]:
         """
         说话人分离
 
         Args:
-            audio_path: 音频文件路径
+            audio: 音频文件路径或16kHz单声道采样数组
 
         Returns:
             说话人结果列表，每个元素包含start, end, speaker
         """
         print("📝 正在进行说话人分离...")
-        diarization = self.pipeline(audio_path)
+        if isinstance(audio, np.ndarray) and len(audio) == 0:
+            print("✓ 没有语音，跳过说话人分离")
+            return []
+        if isinstance(audio, np.ndarray):
+            # 直接传入波形，避免pyannote再次解码音频文件
+            audio = {
+                'waveform': torch.from_numpy(audio).unsqueeze(0),
+                'sample_rate': SAMPLE_RATE,
+            }
+        diarization = self.pipeline(audio)
 
         speakers = []
         for turn, _, speaker in diarization.itertracks(yield_label=True):
@@ -122,59 +408,176 @@ class SpeakerDiarization:
 class TranscriberWithSpeaker:
     """语音识别 + 说话人分离"""
 
-    def __init__(self, model_size: str = "medium", hf_token: str = None):
+    def __init__(self, model_size: str = "medium", hf_token: str = None, workers: int = 1,
+                 concurrent: bool = True, asr_thread_share: float = 0.5, word_timestamps: bool = False,
+                 vad: bool = False, transcriber: Transcriber = None, diarization: SpeakerDiarization = None):
         """
         初始化
 
         Args:
             model_size: Whisper模型大小
             hf_token: Hugging Face token
+            workers: 语音识别的并行进程数
+            concurrent: 是否同时进行语音识别和说话人分离
+            asr_thread_share: 并发时分给语音识别的CPU线程比例
+            word_timestamps: 是否保留词级时间戳
+            vad: 是否先做语音活动检测，只对语音部分进行识别和说话人分离
+            transcriber: 复用已加载的语音识别器（可选）
+            diarization: 复用已加载的说话人分离器（可选）
+        """
+        self.transcriber = transcriber or Transcriber(
+            model_size=model_size, workers=workers, word_timestamps=word_timestamps)
+        self.diarization = diarization or SpeakerDiarization(hf_token=hf_token)
+        self.concurrent = concurrent
+        self.asr_thread_share = asr_thread_share
+        self.vad = vad
+        self.timings = {}
+        self.vad_report = None
+        # 最近一次处理中合并前的两个分支结果，供分环节缓存使用
+        self.asr_result = None
+        self.speakers = None
+
+    def _run_branches(self, audio: np.ndarray, diar_audio: np.ndarray, asr: List[Dict] = None,
+                      speakers: List[Dict] = None, **asr_kwargs):
         """
-        self.transcriber = Transcriber(model_size=model_size)
-        self.diarization = SpeakerDiarization(hf_token=hf_token)
+        运行语音识别和说话人分离两个分支，并记录各自耗时
 
-    def process(self, audio_path: str) -> List[Dict]:
+        并发时按asr_thread_share拆分CPU线程：分块识别的工作进程使用语音识别的份额，
+        本进程内的torch线程池使用说话人分离的份额（非分块识别时两个分支共用本进程线程池，
+        平分全部核心），避免两个分支同时占满所有核心。
+        已提供asr或speakers（缓存的分支结果）时只运行另一个分支。
+        """
+        timings = {}
+        windows = asr_kwargs.get('windows')
+        audio_seconds = {
+            'asr': (sum(end - start for start, end in windows) if windows is not None else len(audio)) / SAMPLE_RATE,
+            'diarization': len(diar_audio) / SAMPLE_RATE,
+        }
+
+        def timed(name, func, *args, **kwargs):
+            start = time.perf_counter()
+            with metrics.stage(name, audio_seconds=audio_seconds[name]):
+                result = func(*args, **kwargs)
+            timings[name] = time.perf_counter() - start
+            return result
+
+        if not self.concurrent or asr is not None or speakers is not None:
+            transcription = asr if asr is not None else timed('asr', self.transcriber.transcribe, audio, **asr_kwargs)
+            if speakers is None:
+                speakers = timed('diarization', self.diarization.diarize, diar_audio)
+            return transcription, speakers, timings
+
+        total_threads = os.cpu_count() or 1
+        asr_threads = min(total_threads - 1, max(1, int(total_threads * self.asr_thread_share)))
+        if self.transcriber.workers > 1:
+            local_threads = max(1, total_threads - asr_threads)
+        else:
+            local_threads = max(1, total_threads // 2)
+
+        previous_threads = torch.get_num_threads()
+        torch.set_num_threads(local_threads)
+        try:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                asr_future = pool.submit(timed, 'asr', self.transcriber.transcribe,
+                                         audio, num_threads=max(1, asr_threads), **asr_kwargs)
+                diar_future = pool.submit(timed, 'diarization', self.diarization.diarize, diar_audio)
+                transcription = asr_future.result()
+                speakers = diar_future.result()
+        finally:
+            torch.set_num_threads(previous_threads)
+
+        return transcription, speakers, timings
+
+    def process(self, audio: Union[str, np.ndarray], checkpoint_path: str = None,
+                resume: bool = True, word_timestamps: bool = None,
+                asr: List[Dict] = None, speakers: List[Dict] = None) -> List[Dict]:
         """
         处理音频，返回带说话人标签的文字稿
 
+        两个分支合并前的结果保存在self.asr_result和self.speakers。
+
         Args:
-            audio_path: 音频文件路径
+            audio: 音频文件路径或16kHz单声道采样数组（传入路径时先解码为PCM，两个分支共用）
+            checkpoint_path: 语音识别断点文件路径（可选）
+            resume: 是否从已有断点继续
+            word_timestamps: 是否进行词级对齐（默认使用识别器的设置），结果见self.words
+            asr: 缓存的语音识别结果（提供时跳过语音识别）
+            speakers: 缓存的说话人分离结果（提供时跳过说话人分离）
 
         Returns:
             文字稿列表，每个元素包含start, end, speaker, text
         """
-        # 语音识别
-        transcription = self.transcriber.transcribe(audio_path)
-
-        # 说话人分离
-        speakers = self.diarization.diarize(audio_path)
+        start = time.perf_counter()
+        if asr is not None:
+            # 识别器可能被多个任务共用，不保留上一个任务的词级时间戳
+            self.transcriber.words = None
+
+        if isinstance(audio, str):
+            audio = load_audio(audio)
+
+        # 语音活动检测：语音识别只处理语音窗口，说话人分离处理拼接后的语音
+        windows = None
+        speech_map = None
+        diar_audio = audio
+        if self.vad:
+            with metrics.stage('vad', audio_seconds=len(audio) / SAMPLE_RATE) as stage:
+                windows = plan_windows(audio, detect_speech(audio), self.transcriber.chunk_duration)
+                speech_map = SpeechMap(windows, len(audio))
+                diar_audio = speech_map.compact(audio)
+                stage['skipped_fraction'] = speech_map.skipped_fraction
+            print(f"✓ 语音活动检测: 跳过 {speech_map.skipped_fraction:.1%} 的非语音音频")
+
+        # 语音识别 + 说话人分离
+        cached_speakers = speakers is not None
+        transcription, speakers, timings = self._run_branches(
+            audio, diar_audio, asr=asr, speakers=speakers, checkpoint_path=checkpoint_path, resume=resume,
+            word_timestamps=word_timestamps, windows=windows)
+        branches_done = time.perf_counter()
+
+        if speech_map:
+            # 缓存的说话人分离结果已经是原始时间轴
+            if not cached_speakers:
+                speakers = speech_map.map_intervals(speakers)
+            self.vad_report = self._vad_report(speech_map, timings)
+            print(
+                f"⏱  VAD跳过 {self.vad_report['skipped_seconds']:.0f}s 音频，"
+                f"估计节省 语音识别 {self.vad_report['asr_saved']:.1f}s | "
+                f"说话人分离 {self.vad_report['diarization_saved']:.1f}s"
+            )
 
         # 合并结果
-        result = []
-        for seg in tqdm(transcription, desc="合并识别结果"):
-            # 找到与当前文字片段重叠最多的说话人片段
-            best_speaker = None
-            max_overlap = 0
-
-            for speaker in speakers:
-                # 计算重叠时间
-                overlap_start = max(seg['start'], speaker['start'])
-                overlap_end = min(seg['end'], speaker['end'])
-                overlap = max(0, overlap_end - overlap_start)
-
-                if overlap > max_overlap:
-                    max_overlap = overlap
-                    best_speaker = speaker['speaker']
-
-            result.append({
-                'start': seg['start'],
-                'end': seg['end'],
-                'speaker': best_speaker or 'UNKNOWN',
-                'text': seg['text'],
-            })
+        with metrics.stage('merge', audio_seconds=len(audio) / SAMPLE_RATE,
+                           segments=len(transcription), turns=len(speakers)):
+            result = merge_speakers(transcription, speakers)
+
+        timings['merge'] = time.perf_counter() - branches_done
+        timings['total'] = time.perf_counter() - start
+        self.timings = timings
+        self.asr_result = transcription
+        self.speakers = speakers
+        print(
+            f"⏱  语音识别 {timings.get('asr', 0):.1f}s | 说话人分离 {timings.get('diarization', 0):.1f}s | "
+            f"合并 {timings['merge']:.1f}s | 总计 {timings['total']:.1f}s"
+        )
 
         return result
 
+    @staticmethod
+    def _vad_report(speech_map: SpeechMap, timings: Dict) -> Dict:
+        """按各分支在语音部分上的实时率，估计跳过非语音节省的时间"""
+        report = speech_map.report()
+        skipped = report['audio_seconds'] - report['speech_seconds']
+        speech = max(report['speech_seconds'], 1e-9)
+        report['skipped_seconds'] = skipped
+        report['asr_saved'] = timings.get('asr', 0) / speech * skipped
+        report['diarization_saved'] = timings.get('diarization', 0) / speech * skipped
+        return report
+
+    @property
+    def words(self) -> WordTimings:
+        """最近一次处理的词级时间戳（未开启时为None）"""
+        return self.transcriber.words
+
     def save_result(self, result: List[Dict], output_path: str):
         """
         保存结果到JSON文件
@@ -0,0 +1,320 @@
+"""
+列式文字稿存储
+文字稿的每个字段存成一列：start/end为float32数组，说话人为编码数组加字符串表，
+文本拼接成一个UTF-8字节串并用偏移量定位；分块保存为话题文本和对话在文字稿中的下标范围。
+文件可内存映射、按需切片，读取时不必解析整个JSON
+"""
+
+import os
+import sys
+import json
+import argparse
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from .columnar import write_columns, read_columns
+from .segmenter import ranges_from_dialogue
+
+# 转换回字典时时间戳保留的小数位（float32在几小时的时间轴上精度约为毫秒）
+TIME_DECIMALS = 3
+
+
+def _pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """字符串列表 -> (UTF-8字节串, 偏移量)，第i个字符串为 blob[offsets[i]:offsets[i + 1]]"""
+    blobs = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(blobs) + 1, dtype=np.uint64)
+    np.cumsum([len(b) for b in blobs], out=offsets[1:])
+    return np.frombuffer(b''.join(blobs), dtype=np.uint8), offsets
+
+
+def _unpack_strings(blob: np.ndarray, offsets: np.ndarray, first: int, last: int) -> List[str]:
+    """解码 [first, last) 范围内的字符串（只读取这一段字节）"""
+    base = int(offsets[first])
+    data = blob[base:int(offsets[last])].tobytes()
+    bounds = (offsets[first:last + 1] - base).tolist()
+    return [data[a:b].decode('utf-8') for a, b in zip(bounds, bounds[1:])]
+
+
+def _times(values: np.ndarray) -> List[float]:
+    return np.round(values.astype(np.float64), TIME_DECIMALS).tolist()
+
+
+class Transcript:
+    """
+    列式文字稿
+
+    每行包含start, end，以及可选的speaker和text（语音识别结果没有speaker，
+    说话人分离结果没有text）。按下标或切片访问时只解码需要的行。
+    """
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, speaker: np.ndarray = None,
+                 speakers: List[str] = None, text: np.ndarray = None, text_offsets: np.ndarray = None):
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.speakers = speakers or []
+        self.text = text
+        self.text_offsets = text_offsets
+
+    @classmethod
+    def from_lines(cls, lines: List[Dict]) -> 'Transcript':
+        """
+        从字典列表构建
+
+        Args:
+            lines: 每个元素包含start, end，以及可选的speaker, text（以第一行为准）
+        """
+        n = len(lines)
+        fields = lines[0] if lines else {}
+        speaker = speakers = text = text_offsets = None
+
+        if 'speaker' in fields:
+            table = {}
+            speaker = np.fromiter((table.setdefault(line['speaker'], len(table)) for line in lines),
+                                  dtype=np.uint16, count=n)
+            speakers = list(table)
+        if 'text' in fields:
+            text, text_offsets = _pack_strings([line['text'] for line in lines])
+
+        return cls(
+            start=np.fromiter((line['start'] for line in lines), dtype=np.float32, count=n),
+            end=np.fromiter((line['end'] for line in lines), dtype=np.float32, count=n),
+            speaker=speaker, speakers=speakers, text=text, text_offsets=text_offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            first, last, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("只支持连续切片")
+            return self.lines(first, last)
+        if key < 0:
+            key += len(self)
+        return self.lines(key, key + 1)[0]
+
+    def lines(self, first: int = 0, last: Optional[int] = None) -> List[Dict]:
+        """
+        把 [first, last) 行转换为字典列表
+
+        Args:
+            first: 起始行下标
+            last: 结束行下标（不含），默认到最后一行
+
+        Returns:
+            每个元素包含start, end（以及speaker, text）的字典列表
+        """
+        last = len(self) if last is None else last
+        if last <= first:
+            return []
+        starts = _times(self.start[first:last])
+        ends = _times(self.end[first:last])
+        speakers = texts = None
+        if self.speaker is not None:
+            speakers = [self.speakers[code] for code in self.speaker[first:last].tolist()]
+        if self.text is not None:
+            texts = _unpack_strings(self.text, self.text_offsets, first, last)
+
+        # 按字段组合分别用字典字面量构建，比逐行zip字段名快一倍以上
+        if speakers is not None and texts is not None:
+            return [{'start': s, 'end': e, 'speaker': sp, 'text': tx}
+                    for s, e, sp, tx in zip(starts, ends, speakers, texts)]
+        if texts is not None:
+            return [{'start': s, 'end': e, 'text': tx} for s, e, tx in zip(starts, ends, texts)]
+        if speakers is not None:
+            return [{'start': s, 'end': e, 'speaker': sp} for s, e, sp in zip(starts, ends, speakers)]
+        return [{'start': s, 'end': e} for s, e in zip(starts, ends)]
+
+    def index_between(self, start: float, end: float) -> Tuple[int, int]:
+        """起始时间落在 [start, end) 内的行的下标范围（文字稿按起始时间排序）"""
+        first = int(np.searchsorted(self.start, start, side='left'))
+        last = int(np.searchsorted(self.start, end, side='left'))
+        return first, last
+
+    def columns(self) -> Tuple[Dict[str, np.ndarray], Dict]:
+        """(列, 元数据)，用于写入列式文件"""
+        columns = {'start': self.start, 'end': self.end}
+        meta = {'speakers': self.speakers if self.speaker is not None else None}
+        if self.speaker is not None:
+            columns['speaker'] = self.speaker
+        if self.text is not None:
+            columns['text'] = self.text
+            columns['text_offsets'] = self.text_offsets
+        return columns, meta
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray], meta: Dict) -> 'Transcript':
+        return cls(
+            start=columns['start'], end=columns['end'],
+            speaker=columns.get('speaker'), speakers=meta.get('speakers'),
+            text=columns.get('text'), text_offsets=columns.get('text_offsets'),
+        )
+
+
+class Segments:
+    """
+    列式分块
+
+    每个分块保存start, end和话题文本；对话不复制文字稿，只保存下标范围
+    （第i个分块的对话为文字稿的 [first[i], last[i]) 行）。
+    """
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, topic: np.ndarray, topic_offsets: np.ndarray,
+                 first: np.ndarray, last: np.ndarray):
+        self.start = start
+        self.end = end
+        self.topic = topic
+        self.topic_offsets = topic_offsets
+        self.first = first
+        self.last = last
+
+    @classmethod
+    def from_dicts(cls, segments: List[Dict], transcription: List[Dict] = None) -> 'Segments':
+        """
+        从分块字典列表构建
+
+        Args:
+            segments: 分块列表，每个元素包含start, end, topic, first, last
+                （旧版带dialogue的分块先按transcription换算为下标范围）
+            transcription: 分块所引用的文字稿（只有旧版分块需要）
+        """
+        if segments and 'dialogue' in segments[0]:
+            _, segments = ranges_from_dialogue(segments, transcription)
+
+        topic, topic_offsets = _pack_strings([seg['topic'] for seg in segments])
+        n = len(segments)
+        return cls(
+            start=np.fromiter((seg['start'] for seg in segments), dtype=np.float32, count=n),
+            end=np.fromiter((seg['end'] for seg in segments), dtype=np.float32, count=n),
+            topic=topic, topic_offsets=topic_offsets,
+            first=np.fromiter((seg['first'] for seg in segments), dtype=np.uint32, count=n),
+            last=np.fromiter((seg['last'] for seg in segments), dtype=np.uint32, count=n),
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def to_dicts(self) -> List[Dict]:
+        """所有分块的start, end, topic, first, last（对话由调用方按需从文字稿切片）"""
+        topics = _unpack_strings(self.topic, self.topic_offsets, 0, len(self))
+        return [
+            {'start': start, 'end': end, 'topic': topic, 'first': first, 'last': last}
+            for start, end, topic, first, last in zip(_times(self.start), _times(self.end), topics,
+                                                       self.first.tolist(), self.last.tolist())
+        ]
+
+    def header(self, i: int) -> Dict:
+        """第i个分块的start, end, topic, first, last"""
+        return {
+            'start': _times(self.start[i:i + 1])[0],
+            'end': _times(self.end[i:i + 1])[0],
+            'topic': _unpack_strings(self.topic, self.topic_offsets, i, i + 1)[0],
+            'first': int(self.first[i]),
+            'last': int(self.last[i]),
+        }
+
+    def segment(self, i: int, transcript: Transcript) -> Dict:
+        """第i个分块，附带解码后的对话（只解码这一段）"""
+        header = self.header(i)
+        return dict(header, dialogue=transcript.lines(header['first'], header['last']))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {
+            'segment_start': self.start,
+            'segment_end': self.end,
+            'topic': self.topic,
+            'topic_offsets': self.topic_offsets,
+            'segment_first': self.first,
+            'segment_last': self.last,
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, np.ndarray]) -> 'Segments':
+        return cls(
+            start=columns['segment_start'], end=columns['segment_end'],
+            topic=columns['topic'], topic_offsets=columns['topic_offsets'],
+            first=columns['segment_first'], last=columns['segment_last'],
+        )
+
+
+def save_transcript(path: str, transcription: List[Dict], segments: List[Dict] = None, metadata: Dict = None):
+    """
+    写入列式文字稿文件（{video_id}.transcript.col）
+
+    Args:
+        path: 输出文件路径
+        transcription: 文字稿列表
+        segments: 分块列表（可选，first/last为transcription中的下标范围）
+        metadata: 视频元数据（可选）
+    """
+    transcript = Transcript.from_lines(transcription)
+    columns, meta = transcript.columns()
+    if segments is not None:
+        columns.update(Segments.from_dicts(segments, transcription).columns())
+    meta.update(kind='transcript', metadata=metadata, has_segments=segments is not None)
+    write_columns(path, columns, meta=meta)
+
+
+def load_transcript(path: str, mmap: bool = True) -> Tuple[Transcript, Optional[Segments], Dict]:
+    """
+    读取列式文字稿文件，默认内存映射，只在访问时解码
+
+    Args:
+        path: 文件路径
+        mmap: 是否内存映射
+
+    Returns:
+        (文字稿, 分块（文件中没有时为None）, 视频元数据)
+    """
+    columns, meta = read_columns(path, mmap=mmap)
+    if meta.get('kind') != 'transcript':
+        raise ValueError(f"不是文字稿文件: {path}")
+    segments = Segments.from_columns(columns) if meta.get('has_segments') else None
+    return Transcript.from_columns(columns, meta), segments, meta.get('metadata') or {}
+
+
+def transcript_to_json(path: str) -> Dict:
+    """列式文字稿 -> 旧版JSON结构 {'metadata', 'transcription', 'segments'}（分块的dialogue在导出时展开）"""
+    transcript, segments, metadata = load_transcript(path, mmap=False)
+    lines = transcript.lines()
+    data = {'metadata': metadata, 'transcription': lines}
+    if segments is not None:
+        data['segments'] = [
+            {'start': seg['start'], 'end': seg['end'], 'topic': seg['topic'],
+             'dialogue': lines[seg['first']:seg['last']]}
+            for seg in segments.to_dicts()
+        ]
+    return data
+
+
+def json_to_transcript(data: Dict, path: str):
+    """旧版JSON结构 {'metadata', 'transcription', 'segments'} -> 列式文字稿（dialogue换算为下标范围）"""
+    save_transcript(path, data.get('transcription', []), data.get('segments'), data.get('metadata'))
+
+
+def main(argv: Optional[List[str]] = None):
+    """to-json / from-json"""
+    parser = argparse.ArgumentParser(prog="podcast-visualizer transcript", description="播客可视化工具 - 文字稿格式转换")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("to-json", "列式文字稿转换为JSON"), ("from-json", "JSON转换为列式文字稿")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("source", help="输入文件")
+        command.add_argument("target", help="输出文件")
+    args = parser.parse_args(argv)
+
+    if args.command == "to-json":
+        data = transcript_to_json(args.source)
+        with open(args.target, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    else:
+        with open(args.source, 'r', encoding='utf-8') as f:
+            json_to_transcript(json.load(f), args.target)
+
+    size = os.path.getsize(args.target)
+    print(f"✓ 已转换: {args.source} -> {args.target} ({size / 1024:.0f}KB)")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
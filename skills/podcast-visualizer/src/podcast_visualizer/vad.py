@@ -0,0 +1,199 @@
+"""
+语音活动检测模块
+基于能量的快速VAD，找出语音区间，让语音识别和说话人分离跳过长段静音
+"""
+
+import os
+import bisect
+from typing import List, Dict, Tuple
+import numpy as np
+
+from .audio import SAMPLE_RATE, find_split_points, load_pcm
+from .cache import atomic_write
+
+
+def detect_speech(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_duration: float = 0.03,
+                  margin_db: float = 15.0, floor_db: float = -60.0, min_speech: float = 0.3,
+                  min_silence: float = 0.5, padding: float = 0.25,
+                  block_frames: int = 100000) -> List[Tuple[int, int]]:
+    """
+    检测语音区间
+
+    以帧能量的第10百分位估计底噪，高于底噪margin_db（且高于floor_db）的帧视为语音。
+    只区分有声和静音，无法区分语音和音乐。
+
+    Args:
+        audio: 单声道音频采样
+        sample_rate: 采样率
+        frame_duration: 帧长（秒）
+        margin_db: 语音帧高出底噪的分贝数
+        floor_db: 语音帧的最低能量（dBFS）
+        min_speech: 短于该时长的语音区间被丢弃（秒）
+        min_silence: 短于该时长的静音被并入相邻语音（秒）
+        padding: 每个语音区间两端额外保留的时长（秒）
+        block_frames: 分块计算能量的帧数，避免一次性读入整段内存映射音频
+
+    Returns:
+        (起始采样, 结束采样) 列表
+    """
+    frame = max(1, int(frame_duration * sample_rate))
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [(0, len(audio))] if len(audio) else []
+
+    db = np.empty(n_frames, dtype=np.float32)
+    for first in range(0, n_frames, block_frames):
+        last = min(n_frames, first + block_frames)
+        frames = np.asarray(audio[first * frame:last * frame], dtype=np.float32).reshape(-1, frame)
+        db[first:last] = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+
+    threshold = max(float(np.percentile(db, 10)) + margin_db, floor_db)
+    is_speech = np.concatenate([[False], db > threshold, [False]])
+    edges = np.flatnonzero(np.diff(is_speech.astype(np.int8)))
+    runs = [(int(start), int(end)) for start, end in zip(edges[::2], edges[1::2])]
+
+    # 合并短静音
+    merged = []
+    for start, end in runs:
+        if merged and (start - merged[-1][1]) * frame_duration < min_silence:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    pad = int(padding * sample_rate)
+    regions = []
+    for start, end in merged:
+        if (end - start) * frame_duration < min_speech:
+            continue
+        start = max(0, start * frame - pad)
+        end = min(len(audio), end * frame + pad)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+
+    return regions
+
+
+def plan_windows(audio: np.ndarray, regions: List[Tuple[int, int]], chunk_duration: float = 600,
+                 max_gap: float = 3.0, sample_rate: int = SAMPLE_RATE) -> List[Tuple[int, int]]:
+    """
+    把语音区间整理成识别窗口
+
+    间隔短于max_gap的语音区间合并成一个窗口（短停顿留给模型自己处理，保留上下文），
+    超过chunk_duration的窗口再在静音处切分。窗口之间的长段非语音被跳过。
+
+    Args:
+        audio: 单声道音频采样
+        regions: 语音区间（采样）
+        chunk_duration: 窗口最大时长（秒）
+        max_gap: 合并语音区间的最大间隔（秒）
+        sample_rate: 采样率
+
+    Returns:
+        按时间排序、互不重叠的 (起始采样, 结束采样) 列表
+    """
+    gap = int(max_gap * sample_rate)
+    merged = []
+    for start, end in regions:
+        if merged and start - merged[-1][1] < gap:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+    windows = []
+    for start, end in merged:
+        for sub_start, sub_end in find_split_points(audio[start:end], chunk_duration, sample_rate=sample_rate):
+            windows.append((start + sub_start, start + sub_end))
+    return windows
+
+
+class SpeechMap:
+    """
+    只含语音的紧凑时间轴与原始时间轴之间的映射
+
+    把各语音窗口首尾相接拼成一段紧凑音频，处理结果的时间戳再映射回原始时间轴。
+    """
+
+    def __init__(self, windows: List[Tuple[int, int]], total_samples: int, sample_rate: int = SAMPLE_RATE):
+        self.windows = windows
+        self.total_samples = total_samples
+        self.sample_rate = sample_rate
+
+        # 每个窗口在紧凑时间轴上的起始位置（秒）
+        self.compact_starts = []
+        position = 0
+        for start, end in windows:
+            self.compact_starts.append(position / sample_rate)
+            position += end - start
+        self.speech_samples = position
+
+    @property
+    def total_seconds(self) -> float:
+        return self.total_samples / self.sample_rate
+
+    @property
+    def speech_seconds(self) -> float:
+        return self.speech_samples / self.sample_rate
+
+    @property
+    def skipped_fraction(self) -> float:
+        if not self.total_samples:
+            return 0.0
+        return 1 - self.speech_samples / self.total_samples
+
+    def compact(self, audio: np.ndarray) -> np.ndarray:
+        """
+        拼接所有语音窗口
+
+        输入是内存映射的PCM时，结果写到旁边的 {name}.speech.f32 并同样内存映射。
+        """
+        if isinstance(audio, np.memmap) and audio.filename:
+            path = os.path.splitext(audio.filename)[0] + '.speech.f32'
+            with atomic_write(path, 'wb') as f:
+                for start, end in self.windows:
+                    f.write(np.asarray(audio[start:end], dtype=np.float32).tobytes())
+            return load_pcm(path)
+
+        if not self.windows:
+            return np.zeros(0, dtype=np.float32)
+        return np.concatenate([audio[start:end] for start, end in self.windows])
+
+    def to_original(self, t: float) -> Tuple[int, float]:
+        """紧凑时间轴上的时间点 -> (窗口下标, 原始时间轴上的时间)"""
+        i = max(0, bisect.bisect_right(self.compact_starts, t) - 1)
+        return i, self.windows[i][0] / self.sample_rate + (t - self.compact_starts[i])
+
+    def map_intervals(self, items: List[Dict]) -> List[Dict]:
+        """
+        把紧凑时间轴上的区间映射回原始时间轴
+
+        跨越窗口拼接处的区间在拼接处拆成两段。
+
+        Args:
+            items: 包含start, end的字典列表
+
+        Returns:
+            使用原始时间戳的新列表
+        """
+        if not self.windows:
+            return [dict(item) for item in items]
+
+        mapped = []
+        for item in items:
+            first, start = self.to_original(item['start'])
+            # 结束点恰好落在拼接处时归属前一个窗口
+            last = max(first, bisect.bisect_left(self.compact_starts, item['end']) - 1)
+            end = self.windows[last][0] / self.sample_rate + (item['end'] - self.compact_starts[last])
+            for i in range(first, last + 1):
+                piece_start = start if i == first else self.windows[i][0] / self.sample_rate
+                piece_end = end if i == last else self.windows[i][1] / self.sample_rate
+                mapped.append(dict(item, start=piece_start, end=piece_end))
+        return mapped
+
+    def report(self) -> Dict:
+        return {
+            'audio_seconds': self.total_seconds,
+            'speech_seconds': self.speech_seconds,
+            'skipped_fraction': self.skipped_fraction,
+        }
@@ -5,9 +5,23 @@ Streamlit交互式网站
 
 import streamlit as st
 import os
+import glob
 import json
 from typing import List, Dict
+from .cache import CacheManager
 from .parser import TimelineParser
+from .segmenter import Segmenter, filter_segments, segment_dialogue, ranges_from_dialogue
+from .checkpoint import read_checkpoint
+
+# 播放器的MIME类型（下载默认保留原始的opus/m4a音频）
+AUDIO_FORMATS = {
+    '.mp3': 'audio/mp3',
+    '.m4a': 'audio/mp4',
+    '.webm': 'audio/webm',
+    '.opus': 'audio/ogg',
+    '.ogg': 'audio/ogg',
+    '.wav': 'audio/wav',
+}
 
 
 def render_segment_dialogue(dialogue: List[Dict]):
@@ -45,10 +59,11 @@ def render_segment_dialogue(dialogue: List[Dict]):
         return '#f5f5f5'
 
     for seg in dialogue:
-        color = get_speaker_color(seg['speaker'])
+        speaker = seg.get('speaker', 'UNKNOWN')
+        color = get_speaker_color(speaker)
         st.markdown(
             f'<div style="background-color: {color}; padding: 10px; border-radius: 5px; margin-bottom: 8px;">'
-            f'<strong>{seg["speaker"]}</strong> '
+            f'<strong>{speaker}</strong> '
             f'<span style="color: #666; font-size: 0.8em;">({seg["start"]:.1f}s - {seg["end"]:.1f}s)</span><br>'
             f'{seg["text"]}'
             f'</div>',
@@ -72,9 +87,16 @@ def main():
         return
 
     segments = st.session_state['segments']
+    # 文字稿：列式文字稿（内存映射，切片时才解码）或字典列表，分块的对话按first/last切片
+    transcript = st.session_state.get('transcript', [])
     metadata = st.session_state.get('metadata', {})
     audio_path = st.session_state.get('audio_path', '')
 
+    if st.session_state.get('partial'):
+        committed = int(st.session_state.get('committed', 0))
+        st.info(f"⏳ 识别进行中，已完成到 {TimelineParser().format_timestamp(committed)}（尚未区分说话人）")
+        st.button("🔄 刷新")
+
     # 显示元数据
     if metadata:
         st.sidebar.markdown("## 📋 播客信息")
@@ -91,13 +113,7 @@ def main():
 
     # 过滤分块
     if search_query:
-        filtered_segments = []
-        for seg in segments:
-            # 搜索话题和对话内容
-            if (search_query.lower() in seg['topic'].lower() or
-                any(search_query.lower() in d['text'].lower() for d in seg['dialogue'])):
-                filtered_segments.append(seg)
-        segments = filtered_segments
+        segments = filter_segments(segments, transcript, search_query)
 
         if not segments:
             st.warning(f"未找到包含 '{search_query}' 的内容")
@@ -127,10 +143,10 @@ def main():
 
     # 音频播放器
     if audio_path and os.path.exists(audio_path):
-        st.audio(audio_path, format='audio/mp3')
+        st.audio(audio_path, format=AUDIO_FORMATS.get(os.path.splitext(audio_path)[1], 'audio/mp3'))
 
     # 对话内容
-    render_segment_dialogue(selected_segment['dialogue'])
+    render_segment_dialogue(segment_dialogue(selected_segment, transcript))
 
     # 显示统计信息
     st.markdown("---")
@@ -138,7 +154,7 @@ def main():
     with col1:
         st.metric("话题数量", len(segments))
     with col2:
-        total_words = sum(len(seg['dialogue']) for seg in segments)
+        total_words = sum(seg['last'] - seg['first'] for seg in segments)
         st.metric("对话片段", total_words)
     with col3:
         duration = segments[-1]['end'] - segments[0]['start'] if segments else 0
@@ -149,16 +165,107 @@ def load_data(data_path: str, audio_path: str = None):
     """
     加载数据到session state
 
+    只读入分块的话题和下标范围，对话在显示或搜索时才从文字稿中解码。
+
     Args:
-        data_path: JSON数据文件路径
+        data_path: 列式文字稿文件（{video_id}.transcript.col）或旧版JSON数据文件路径
         audio_path: 音频文件路径
     """
-    with open(data_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if data_path.endswith('.col'):
+        from .transcript import load_transcript
 
-    st.session_state['segments'] = data.get('segments', [])
-    st.session_state['metadata'] = data.get('metadata', {})
+        transcript, segments, metadata = load_transcript(data_path)
+        segments = segments.to_dicts() if segments is not None else []
+    else:
+        with open(data_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        transcript, segments = ranges_from_dialogue(data.get('segments', []), data.get('transcription'))
+        metadata = data.get('metadata', {})
+
+    st.session_state['transcript'] = transcript
+    st.session_state['segments'] = segments
+    st.session_state['metadata'] = metadata
     st.session_state['audio_path'] = audio_path
+    st.session_state['partial'] = False
+
+
+def load_partial(checkpoint_path: str, audio_path: str = None, metadata: Dict = None):
+    """
+    加载仍在识别中的部分文字稿到session state
+
+    Args:
+        checkpoint_path: 识别断点文件路径
+        audio_path: 音频文件路径
+        metadata: 视频元数据（有timeline时按timeline分块）
+    """
+    transcription, committed = read_checkpoint(checkpoint_path)
+    metadata = metadata or {}
+
+    # 增量分块器保存在session state中，每次刷新只输入上次之后新增的行；
+    # 只显示分界已经确定的话题，其余部分作为一个识别中的话题，刷新时已显示的话题不会变化
+    state = st.session_state.get('partial_state')
+    if state is None or state['path'] != checkpoint_path or state['fed'] > len(transcription):
+        state = {
+            'path': checkpoint_path,
+            'segmenter': Segmenter().incremental(metadata.get('description'), metadata.get('duration') or 0),
+            'topics': [],
+            'fed': 0,
+        }
+        st.session_state['partial_state'] = state
+    state['topics'].extend(state['segmenter'].feed(transcription[state['fed']:]))
+    state['fed'] = len(transcription)
+
+    segments = list(state['topics'])
+    first = segments[-1]['last'] if segments else 0
+    if first < len(transcription):
+        segments.append({
+            'start': segments[-1]['end'] if segments else 0,
+            'end': transcription[-1]['end'],
+            'topic': '⏳ 识别中',
+            'first': first,
+            'last': len(transcription),
+        })
+
+    st.session_state['transcript'] = transcription
+    st.session_state['segments'] = segments
+    st.session_state['metadata'] = metadata
+    st.session_state['audio_path'] = audio_path
+    st.session_state['partial'] = True
+    st.session_state['committed'] = committed
+
+
+def load_video(cache_dir: str, video_id: str):
+    """
+    按video_id从缓存加载数据到session state
+
+    处理完成后读取 {video_id}.transcript.col；仍在处理（或还没有结果）时读取最新的语音识别断点，
+    每次刷新页面都重新检查，识别完成后自动切换到完整结果。
+
+    Args:
+        cache_dir: 缓存根目录（None表示默认目录）
+        video_id: 视频ID
+    """
+    cache = CacheManager(cache_dir)
+    try:
+        result_path = cache.path(video_id, '.transcript.col')
+        # 网页播放器优先使用转码后的mp3，其次是原始音频
+        audio_path = next((cache.path(video_id, ext) for ext in AUDIO_FORMATS
+                           if os.path.exists(cache.path(video_id, ext))), None)
+        metadata_path = cache.path(video_id, '.metadata.json')
+        metadata = {}
+        if os.path.exists(metadata_path):
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+
+        checkpoints = sorted(glob.glob(cache.path(video_id, '.asr.*.jsonl')), key=os.path.getmtime)
+        processing = cache.lock(video_id, 'process').locked()
+        if os.path.exists(result_path) and not (processing and checkpoints):
+            load_data(result_path, audio_path)
+            st.session_state['metadata'] = st.session_state['metadata'] or metadata
+        elif checkpoints:
+            load_partial(checkpoints[-1], audio_path, metadata)
+    finally:
+        cache.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,104 @@
+"""
+词级时间戳模块
+用平行数组紧凑保存Whisper的词级时间戳，而不是嵌套字典
+"""
+
+from typing import List, Dict
+import numpy as np
+
+from .columnar import write_columns, read_columns
+
+
+class WordTimings:
+    """
+    词级时间戳
+
+    所有词的文本拼接成一个UTF-8字节串，用text_offsets定位；
+    segment_offsets记录每个文字片段在词数组中的起始下标（第i个片段的词为
+    [segment_offsets[i], segment_offsets[i + 1])）。
+    """
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, probability: np.ndarray,
+                 text: np.ndarray, text_offsets: np.ndarray, segment_offsets: np.ndarray):
+        self.start = start
+        self.end = end
+        self.probability = probability
+        self.text = text
+        self.text_offsets = text_offsets
+        self.segment_offsets = segment_offsets
+
+    @classmethod
+    def from_segments(cls, segments: List[Dict]) -> 'WordTimings':
+        """
+        从识别片段中取出词级时间戳（会从片段中移除words字段）
+
+        Args:
+            segments: 识别片段列表，words字段为 [start, end, probability, word] 列表
+
+        Returns:
+            WordTimings
+        """
+        starts, ends, probs, blobs = [], [], [], []
+        segment_offsets = [0]
+        for seg in segments:
+            for start, end, prob, word in seg.pop('words', None) or []:
+                starts.append(start)
+                ends.append(end)
+                probs.append(prob)
+                blobs.append(word.encode('utf-8'))
+            segment_offsets.append(len(starts))
+
+        text_offsets = np.zeros(len(blobs) + 1, dtype=np.uint32)
+        np.cumsum([len(b) for b in blobs], out=text_offsets[1:])
+
+        return cls(
+            start=np.array(starts, dtype=np.float32),
+            end=np.array(ends, dtype=np.float32),
+            probability=np.array(probs, dtype=np.float32),
+            text=np.frombuffer(b''.join(blobs), dtype=np.uint8),
+            text_offsets=text_offsets,
+            segment_offsets=np.array(segment_offsets, dtype=np.uint32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def word(self, i: int) -> Dict:
+        """第i个词"""
+        text = self.text[self.text_offsets[i]:self.text_offsets[i + 1]].tobytes().decode('utf-8')
+        return {
+            'start': float(self.start[i]),
+            'end': float(self.end[i]),
+            'probability': float(self.probability[i]),
+            'word': text,
+        }
+
+    def segment_words(self, segment_index: int) -> List[Dict]:
+        """第segment_index个文字片段的所有词"""
+        first = self.segment_offsets[segment_index]
+        last = self.segment_offsets[segment_index + 1]
+        return [self.word(i) for i in range(first, last)]
+
+    def words_between(self, start: float, end: float) -> List[Dict]:
+        """起始时间落在 [start, end) 内的词"""
+        first = int(np.searchsorted(self.start, start, side='left'))
+        last = int(np.searchsorted(self.start, end, side='left'))
+        return [self.word(i) for i in range(first, last)]
+
+    def save(self, path: str):
+        """保存为列式文件"""
+        write_columns(path, {
+            'start': self.start,
+            'end': self.end,
+            'probability': self.probability,
+            'text': self.text,
+            'text_offsets': self.text_offsets,
+            'segment_offsets': self.segment_offsets,
+        }, meta={'kind': 'words'})
+        print(f"✓ 词级时间戳已保存到: {path} ({len(self)}个词)")
+
+    @classmethod
+    def load(cls, path: str) -> 'WordTimings':
+        """以内存映射方式加载"""
+        columns, _ = read_columns(path)
+        return cls(**columns)